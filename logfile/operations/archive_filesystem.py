@@ -0,0 +1,824 @@
+"""
+Module contains a read-only file system exposing archive members as paths
+"""
+import io
+import os
+import tarfile
+import zipfile
+import logging
+import tempfile
+import threading
+import contextlib
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+from typing import (IO, Any, Dict, Iterator, List, NamedTuple, Optional, Set,
+                    Tuple, Union)
+from logfile.operations.decompressors import DECOMPRESSION_ERRORS, \
+    HEADER_SIZE, Decompressor, decompressor_for_name, detect_header, \
+    trusts_magic
+from logfile.operations.file_manifest import FileManifest
+from logfile.operations.workfolder_snapshot import FileStat
+
+# pylint: disable=W1203
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+ContainerKey = Tuple[str, ...]
+
+
+class ArchiveMember(NamedTuple):
+    """
+    File inside an archive
+
+    name is the normalized path used in virtual paths, source_name the
+    name stored in the archive. offset is where the data of a plain tar
+    member starts, -1 when the member can only be read by decompressing.
+    """
+    name: str
+    source_name: str
+    size: int
+    offset: int = -1
+
+
+class ArchiveListing(NamedTuple):
+    """
+    Members and directories of an archive, kind is 'tar', 'zip' or
+    'stream' for a single compressed file
+    """
+    kind: str
+    decompressor: Decompressor
+    members: Dict[str, ArchiveMember]
+    children: Dict[str, Tuple[List[str], List[str]]]
+
+
+class _Location(NamedTuple):
+    """
+    Archive holding a virtual path and the member or directory name of it
+    """
+    container: ContainerKey
+    name: str
+    is_file: bool
+
+
+class ArchiveFileSystem:
+    """
+    Exposes archive contents as paths below the archive, read-only.
+
+    An archive is a directory named like the archive file:
+        work/bundle.tgz/var/log/messages
+        work/bundle.tgz/logs.zip/app.log
+        work/messages.1.gz/messages.1
+    Archives inside archives are directories too. Every other path is
+    passed on to the real file system.
+
+    Archives are listed once from their headers, the listing is read again
+    when the archive file changes. Real files found not to be archives are
+    remembered the same way, so walking again does not open them. Members
+    are decompressed when opened, members up to cache_bytes are kept in
+    memory and the least recently used are dropped when the cache grows
+    beyond cache_bytes. Larger members are decompressed to a temporary
+    file each time they are opened. Members of plain tar files are read at
+    their offset without decompressing anything else.
+
+    A member of a compressed tar can only be reached by decompressing the
+    tar from its start. Members passed on the way, and members after it
+    while they fit cache_bytes, are cached too, so reading every member of
+    a tar whose members fit the cache decompresses it once. Otherwise each
+    uncached member read decompresses the tar up to that member.
+    """
+
+    def __init__(self, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Args:
+            cache_bytes(int): Size of decompressed members kept in memory
+        """
+        self._cache_bytes = max(0, cache_bytes)
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[Tuple[ContainerKey, str], bytes]" = \
+            OrderedDict()
+        self._cached_bytes = 0
+        self._listings: Dict[ContainerKey,
+                             Tuple[Optional[FileStat],
+                                   Optional[ArchiveListing]]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"cache_bytes": self._cache_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["cache_bytes"])  # type: ignore
+
+    @property
+    def cached_bytes(self) -> int:
+        """
+        Get size of members kept in memory
+
+        Returns:
+            int: Size in bytes
+        """
+        return self._cached_bytes
+
+    @staticmethod
+    def extracted_name(name: str) -> str:
+        """
+        Get name an archive would be extracted to, the archive extension
+        is removed or '.d' appended if it has none
+
+        Args:
+            name(str): Archive file name
+
+        Returns:
+            str: Name of extracted file or directory
+        """
+        path = PurePosixPath(name)
+        decompressor = decompressor_for_name(name)
+        if decompressor is None:
+            return name + ".d"
+        stem = PurePosixPath(path.stem)
+        if decompressor.is_tar(name) and stem.suffix.lower() == ".tar":
+            return stem.stem
+        return str(stem)
+
+    def is_virtual(self, path: str) -> bool:
+        """
+        Checks path is inside an archive
+
+        Args:
+            path(str): Path
+
+        Returns:
+            bool: Path is resolved inside an archive
+        """
+        split = self._split(path)
+        return bool(split and split[1])
+
+    def exists(self, path: str) -> bool:
+        """
+        Checks path is a file or directory, real or inside an archive
+
+        Args:
+            path(str): Path
+
+        Returns:
+            bool: Path exists
+        """
+        return os.path.exists(path) or self._locate(path) is not None
+
+    def is_file(self, path: str) -> bool:
+        """
+        Checks path is a file, archives inside archives are files too
+
+        Args:
+            path(str): Path
+
+        Returns:
+            bool: Path is a file
+        """
+        if os.path.exists(path):
+            return os.path.isfile(path)
+        location = self._locate(path)
+        return bool(location and location.is_file)
+
+    def is_dir(self, path: str) -> bool:
+        """
+        Checks path is a directory, archives are directories too
+
+        Args:
+            path(str): Path
+
+        Returns:
+            bool: Path is a directory
+        """
+        if os.path.isdir(path):
+            return True
+        location = self._locate(path)
+        if location is None:
+            return False
+        return not location.is_file or self._listing(
+            location.container + (location.name,)) is not None
+
+    def real_directory(self, path: str) -> str:
+        """
+        Get real directory a directory inside an archive would have after
+        extracting every archive on the way, for writing output next to
+        files read inside archives
+
+        Args:
+            path(str): Directory path
+
+        Returns:
+            str: Real directory path
+        """
+        split = self._split(path)
+        if split is None:
+            return path
+        real, parts = split
+        names = [self.extracted_name(Path(real).name)]
+        container: ContainerKey = (real,)
+        while parts:
+            listing = self._listing(container)
+            index = self._member_index(listing, parts) if listing else 0
+            nested = container + ("/".join(parts[:index]),)
+            if not index or (index == len(parts) and
+                             self._listing(nested) is None):
+                names.extend(parts)
+                break
+            names.extend(parts[:index - 1])
+            names.append(self.extracted_name(parts[index - 1]))
+            container = nested
+            parts = parts[index:]
+        return Path(real).parent.joinpath(*names).as_posix()
+
+    def open(self, path: str) -> IO[bytes]:
+        """
+        Opens file for binary reading, real or inside an archive
+
+        Args:
+            path(str): Filepath
+
+        Returns:
+            IO: Readable file, must be closed by caller
+
+        Raises:
+            FileNotFoundError: Path is not a file
+        """
+        if os.path.exists(path) or not self.is_virtual(path):
+            return open(path, "rb")
+        location = self._locate(path)
+        if location is None or not location.is_file:
+            raise FileNotFoundError(f"No such file in archive '{path}'")
+        content = self._member_content(location.container, location.name)
+        if isinstance(content, bytes):
+            return io.BytesIO(content)
+        return content
+
+    def open_text(self, path: str, encoding: Optional[str] = None,
+                  errors: Optional[str] = None) -> IO[str]:
+        """
+        Opens file for text reading, real or inside an archive
+
+        Args:
+            path(str): Filepath
+            encoding(str): Text encoding, locale encoding if None
+            errors(str): How encoding errors are handled
+
+        Returns:
+            IO: Readable text file, must be closed by caller
+        """
+        return io.TextIOWrapper(self.open(path),  # type: ignore
+                                encoding=encoding, errors=errors)
+
+    def open_hook(self, filename: str, mode: str,
+                  encoding: Optional[str] = None,
+                  errors: Optional[str] = None) -> IO:
+        """
+        Open hook for fileinput reading files inside archives
+
+        Args:
+            filename(str): Filepath
+            mode(str): 'r' or 'rb'
+            encoding(str): Text encoding
+            errors(str): How encoding errors are handled
+
+        Returns:
+            IO: Readable file
+        """
+        if "b" in mode:
+            return self.open(filename)
+        return self.open_text(filename, encoding, errors)
+
+    def read_bytes(self, path: str) -> bytes:
+        """
+        Reads whole file, real or inside an archive
+
+        Args:
+            path(str): Filepath
+
+        Returns:
+            bytes: File content
+        """
+        with self.open(path) as handle:
+            return handle.read()
+
+    def walk_files(self, directory: str, recursive: bool) -> Iterator[str]:
+        """
+        Lazily walking files in directory, archives are walked like
+        directories
+
+        Args:
+            directory(str): Directory path, real or inside an archive
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Filepaths
+        """
+        for path, is_file in self._walk(directory, recursive):
+            if is_file:
+                yield path
+
+    def walk_directories(self, directory: str,
+                         recursive: bool) -> Iterator[str]:
+        """
+        Lazily walking sub directories in directory, archives are
+        directories too
+
+        Args:
+            directory(str): Directory path, real or inside an archive
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Directory paths
+        """
+        for path, is_file in self._walk(directory, recursive):
+            if not is_file:
+                yield path
+
+    def _walk(self, directory: str,
+              recursive: bool) -> Iterator[Tuple[str, bool]]:
+        """
+        Walking files and directories, files in a directory are yielded
+        before its sub directories
+        """
+        pending = [directory.rstrip("/") or "/"]
+        while pending:
+            current = pending.pop()
+            files, directories = self._children(current)
+            for name in files:
+                yield f"{current}/{name}", True
+            for name in directories:
+                yield f"{current}/{name}", False
+            if recursive:
+                pending.extend(f"{current}/{name}"
+                               for name in reversed(directories))
+
+    def _children(self, directory: str) -> Tuple[List[str], List[str]]:
+        """
+        Get names of files and sub directories in directory
+        """
+        if os.path.isdir(directory):
+            files, directories = [], []
+            for entry in self._scan_directory(directory):
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.name)
+                elif entry.is_file():
+                    if self._is_archive((entry.path,)):
+                        directories.append(entry.name)
+                    else:
+                        files.append(entry.name)
+            return files, directories
+
+        location = self._locate(directory)
+        if location is None:
+            return [], []
+        container, name = location.container, location.name
+        if location.is_file:
+            container, name = container + (name,), ""
+        listing = self._listing(container)
+        if listing is None:
+            return [], []
+
+        files, directories = [], []
+        member_files, member_directories = listing.children.get(name,
+                                                                ([], []))
+        prefix = f"{name}/" if name else ""
+        for member in member_files:
+            if self._is_archive(container + (prefix + member,)):
+                directories.append(member)
+            else:
+                files.append(member)
+        return files, sorted(directories + member_directories)
+
+    @staticmethod
+    def _scan_directory(directory: str) -> List[os.DirEntry]:
+        """
+        Reads all entries in a single real directory sorted by name
+        """
+        try:
+            with os.scandir(directory) as iterator:
+                return sorted(iterator, key=lambda entry: entry.name)
+        except OSError as exc:
+            logging.warning(f"Could not scan directory '{directory}' {exc}")
+        return []
+
+    @staticmethod
+    def _split(path: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Splits path into the real file it starts with and the parts after
+
+        Returns:
+            tuple: Real filepath and parts inside it
+            None: Path does not start with a real file
+        """
+        current = Path(path)
+        parts: List[str] = []
+        while not os.path.lexists(current.as_posix()):
+            if current.parent == current:
+                return None
+            parts.append(current.name)
+            current = current.parent
+        if not current.is_file():
+            return None
+        parts.reverse()
+        return current.as_posix(), parts
+
+    @staticmethod
+    def _member_index(listing: ArchiveListing, parts: List[str]) -> int:
+        """
+        Get number of parts naming a file member, 0 if none does
+        """
+        for index in range(1, len(parts) + 1):
+            if "/".join(parts[:index]) in listing.members:
+                return index
+        return 0
+
+    def _locate(self, path: str) -> Optional[_Location]:
+        """
+        Resolves a path starting with an archive file
+        """
+        split = self._split(path)
+        if split is None or not self._is_archive((split[0],)):
+            return None
+
+        container: ContainerKey = (split[0],)
+        parts = split[1]
+        while True:
+            listing = self._listing(container)
+            if listing is None:
+                return None
+            if not parts:
+                return _Location(container, "", False)
+
+            index = self._member_index(listing, parts)
+            name = "/".join(parts[:index])
+            if index == len(parts):
+                return _Location(container, name, True)
+            if index:
+                container += (name,)
+                parts = parts[index:]
+                continue
+
+            name = "/".join(parts)
+            if name in listing.children:
+                return _Location(container, name, False)
+            return None
+
+    def _is_archive(self, container: ContainerKey) -> bool:
+        """
+        Checks container is an archive, real files are checked from their
+        header before being listed and the result is kept until they change
+        """
+        if len(container) > 1:
+            return decompressor_for_name(container[-1]) is not None and \
+                self._listing(container) is not None
+
+        fingerprint = self._fingerprint(container)
+        with self._lock:
+            cached = self._listings.get(container)
+        if cached and cached[0] == fingerprint:
+            return cached[1] is not None
+        if not self._has_archive_header(container[0]):
+            with self._lock:
+                self._listings[container] = (fingerprint, None)
+            return False
+        return self._listing(container) is not None
+
+    @staticmethod
+    def _has_archive_header(filepath: str) -> bool:
+        """
+        Checks real file starts like an archive or is named like one
+        """
+        if not trusts_magic(filepath):
+            return False
+        try:
+            with open(filepath, "rb") as handle:
+                header = handle.read(HEADER_SIZE)
+        except OSError:
+            return False
+        return detect_header(header) is not None or \
+            decompressor_for_name(filepath) is not None
+
+    def _fingerprint(self, container: ContainerKey) -> Optional[FileStat]:
+        return FileManifest.fingerprint(container[0])
+
+    def _listing(self, container: ContainerKey) -> Optional[ArchiveListing]:
+        """
+        Get listing of archive, reading it if not listed or changed
+        """
+        fingerprint = self._fingerprint(container)
+        with self._lock:
+            cached = self._listings.get(container)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        listing = self._read_listing(container)
+        with self._lock:
+            self._listings[container] = (fingerprint, listing)
+        return listing
+
+    @contextlib.contextmanager
+    def _open_container(self, container: ContainerKey) -> Iterator[IO[bytes]]:
+        """
+        Opens archive file, archives inside archives are read from their
+        outer archive
+        """
+        if len(container) == 1:
+            with open(container[0], "rb") as handle:
+                yield handle
+            return
+
+        content = self._member_content(container[:-1], container[-1])
+        if isinstance(content, bytes):
+            yield io.BytesIO(content)
+            return
+        with content:
+            yield content
+
+    def _read_listing(self,
+                      container: ContainerKey) -> Optional[ArchiveListing]:
+        """
+        Lists members of archive from its headers
+        """
+        try:
+            with self._open_container(container) as handle:
+                header = handle.read(HEADER_SIZE)
+                handle.seek(0)
+                decompressor = detect_header(header) or \
+                    decompressor_for_name(container[-1])
+                if decompressor is None:
+                    return None
+                if decompressor.name == "zip":
+                    return self._list_zip(handle, decompressor)
+                if decompressor.name == "tar":
+                    return self._list_tar(handle, decompressor)
+                with decompressor.wrap(handle) as stream:
+                    inner = detect_header(stream.read(HEADER_SIZE))
+                handle.seek(0)
+                if inner and inner.name == "tar":
+                    return self._list_tar(handle, decompressor)
+                name = PurePosixPath(container[-1]).name
+                if decompressor_for_name(name) == decompressor:
+                    name = PurePosixPath(name).stem
+                return self._build_listing(
+                    "stream", decompressor, [ArchiveMember(name, name, -1)])
+        except DECOMPRESSION_ERRORS as exc:
+            logging.warning(f"Could not list archive "
+                            f"'{'/'.join(container)}' {exc}")
+        return None
+
+    @staticmethod
+    def _normalize(name: str) -> Optional[str]:
+        """
+        Normalizes member name, refusing names escaping the archive
+        """
+        member = PurePosixPath(name)
+        if member.is_absolute() or ".." in member.parts:
+            return None
+        parts = [part for part in member.parts if part != "."]
+        return "/".join(parts) or None
+
+    @staticmethod
+    def _build_listing(kind: str, decompressor: Decompressor,
+                       members: List[ArchiveMember],
+                       directories: Optional[List[str]] = None
+                       ) -> ArchiveListing:
+        """
+        Indexes members and directories by their parent directory
+        """
+        children: Dict[str, Tuple[List[str], List[str]]] = {"": ([], [])}
+        known: Set[str] = {""}
+
+        def add_directory(name: str) -> None:
+            while name not in known:
+                known.add(name)
+                children.setdefault(name, ([], []))
+                parent = str(PurePosixPath(name).parent)
+                parent = "" if parent == "." else parent
+                children.setdefault(parent, ([], []))[1].append(
+                    PurePosixPath(name).name)
+                name = parent
+
+        for directory in directories or []:
+            add_directory(directory)
+        for member in members:
+            parent = str(PurePosixPath(member.name).parent)
+            parent = "" if parent == "." else parent
+            add_directory(parent)
+            children[parent][0].append(PurePosixPath(member.name).name)
+
+        for files, sub_directories in children.values():
+            files.sort()
+            sub_directories.sort()
+        return ArchiveListing(kind, decompressor,
+                              {member.name: member for member in members},
+                              children)
+
+    def _list_zip(self, handle: IO[bytes],
+                  decompressor: Decompressor) -> ArchiveListing:
+        members, directories = [], []
+        with zipfile.ZipFile(handle) as archive:  # type: ignore
+            for info in archive.infolist():
+                name = self._normalize(info.filename)
+                if name is None:
+                    continue
+                if info.is_dir():
+                    directories.append(name)
+                else:
+                    members.append(ArchiveMember(name, info.filename,
+                                                 info.file_size))
+        return self._build_listing("zip", decompressor, members, directories)
+
+    def _list_tar(self, handle: IO[bytes],
+                  decompressor: Decompressor) -> ArchiveListing:
+        members, directories = [], []
+        seekable = decompressor.name == "tar"
+        with self._open_tar(handle, decompressor) as tar:
+            for info in tar:
+                name = self._normalize(info.name)
+                if name is None:
+                    continue
+                if info.isdir():
+                    directories.append(name)
+                elif info.isfile():
+                    offset = info.offset_data if seekable and \
+                        not info.issparse() else -1
+                    members.append(ArchiveMember(name, info.name, info.size,
+                                                 offset))
+        return self._build_listing("tar", decompressor, members, directories)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_tar(handle: IO[bytes],
+                  decompressor: Decompressor) -> Iterator[tarfile.TarFile]:
+        """
+        Opens tar for reading members in order, through the decompressor
+        of a compressed tar
+        """
+        if decompressor.name == "tar":
+            with tarfile.open(fileobj=handle, mode="r:") as tar:
+                yield tar
+            return
+        with decompressor.wrap(handle) as stream:
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                yield tar
+
+    def _member_content(self, container: ContainerKey,
+                        name: str) -> Union[bytes, IO[bytes]]:
+        """
+        Get content of member, from cache if it is kept there
+
+        Returns:
+            bytes: Content small enough to be cached
+            IO: Temporary file holding a larger member
+        """
+        key = (container, name)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        listing = self._listing(container)
+        if listing is None or name not in listing.members:
+            raise FileNotFoundError(f"No member '{name}' in "
+                                    f"'{'/'.join(container)}'")
+        member = listing.members[name]
+        logging.debug(f"Decompressing '{name}' from '{'/'.join(container)}'")
+        content: Union[bytes, IO[bytes]]
+        with self._open_container(container) as handle:
+            if listing.kind == "zip":
+                with zipfile.ZipFile(handle) as archive:  # type: ignore
+                    with archive.open(member.source_name) as source:
+                        content = self._load(source)
+            elif listing.kind == "stream":
+                with listing.decompressor.wrap(handle) as source:
+                    content = self._load(source)
+            elif member.offset >= 0:
+                handle.seek(member.offset)
+                content = self._load(_LimitedReader(handle, member.size))
+            else:
+                content = self._load_tar_member(handle, container, listing,
+                                                member)
+
+        if isinstance(content, bytes):
+            self._cache_content(key, content)
+        return content
+
+    def _load_tar_member(self, handle: IO[bytes], container: ContainerKey,
+                         listing: ArchiveListing,
+                         member: ArchiveMember) -> Union[bytes, IO[bytes]]:
+        """
+        Reads a compressed tar until member and loads it. Other members
+        read on the way, and after member while they fit, are cached
+        """
+        content: Optional[Union[bytes, IO[bytes]]] = None
+        budget = self._cache_bytes
+        with self._open_tar(handle, listing.decompressor) as tar:
+            for info in tar:
+                source = tar.extractfile(info) if info.isfile() else None
+                if source is None:
+                    continue
+                if content is None and info.name == member.source_name:
+                    content = self._load(source)
+                    budget = budget - len(content) \
+                        if isinstance(content, bytes) else 0
+                elif info.size <= budget:
+                    budget -= info.size
+                    self._cache_member(container, info.name, source)
+                elif content is not None:
+                    break
+        if content is None:
+            raise FileNotFoundError(f"No member '{member.source_name}'")
+        return content
+
+    def _cache_member(self, container: ContainerKey, source_name: str,
+                      source: IO[bytes]) -> None:
+        """
+        Keeps a member read ahead in cache unless it is cached already
+        """
+        name = self._normalize(source_name)
+        if name is None:
+            return
+        with self._lock:
+            if (container, name) in self._cache:
+                return
+        self._cache_content((container, name), source.read())
+
+    def _load(self, source: Any) -> Union[bytes, IO[bytes]]:
+        """
+        Reads source into memory, spilling to a temporary file once it
+        grows beyond the cache size
+        """
+        chunks = []
+        size = 0
+        chunk = source.read(CHUNK_SIZE)
+        while chunk:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self._cache_bytes:
+                spill = tempfile.TemporaryFile()
+                spill.writelines(chunks)
+                chunk = source.read(CHUNK_SIZE)
+                while chunk:
+                    spill.write(chunk)
+                    chunk = source.read(CHUNK_SIZE)
+                spill.seek(0)
+                return spill  # type: ignore
+            chunk = source.read(CHUNK_SIZE)
+        return b"".join(chunks)
+
+    def _cache_content(self, key: Tuple[ContainerKey, str],
+                       content: bytes) -> None:
+        """
+        Keeps content in cache, dropping least recently used members
+        """
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = content
+            self._cached_bytes += len(content)
+            while self._cached_bytes > self._cache_bytes and self._cache:
+                _, dropped = self._cache.popitem(last=False)
+                self._cached_bytes -= len(dropped)
+
+
+class _LimitedReader:  # pylint: disable=R0903
+    """
+    Reads at most size bytes from handle
+    """
+
+    def __init__(self, handle: IO[bytes], size: int):
+        self._handle = handle
+        self._left = size
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads from handle without passing the limit
+
+        Args:
+            size(int): Bytes to read, everything left if negative
+
+        Returns:
+            bytes: Data read
+        """
+        if size < 0 or size > self._left:
+            size = self._left
+        data = self._handle.read(size)
+        self._left -= len(data)
+        return data
+
+
+_DEFAULT_FILESYSTEM: Optional[ArchiveFileSystem] = None
+
+
+def default_filesystem() -> ArchiveFileSystem:
+    """
+    Get archive file system shared by readers, so recently used members
+    are cached across them
+
+    Returns:
+        ArchiveFileSystem: Shared file system
+    """
+    global _DEFAULT_FILESYSTEM  # pylint: disable=W0603
+    if _DEFAULT_FILESYSTEM is None:
+        _DEFAULT_FILESYSTEM = ArchiveFileSystem()
+    return _DEFAULT_FILESYSTEM
@@ -0,0 +1,203 @@
+"""
+Module contains an executor running a pipeline of file operations over
+many workfolders
+"""
+import os
+import logging
+from concurrent import futures
+from typing import Dict, List, NamedTuple, Optional
+from logfile.operations.operation_base import OperationBase
+from logfile.operations.pipeline import PipelineStep
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+
+# pylint: disable=W1203
+
+
+class WorkfolderResult(NamedTuple):
+    """
+    Result of running the pipeline on a single workfolder
+    """
+    workfolder: str
+    steps: List[bool]
+    error: str
+
+    @property
+    def success(self) -> bool:
+        """
+        Get every step in pipeline ran successfully
+
+        Returns:
+            bool: Pipeline success
+        """
+        return not self.error and all(self.steps)
+
+
+class BatchResult:
+    """
+    Aggregated result of a batch run
+    """
+
+    def __init__(self):
+        self.results: List[WorkfolderResult] = []
+
+    def add(self, result: WorkfolderResult) -> None:
+        """
+        Add result of a workfolder
+
+        Args:
+            result(WorkfolderResult): Result to add
+        """
+        self.results.append(result)
+
+    @property
+    def succeeded(self) -> List[str]:
+        """
+        Get workfolders where every step succeeded
+
+        Returns:
+            list: Workfolders
+        """
+        return [result.workfolder for result in self.results
+                if result.success]
+
+    @property
+    def failed(self) -> List[str]:
+        """
+        Get workfolders where a step failed
+
+        Returns:
+            list: Workfolders
+        """
+        return [result.workfolder for result in self.results
+                if not result.success]
+
+
+class BatchExecutor:
+    """
+    Runs a pipeline of file operations over many workfolders on a process
+    pool. Largest workfolders are started first, so a big bundle does not
+    end up running alone at the end of the batch.
+
+    Pipeline is an ordered list of operation classes and instructions:
+        [(UnzipFiles, {"Recursive": "True"}),
+         (ConvertFiles, {"Recursive": "True"})]
+    """
+
+    def __init__(self, workfolders: List[str], pipeline: List[PipelineStep],
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            workfolders(list): Workfolders to run pipeline on
+            pipeline(list): Operation classes and instructions to run
+            max_workers(int): Workfolders running at the same time,
+                              defaults to number of cores
+        """
+        self._workfolders = workfolders or []
+        self._pipeline = pipeline or []
+        self._max_workers = max(1, max_workers or os.cpu_count() or 1)
+
+    @staticmethod
+    def workfolder_size(workfolder: str) -> int:
+        """
+        Get total size of files in workfolder
+
+        Args:
+            workfolder(str): Workfolder path
+
+        Returns:
+            int: Size in bytes
+        """
+        size = 0
+        for filepath in OperationBase.walk_files(workfolder, True):
+            try:
+                size += os.path.getsize(filepath)
+            except OSError:
+                pass
+        return size
+
+    @staticmethod
+    def run_pipeline(workfolder: str,
+                     pipeline: List[PipelineStep]) -> WorkfolderResult:
+        """
+        Running every operation in pipeline on workfolder, sharing a
+        snapshot of the workfolder between the operations
+
+        Args:
+            workfolder(str): Workfolder path
+            pipeline(list): Operation classes and instructions to run
+
+        Returns:
+            WorkfolderResult: Result of each step
+        """
+        steps: List[bool] = []
+        try:
+            snapshot = WorkfolderSnapshot(workfolder)
+            for operation_class, instructions in pipeline:
+                operation = operation_class(workfolder, instructions,
+                                            snapshot)
+                steps.append(operation.run())
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.error(f"Pipeline failed on '{workfolder}' {exc!r}")
+            return WorkfolderResult(workfolder=workfolder, steps=steps,
+                                    error=repr(exc))
+        return WorkfolderResult(workfolder=workfolder, steps=steps, error="")
+
+    def schedule(self) -> List[str]:
+        """
+        Get workfolders ordered largest first
+
+        Returns:
+            list: Workfolders in order they are started
+        """
+        sizes = {workfolder: self.workfolder_size(workfolder)
+                 for workfolder in self._workfolders}
+        return sorted(self._workfolders, key=lambda wf: sizes[wf],
+                      reverse=True)
+
+    def run(self) -> BatchResult:
+        """
+        Running pipeline on every workfolder
+
+        Returns:
+            BatchResult: Result of every workfolder
+        """
+        batch_result = BatchResult()
+        workfolders = self.schedule()
+        logging.info(f"Running batch of {len(workfolders)} workfolders "
+                     f"with {self._max_workers} workers")
+
+        if self._max_workers == 1:
+            for workfolder in workfolders:
+                batch_result.add(self.run_pipeline(workfolder,
+                                                   self._pipeline))
+            return batch_result
+
+        with futures.ProcessPoolExecutor(self._max_workers) as pool:
+            pending: Dict[futures.Future, str] = {}
+            for workfolder in workfolders:
+                future = pool.submit(self.run_pipeline, workfolder,
+                                     self._pipeline)
+                pending[future] = workfolder
+                if len(pending) >= self._max_workers * 2:
+                    self._collect(pending, batch_result,
+                                  futures.FIRST_COMPLETED)
+            while pending:
+                self._collect(pending, batch_result, futures.ALL_COMPLETED)
+
+        return batch_result
+
+    @staticmethod
+    def _collect(pending: Dict[futures.Future, str],
+                 batch_result: BatchResult, return_when: str) -> None:
+        """
+        Waits for running workfolders and adds their results
+        """
+        done, _ = futures.wait(list(pending), return_when=return_when)
+        for future in done:
+            workfolder = pending.pop(future)
+            try:
+                batch_result.add(future.result())
+            except Exception as exc:  # pylint: disable=broad-except
+                logging.error(f"Pipeline failed on '{workfolder}' {exc!r}")
+                batch_result.add(WorkfolderResult(workfolder=workfolder,
+                                                  steps=[], error=repr(exc)))
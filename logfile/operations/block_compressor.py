@@ -0,0 +1,202 @@
+"""
+Module contains a streaming compressor writing independently compressed
+blocks, compressing blocks in parallel when given threads
+"""
+import io
+import lzma
+import zlib
+import collections
+from concurrent import futures
+from pathlib import PurePosixPath
+from typing import IO, Any, Callable, Deque, Dict, NamedTuple, Optional, \
+    Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class Compression(NamedTuple):
+    """
+    Describes a compression format whose compressed blocks can be
+    concatenated, gzip members, xz streams and zstd frames decompress to
+    the concatenated data of every block. Names match the decompressor
+    registry.
+    """
+    name: str
+    extensions: Tuple[str, ...]
+    compress_function: Callable[[bytes, int], bytes]
+    level: int
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses data into a single block
+
+        Args:
+            data(bytes): Data to compress
+
+        Returns:
+            bytes: Compressed block
+        """
+        return self.compress_function(data, self.level)
+
+
+def _compress_gz(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_xz(data: bytes, level: int) -> bytes:
+    return lzma.compress(data, preset=level)
+
+
+def _compress_zstd(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+_COMPRESSIONS: Dict[str, Compression] = {
+    "gz": Compression("gz", (".gz",), _compress_gz, 6),
+    "xz": Compression("xz", (".xz",), _compress_xz, 6),
+}
+if zstandard is not None:
+    _COMPRESSIONS["zstd"] = Compression("zstd", (".zst", ".zstd"),
+                                        _compress_zstd, 3)
+
+
+def get_compression(name: str) -> Optional[Compression]:
+    """
+    Get compression format by name
+
+    Args:
+        name(str): 'gz', 'xz' or 'zstd'
+
+    Returns:
+        Compression: Compression format
+        None: Unknown format, or zstandard is not installed
+    """
+    return _COMPRESSIONS.get(name.lower())
+
+
+def compression_for_name(filepath: str) -> Optional[Compression]:
+    """
+    Get compression format from file extension
+
+    Args:
+        filepath(str): Filepath
+
+    Returns:
+        Compression: Compression format of extension
+        None: Extension is not a compression format
+    """
+    suffix = PurePosixPath(filepath.lower()).suffix
+    for compression in _COMPRESSIONS.values():
+        if suffix in compression.extensions:
+            return compression
+    return None
+
+
+class BlockCompressor(io.RawIOBase):  # pylint: disable=R0902
+    """
+    Writable stream compressing data in blocks of block_size bytes.
+
+    Every block is compressed on its own, so with threads above one blocks
+    are compressed in parallel on a thread pool and written in order. At
+    most two blocks per thread are held in memory. zlib, lzma and
+    zstandard release the GIL while compressing. Independent blocks cost
+    a little compression ratio, a block is never smaller than block_size
+    except the last.
+    """
+
+    def __init__(self, target: IO[bytes], compression: Compression,
+                 threads: int = 1, block_size: int = DEFAULT_BLOCK_SIZE,
+                 close_target: bool = True):
+        """
+        Args:
+            target(IO): Binary stream compressed blocks are written to
+            compression(Compression): Compression format
+            threads(int): Blocks compressed at the same time
+            block_size(int): Uncompressed bytes in each block
+            close_target(bool): Close target when closed
+        """
+        super().__init__()
+        self._target = target
+        self._compression = compression
+        self._threads = max(1, threads)
+        self._block_size = max(1, block_size)
+        self._close_target = close_target
+        self._buffer = bytearray()
+        self._pending: Deque[Any] = collections.deque()
+        self._pool: Optional[futures.ThreadPoolExecutor] = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        """
+        Buffers data, compressing every full block
+
+        Args:
+            data(bytes): Data to compress
+
+        Returns:
+            int: Bytes taken
+        """
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[:self._block_size])
+            del self._buffer[:self._block_size]
+            self._submit(block)
+        return len(data)
+
+    def finish(self) -> None:
+        """
+        Compresses buffered data and writes every pending block, target
+        can be written to directly afterwards
+        """
+        if self._buffer:
+            block = bytes(self._buffer)
+            self._buffer = bytearray()
+            self._submit(block)
+        while self._pending:
+            self._write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        """
+        Writes everything buffered and closes target if asked to
+        """
+        if self.closed:
+            return
+        try:
+            self.finish()
+        finally:
+            if self._pool:
+                self._pool.shutdown()
+            if self._close_target:
+                self._target.close()
+            super().close()
+
+    def _submit(self, block: bytes) -> None:
+        """
+        Compresses block, on the thread pool when running with threads
+        """
+        if self._threads == 1:
+            self._write(self._compression.compress(block))
+            return
+
+        if self._pool is None:
+            self._pool = futures.ThreadPoolExecutor(self._threads)
+        while len(self._pending) >= 2 * self._threads:
+            self._write(self._pending.popleft().result())
+        self._pending.append(self._pool.submit(self._compression.compress,
+                                               block))
+
+    def _write(self, data: bytes) -> None:
+        """
+        Writes all of data, unbuffered targets may take part of it
+        """
+        view = memoryview(data)
+        while view:
+            view = view[self._target.write(view):]
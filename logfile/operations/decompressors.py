@@ -0,0 +1,292 @@
+"""
+Module contains a registry of streaming decompressors, dispatched on the
+magic bytes of a file
+"""
+import io
+import bz2
+import gzip
+import lzma
+import zlib
+import tarfile
+import zipfile
+import logging
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+# pylint: disable=W1203
+
+HEADER_SIZE = 512
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b"ustar"
+
+_ZSTD_ERRORS: Tuple = (zstandard.ZstdError,) if zstandard else ()
+DECOMPRESSION_ERRORS: Tuple = (OSError, EOFError, zlib.error,
+                               lzma.LZMAError, tarfile.TarError,
+                               zipfile.BadZipFile) + _ZSTD_ERRORS
+
+
+class Decompressor(NamedTuple):
+    """
+    Describes a compression or archive format.
+
+    Stream formats (gz, bz2, xz, zstd) have a wrap function turning a
+    compressed stream into a decompressed one. Container formats (tar, zip)
+    have no wrap function and are extracted member by member. Magic bytes
+    are expected at offset in the file.
+    """
+    name: str
+    magic: bytes
+    extensions: Tuple[str, ...]
+    tar_extensions: Tuple[str, ...] = ()
+    wrap_function: Optional[Callable[[Any], Any]] = None
+    offset: int = 0
+
+    @property
+    def is_stream(self) -> bool:
+        """
+        Get format compresses a single stream
+
+        Returns:
+            bool: Format has a wrap function
+        """
+        return self.wrap_function is not None
+
+    def matches(self, header: bytes) -> bool:
+        """
+        Checks file header starts with the magic bytes of format
+
+        Args:
+            header(bytes): First bytes of file
+
+        Returns:
+            bool: Header matches format
+        """
+        end = self.offset + len(self.magic)
+        return header[self.offset:end] == self.magic
+
+    def is_tar(self, filepath: str) -> bool:
+        """
+        Checks filepath names a tar compressed with this format, like
+        'bundle.tgz' or 'bundle.tar.gz'
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is a compressed tar
+        """
+        path = PurePosixPath(str(filepath).lower())
+        if path.suffix in self.tar_extensions:
+            return True
+        return self.is_stream and path.suffix in self.extensions and \
+            PurePosixPath(path.stem).suffix == ".tar"
+
+    def wrap(self, source: Any) -> Any:
+        """
+        Wraps a compressed stream in a decompressing stream, closing the
+        returned stream does not close source
+
+        Args:
+            source(IO): Compressed stream
+
+        Returns:
+            IO: Decompressed stream
+        """
+        if self.wrap_function is None:
+            raise ValueError(f"'{self.name}' is not a stream format")
+        return self.wrap_function(source)  # pylint: disable=not-callable
+
+
+class _DecompressedStream(io.RawIOBase):
+    """
+    Decompressed stream closing the compressed stream it reads from
+    """
+
+    def __init__(self, stream: Any, source: Any):
+        super().__init__()
+        self._stream = stream
+        self._source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._stream.close()
+            finally:
+                self._source.close()
+        super().close()
+
+
+def open_decompressed(source: Any) -> Any:
+    """
+    Wraps a stream in a decompressing stream when it starts with the magic
+    bytes of a stream format, like a rotated 'messages.2.gz'. Closing the
+    returned stream closes source.
+
+    Args:
+        source(IO): Seekable binary stream at its start
+
+    Returns:
+        IO: Decompressed stream, or source if it is not compressed
+    """
+    header = source.read(HEADER_SIZE)
+    source.seek(0)
+    decompressor = detect_header(header)
+    if decompressor is None or not decompressor.is_stream:
+        return source
+    return io.BufferedReader(_DecompressedStream(decompressor.wrap(source),
+                                                 source))
+
+
+def _wrap_zstd(source: Any) -> Any:
+    return zstandard.ZstdDecompressor().stream_reader(source, closefd=False)
+
+
+_REGISTRY: Dict[str, Decompressor] = {}
+
+
+def register_decompressor(decompressor: Decompressor) -> None:
+    """
+    Adds or replaces a decompressor in the registry
+
+    Args:
+        decompressor(Decompressor): Decompressor to add
+    """
+    _REGISTRY[decompressor.name] = decompressor
+
+
+def get_decompressor(name: str) -> Optional[Decompressor]:
+    """
+    Get registered decompressor by name
+
+    Args:
+        name(str): Format name
+
+    Returns:
+        Decompressor: Registered decompressor
+        None: No decompressor with name
+    """
+    return _REGISTRY.get(name)
+
+
+def archive_extensions() -> List[str]:
+    """
+    Get extensions of every registered format
+
+    Returns:
+        list: Extensions
+    """
+    extensions: List[str] = []
+    for decompressor in _REGISTRY.values():
+        extensions.extend(decompressor.extensions)
+        extensions.extend(decompressor.tar_extensions)
+    return extensions
+
+
+def decompressor_for_name(filepath: str) -> Optional[Decompressor]:
+    """
+    Get decompressor from file extension
+
+    Args:
+        filepath(str): Filepath
+
+    Returns:
+        Decompressor: Decompressor registered for extension
+        None: Extension is not known
+    """
+    suffix = PurePosixPath(str(filepath).lower()).suffix
+    for decompressor in _REGISTRY.values():
+        if suffix in decompressor.extensions or \
+                suffix in decompressor.tar_extensions:
+            return decompressor
+    return None
+
+
+def trusts_magic(filepath: str) -> bool:
+    """
+    Checks magic bytes may decide the format of file. Documents and
+    packages like '.docx', '.xlsx', '.jar' or '.apk' are zip files too, so
+    magic bytes are only trusted for names without an extension, with a
+    known archive extension or ending in a rotation number like
+    'messages.1'
+
+    Args:
+        filepath(str): Filepath
+
+    Returns:
+        bool: Magic bytes decide the format
+    """
+    suffix = PurePosixPath(str(filepath).lower()).suffix
+    return not suffix or suffix[1:].isdigit() or \
+        decompressor_for_name(filepath) is not None
+
+
+def detect_decompressor(filepath: str) -> Optional[Decompressor]:
+    """
+    Detects format of file from its magic bytes, falling back to the file
+    extension when no magic bytes match, like for old tar files. Files
+    with other extensions are not archives, see trusts_magic.
+
+    Args:
+        filepath(str): Filepath
+
+    Returns:
+        Decompressor: Decompressor of file format
+        None: File is not a known format or could not be read
+    """
+    if not trusts_magic(filepath):
+        return None
+    try:
+        with open(filepath, "rb") as handle:
+            header = handle.read(HEADER_SIZE)
+    except OSError as exc:
+        logging.debug(f"Could not read header of '{filepath}' {exc}")
+        return None
+    return detect_header(header) or decompressor_for_name(filepath)
+
+
+def detect_header(header: bytes) -> Optional[Decompressor]:
+    """
+    Detects format from the first bytes of a file
+
+    Args:
+        header(bytes): First bytes of file
+
+    Returns:
+        Decompressor: Decompressor of format
+        None: Not a known format
+    """
+    for decompressor in _REGISTRY.values():
+        if decompressor.matches(header):
+            return decompressor
+    return None
+
+
+register_decompressor(Decompressor(
+    "gz", b"\x1f\x8b", (".gz",), (".tgz",),
+    lambda source: gzip.GzipFile(fileobj=source, mode="rb")))
+register_decompressor(Decompressor(
+    "bz2", b"BZh", (".bz2",), (".tbz2", ".tbz"),
+    lambda source: bz2.BZ2File(source, mode="rb")))
+register_decompressor(Decompressor(
+    "xz", b"\xfd7zXZ\x00", (".xz",), (".txz",),
+    lambda source: lzma.LZMAFile(source, mode="rb")))
+if zstandard is not None:
+    register_decompressor(Decompressor(
+        "zstd", b"\x28\xb5\x2f\xfd", (".zst", ".zstd"), (".tzst",),
+        _wrap_zstd))
+register_decompressor(Decompressor("zip", b"PK\x03\x04", (".zip",)))
+register_decompressor(Decompressor("tar", TAR_MAGIC, (".tar",),
+                                   offset=TAR_MAGIC_OFFSET))
@@ -0,0 +1,196 @@
+"""
+Module contains an external merge sort of log records, sorting runs of
+a memory budget in memory, spilling them to disk and merging the runs
+"""
+import os
+import contextlib
+from typing import IO, Iterator, List, NamedTuple, Tuple
+from logfile.operations.timestamp_merge import TimestampOrder, \
+    merge_records, read_records
+
+# Decoding with surrogateescape writes undecodable bytes back unchanged
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"
+
+# Bytes of memory taken by sorting a byte of log data, records are held
+# as strings with their keys in lists
+RUN_MEMORY_FACTOR = 6
+
+DEFAULT_FAN_IN = 64
+
+
+class RunTask(NamedTuple):
+    """
+    Byte range of a file sorted into a run file, the range starts at a
+    record
+    """
+    path: str
+    start: int
+    end: int
+    order: TimestampOrder
+    run_path: str
+
+
+def _lines(text: str) -> Iterator[str]:
+    """
+    Splits text after every newline, keeping the newlines
+    """
+    start = 0
+    end = text.find("\n")
+    while end >= 0:
+        yield text[start:end + 1]
+        start = end + 1
+        end = text.find("\n", start)
+    if start < len(text):
+        yield text[start:]
+
+
+def open_run(path: str, mode: str) -> IO[str]:
+    """
+    Opens a run or sorted file as text, lines are only split at newlines
+    and written back unchanged
+
+    Args:
+        path(str): Filepath
+        mode(str): 'r' or 'w'
+
+    Returns:
+        IO: Text file, must be closed by caller
+    """
+    return open(path, mode, encoding=ENCODING, errors=ERRORS, newline="\n")
+
+
+def record_start(handle: IO[bytes], position: int,
+                 order: TimestampOrder) -> int:
+    """
+    Finds the first record starting at or after the line holding position
+
+    Args:
+        handle(IO): File opened for binary reading
+        position(int): Byte position
+        order(TimestampOrder): Timestamp description
+
+    Returns:
+        int: Position of the record, the end of file if none
+    """
+    handle.seek(position)
+    if position:
+        handle.readline()
+    while True:
+        start = handle.tell()
+        line = handle.readline()
+        if not line or order.key(line.decode(ENCODING, ERRORS)) is not None:
+            return start
+
+
+def split_file(path: str, chunk_size: int,
+               order: TimestampOrder) -> List[Tuple[int, int]]:
+    """
+    Splits file into byte ranges of about chunk_size starting at records,
+    a record longer than chunk_size makes a longer range
+
+    Args:
+        path(str): Filepath
+        chunk_size(int): Bytes in each range
+        order(TimestampOrder): Timestamp description
+
+    Returns:
+        list: Start and end of every range
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as handle:
+        while bounds[-1] + chunk_size < size:
+            start = record_start(handle, bounds[-1] + chunk_size, order)
+            if start >= size:
+                break
+            bounds.append(start)
+    return [(start, end) for start, end in zip(bounds, bounds[1:] + [size])
+            if start < end]
+
+
+def plan_runs(files: List[str], chunk_size: int, order: TimestampOrder,
+              temp_dir: str) -> Iterator[RunTask]:
+    """
+    Plans runs of every file in order, run file names sort in the same
+    order
+
+    Args:
+        files(list): Files to sort
+        chunk_size(int): Bytes of a file in each run
+        order(TimestampOrder): Timestamp description
+        temp_dir(str): Directory run files are written to
+
+    Returns:
+        Iterator[RunTask]: Runs to sort
+    """
+    index = 0
+    for path in files:
+        for start, end in split_file(path, max(1, chunk_size), order):
+            run_path = os.path.join(temp_dir, f"run-{index:08d}")
+            yield RunTask(path, start, end, order, run_path)
+            index += 1
+
+
+def sort_run(task: RunTask) -> str:
+    """
+    Sorts records in the byte range of a task into its run file, records
+    with equal keys keep their order. Runs in worker processes.
+
+    Args:
+        task(RunTask): Range to sort
+
+    Returns:
+        str: Run file path
+    """
+    with open(task.path, "rb") as handle:
+        handle.seek(task.start)
+        text = handle.read(task.end - task.start).decode(ENCODING, ERRORS)
+    records = list(read_records(_lines(text), task.order))
+    del text
+    records.sort(key=lambda record: record[0])
+    with open_run(task.run_path, "w") as handle:
+        handle.writelines(record[1] for record in records)
+    return task.run_path
+
+
+def _merge_into(runs: List[str], target_path: str,
+                order: TimestampOrder) -> None:
+    """
+    Merges sorted runs into target, every run is read at the same time
+    """
+    with contextlib.ExitStack() as stack:
+        sources = [stack.enter_context(open_run(path, "r")) for path in runs]
+        with open_run(target_path, "w") as target:
+            target.writelines(merge_records(sources, order))
+
+
+def merge_runs(runs: List[str], target_path: str, order: TimestampOrder,
+               fan_in: int = DEFAULT_FAN_IN) -> None:
+    """
+    Merges sorted runs into target in as many passes as needed to read at
+    most fan_in runs at the same time. Runs are deleted when merged, runs
+    of a pass are written next to the first run merged into them.
+
+    Args:
+        runs(list): Run files in input order
+        target_path(str): Sorted output
+        order(TimestampOrder): Timestamp description
+        fan_in(int): Runs read at the same time
+    """
+    fan_in = max(2, fan_in)
+    generation = 0
+    while len(runs) > fan_in:
+        generation += 1
+        merged = []
+        for index in range(0, len(runs), fan_in):
+            group = runs[index:index + fan_in]
+            path = f"{group[0]}.{generation}"
+            _merge_into(group, path, order)
+            for run in group:
+                os.remove(run)
+            merged.append(path)
+        runs = merged
+    _merge_into(runs, target_path, order)
+    for run in runs:
+        os.remove(run)
@@ -0,0 +1,262 @@
+"""
+Module contains a content addressed cache of extracted archives
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+# pylint: disable=W1203
+
+
+class CachedExtraction(NamedTuple):
+    """
+    Extraction restored from the cache
+    """
+    extracted_to: str
+    files: List[str]
+    kept_archives: List[str]
+
+
+class ExtractionCache:
+    """
+    Keeps extracted archives in a cache directory keyed on the sha256 of the
+    archive, so an archive seen before is hardlinked into the workfolder
+    instead of being extracted again.
+
+    Every entry is a directory holding the extracted tree and an entry file
+    describing it. The modification time of the entry file is the last
+    time it was used, least recently used entries are evicted when the
+    cache grows beyond max_bytes.
+
+    Cached files share inodes with the files in the workfolders, operations
+    must replace files instead of writing them in place.
+    """
+    ENTRY_FILE = "entry.json"
+    TREE_DIRECTORY = "tree"
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory(str): Cache directory
+            max_bytes(int): Size of extracted files kept in cache
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+
+    @property
+    def directory(self) -> str:
+        """
+        Get cache directory
+
+        Returns:
+            str: Cache directory
+        """
+        return self._directory
+
+    def key(self, filepath: str, options: str = "") -> Optional[str]:
+        """
+        Get cache key of archive
+
+        Args:
+            filepath(str): Archive filepath
+            options(str): Extraction options changing the extracted tree
+
+        Returns:
+            str: Hex digest of archive content and options
+            None: Archive could not be read
+        """
+        digest = hashlib.sha256(options.encode("utf-8"))
+        try:
+            with open(filepath, "rb") as handle:
+                chunk = handle.read(self.CHUNK_SIZE)
+                while chunk:
+                    digest.update(chunk)
+                    chunk = handle.read(self.CHUNK_SIZE)
+        except OSError as exc:
+            logging.warning(f"Could not hash '{filepath}' {exc}")
+            return None
+        return digest.hexdigest()
+
+    @staticmethod
+    def _link(source: str, target: str) -> None:
+        """
+        Hardlinks source to target, copying if linking is not possible
+        """
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        """
+        Removes a file or a directory tree, ignoring errors
+        """
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path.as_posix(), ignore_errors=True)
+        else:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _entry_path(self, key: str) -> Path:
+        return Path(self._directory) / key
+
+    def restore(self, key: str, parent: str) -> Optional[CachedExtraction]:
+        """
+        Hardlinks a cached extraction into parent directory
+
+        Args:
+            key(str): Cache key of archive
+            parent(str): Directory the archive is in
+
+        Returns:
+            CachedExtraction: Paths of restored files
+            None: Archive is not cached or could not be restored
+        """
+        entry_path = self._entry_path(key)
+        entry_file = entry_path / self.ENTRY_FILE
+        try:
+            with open(entry_file.as_posix(), "r",
+                      encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+        target = Path(parent) / entry["name"]
+        if target.exists():
+            logging.debug(f"Not restoring '{target}', it already exists")
+            return None
+
+        try:
+            for relative in entry["files"]:
+                restored = Path(parent) / relative
+                restored.parent.mkdir(parents=True, exist_ok=True)
+                self._link(
+                    (entry_path / self.TREE_DIRECTORY / relative).as_posix(),
+                    restored.as_posix())
+            os.utime(entry_file.as_posix())
+        except OSError as exc:
+            logging.warning(f"Could not restore '{target}' from cache {exc}")
+            self._remove(target)
+            return None
+
+        logging.debug(f"Restored '{target}' from cache entry '{key}'")
+        return CachedExtraction(
+            extracted_to=target.as_posix(),
+            files=[(Path(parent) / rel).as_posix() for rel in entry["files"]],
+            kept_archives=[(Path(parent) / rel).as_posix()
+                           for rel in entry["kept_archives"]])
+
+    def store(self, key: str, extracted_to: str, files: List[str],
+              kept_archives: List[str]) -> bool:
+        """
+        Adds an extraction to the cache, evicting least recently used
+        entries if the cache grows beyond its size
+
+        Args:
+            key(str): Cache key of archive
+            extracted_to(str): Directory or file archive is extracted to
+            files(list): Files produced by extraction
+            kept_archives(list): Archives kept as is inside files
+
+        Returns:
+            bool: Extraction is stored
+        """
+        entry_path = self._entry_path(key)
+        if entry_path.exists():
+            return True
+
+        parent = Path(extracted_to).parent
+        try:
+            relatives = [Path(filepath).relative_to(parent).as_posix()
+                         for filepath in files]
+            kept = [Path(filepath).relative_to(parent).as_posix()
+                    for filepath in kept_archives]
+            size = sum(os.path.getsize(filepath) for filepath in files)
+        except (OSError, ValueError) as exc:
+            logging.warning(f"Could not cache '{extracted_to}' {exc}")
+            return False
+
+        if size > self._max_bytes:
+            logging.debug(f"Not caching '{extracted_to}', {size} bytes is "
+                          f"more than cache size")
+            return False
+
+        temp_path = Path(self._directory) / f".{key}.{os.getpid()}.tmp"
+        try:
+            temp_path.mkdir(parents=True, exist_ok=True)
+            for relative in relatives:
+                cached = temp_path / self.TREE_DIRECTORY / relative
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                self._link((parent / relative).as_posix(), cached.as_posix())
+            with open((temp_path / self.ENTRY_FILE).as_posix(), "w",
+                      encoding="utf-8") as handle:
+                json.dump({"name": Path(extracted_to).name, "size": size,
+                           "files": relatives, "kept_archives": kept}, handle)
+            os.rename(temp_path.as_posix(), entry_path.as_posix())
+        except OSError as exc:
+            logging.warning(f"Could not cache '{extracted_to}' {exc}")
+            self._remove(temp_path)
+            return False
+
+        logging.debug(f"Cached '{extracted_to}' as entry '{key}'")
+        self.evict()
+        return True
+
+    def _entries(self) -> List[Tuple[int, int, Path]]:
+        """
+        Get last used time, size and path of every entry in the cache
+        """
+        entries = []
+        try:
+            with os.scandir(self._directory) as iterator:
+                for item in iterator:
+                    if item.name.startswith(".") or not item.is_dir():
+                        continue
+                    entry_file = os.path.join(item.path, self.ENTRY_FILE)
+                    try:
+                        with open(entry_file, "r",
+                                  encoding="utf-8") as handle:
+                            size = int(json.load(handle)["size"])
+                        used = os.stat(entry_file).st_mtime_ns
+                    except (OSError, ValueError, KeyError):
+                        continue
+                    entries.append((used, size, Path(item.path)))
+        except OSError as exc:
+            logging.warning(f"Could not scan cache '{self._directory}' {exc}")
+        return entries
+
+    def size(self) -> int:
+        """
+        Get size of extracted files in cache
+
+        Returns:
+            int: Size in bytes
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> List[str]:
+        """
+        Removes least recently used entries until the cache fits its size
+
+        Returns:
+            list: Keys of removed entries
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, entry_path in entries:
+            if total <= self._max_bytes:
+                break
+            logging.debug(f"Evicting cache entry '{entry_path.name}'")
+            self._remove(entry_path)
+            total -= size
+            evicted.append(entry_path.name)
+        return evicted
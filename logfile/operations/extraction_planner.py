@@ -0,0 +1,334 @@
+"""
+Module contains a planner estimating extraction of archives from their
+headers, without writing anything
+"""
+import os
+import shutil
+import struct
+import tarfile
+import zipfile
+import logging
+from typing import IO, List, NamedTuple, Optional, Union
+from logfile.operations.decompressors import DECOMPRESSION_ERRORS, \
+    HEADER_SIZE, Decompressor, decompressor_for_name, detect_header
+
+# pylint: disable=W1203
+
+ISIZE_MODULO = 2 ** 32
+TARFILE_COMPRESSIONS = ["tar", "gz", "bz2", "xz"]
+
+
+class ArchivePlan(NamedTuple):
+    """
+    Expected result of extracting a single archive
+
+    archive_size is the size of the archive itself, member_size the size of
+    what a plain extraction writes. exact is False when sizes are estimated
+    from the gzip trailer instead of read from tar headers.
+    """
+    filepath: str
+    archive_size: int
+    member_size: int
+    member_count: int
+    nested: List["ArchivePlan"]
+    exact: bool
+
+    def expected_size(self, recursive: bool) -> int:
+        """
+        Get bytes written when extracting archive
+
+        Args:
+            recursive(bool): Archives inside archive are extracted too
+
+        Returns:
+            int: Expected size in bytes
+        """
+        size = self.member_size
+        if recursive:
+            for nested in self.nested:
+                size += nested.expected_size(True) - nested.archive_size
+        return size
+
+    def expected_members(self, recursive: bool) -> int:
+        """
+        Get files written when extracting archive
+
+        Args:
+            recursive(bool): Archives inside archive are extracted too
+
+        Returns:
+            int: Expected number of files
+        """
+        count = self.member_count
+        if recursive:
+            for nested in self.nested:
+                count += nested.expected_members(True) - 1
+        return count
+
+
+class ExtractionPlan:
+    """
+    Plan of archives to extract, largest first
+    """
+
+    def __init__(self, archives: List[ArchivePlan], recursive: bool):
+        """
+        Args:
+            archives(list): Plans of single archives
+            recursive(bool): Archives inside archives are extracted too
+        """
+        self._recursive = recursive
+        self.archives = sorted(
+            archives, key=lambda plan: plan.expected_size(recursive),
+            reverse=True)
+
+    @property
+    def files(self) -> List[str]:
+        """
+        Get archives in the order they should be extracted
+
+        Returns:
+            list: Filepaths, largest extraction first
+        """
+        return [plan.filepath for plan in self.archives]
+
+    @property
+    def expected_size(self) -> int:
+        """
+        Get bytes written by extracting every archive
+
+        Returns:
+            int: Expected size in bytes
+        """
+        return sum(plan.expected_size(self._recursive)
+                   for plan in self.archives)
+
+    @property
+    def expected_members(self) -> int:
+        """
+        Get files written by extracting every archive
+
+        Returns:
+            int: Expected number of files
+        """
+        return sum(plan.expected_members(self._recursive)
+                   for plan in self.archives)
+
+    def fits_disk(self, directory: str) -> bool:
+        """
+        Checks the extraction fits the free space of the disk holding
+        directory
+
+        Args:
+            directory(str): Directory extracted in
+
+        Returns:
+            bool: Enough free space, also True if it could not be checked
+        """
+        try:
+            free = shutil.disk_usage(directory).free
+        except OSError as exc:
+            logging.debug(f"Could not check free space '{directory}' {exc}")
+            return True
+
+        if self.expected_size > free:
+            logging.warning(f"Extraction needs {self.expected_size} bytes, "
+                            f"only {free} bytes free in '{directory}'")
+            return False
+        return True
+
+    def report(self) -> List[str]:
+        """
+        Get readable lines describing the plan
+
+        Returns:
+            list: Report lines
+        """
+        lines = [f"{len(self.archives)} archives, "
+                 f"{self.expected_members} files, "
+                 f"{self.expected_size} bytes expected"]
+        for plan in self.archives:
+            lines.extend(self._report_archive(plan, 1))
+        return lines
+
+    def _report_archive(self, plan: ArchivePlan, depth: int) -> List[str]:
+        estimate = "" if plan.exact else " (estimated)"
+        lines = ["  " * depth +
+                 f"{plan.filepath}: {plan.archive_size} -> "
+                 f"{plan.expected_size(self._recursive)} bytes, "
+                 f"{plan.expected_members(self._recursive)} files"
+                 f"{estimate}"]
+        for nested in plan.nested:
+            lines.extend(self._report_archive(nested, depth + 1))
+        return lines
+
+
+class ExtractionPlanner:
+    """
+    Builds extraction plans from archive headers.
+
+    Plain tar files are planned from their headers, which tarfile reads by
+    seeking past member data, and zip files from their central directory.
+    Gzip files, and compressed tar files unless detailed is asked for, are
+    planned from the ISIZE trailer holding the uncompressed size modulo
+    4 GiB. Other compressed files store no size and are estimated from
+    the archive size. Detailed plans read headers of
+    compressed tar files too, which decompresses them without writing,
+    and looks inside nested archives.
+    """
+
+    @staticmethod
+    def _is_tar(name: str, decompressor: Decompressor) -> bool:
+        return decompressor.name == "tar" or decompressor.is_tar(name)
+
+    @staticmethod
+    def gzip_size(handle: Union[IO[bytes], tarfile.ExFileObject],
+                  archive_size: int) -> Optional[int]:
+        """
+        Reads uncompressed size from the gzip trailer
+
+        The trailer holds the size modulo 4 GiB, 4 GiB is added while the
+        size is smaller than the compressed size.
+
+        Args:
+            handle(IO): Seekable gzip stream
+            archive_size(int): Size of the gzip stream
+
+        Returns:
+            int: Uncompressed size of the last gzip member
+            None: Not a gzip stream
+        """
+        if archive_size < 18:
+            return None
+        handle.seek(0)
+        if handle.read(2) != b"\x1f\x8b":
+            return None
+        handle.seek(archive_size - 4)
+        size = struct.unpack("<I", handle.read(4))[0]
+        while size < archive_size - 18:
+            size += ISIZE_MODULO
+        return size
+
+    @staticmethod
+    def plan_file(filepath: str, detailed: bool = False
+                  ) -> Optional[ArchivePlan]:
+        """
+        Plans extraction of archive on disk
+
+        Args:
+            filepath(str): Archive filepath
+            detailed(bool): Read headers of compressed tar files and
+                            nested archives
+
+        Returns:
+            ArchivePlan: Plan of archive
+            None: Not an archive or could not be read
+        """
+        try:
+            archive_size = os.path.getsize(filepath)
+            with open(filepath, "rb") as handle:
+                return ExtractionPlanner._plan(filepath, handle, archive_size,
+                                               detailed)
+        except OSError as exc:
+            logging.warning(f"Could not plan '{filepath}' {exc}")
+        return None
+
+    @staticmethod
+    def _plan(name: str, handle: Union[IO[bytes], tarfile.ExFileObject],
+              archive_size: int, detailed: bool) -> Optional[ArchivePlan]:
+        """
+        Plans extraction of a seekable archive stream
+        """
+        handle.seek(0)
+        decompressor = detect_header(handle.read(HEADER_SIZE)) or \
+            decompressor_for_name(name)
+        if decompressor is None:
+            return None
+
+        is_tar = ExtractionPlanner._is_tar(name, decompressor)
+        try:
+            if decompressor.name == "tar" or \
+                    (is_tar and detailed and
+                     decompressor.name in TARFILE_COMPRESSIONS):
+                return ExtractionPlanner._plan_tar(name, handle, archive_size,
+                                                   detailed)
+
+            if decompressor.name == "zip":
+                return ExtractionPlanner._plan_zip(name, handle, archive_size)
+
+            if decompressor.name == "gz":
+                return ExtractionPlanner._plan_gz(name, handle, archive_size)
+
+            # No size is stored for the other formats, the archive size is
+            # the best estimate without decompressing
+            return ArchivePlan(filepath=name, archive_size=archive_size,
+                               member_size=archive_size, member_count=1,
+                               nested=[], exact=False)
+
+        except DECOMPRESSION_ERRORS + (struct.error,) as exc:
+            logging.warning(f"Could not plan '{name}' {exc}")
+        return None
+
+    @staticmethod
+    def _plan_gz(name: str, handle: Union[IO[bytes], tarfile.ExFileObject],
+                 archive_size: int) -> Optional[ArchivePlan]:
+        """
+        Plans extraction of a gzip stream from its trailer
+        """
+        size = ExtractionPlanner.gzip_size(handle, archive_size)
+        if size is None:
+            logging.warning(f"Could not plan '{name}' not a gzip file")
+            return None
+        return ArchivePlan(filepath=name, archive_size=archive_size,
+                           member_size=size, member_count=1, nested=[],
+                           exact=False)
+
+    @staticmethod
+    def _plan_zip(name: str, handle: Union[IO[bytes], tarfile.ExFileObject],
+                  archive_size: int) -> ArchivePlan:
+        """
+        Plans extraction of a zip stream from its central directory
+        """
+        handle.seek(0)
+        member_size = 0
+        member_count = 0
+        with zipfile.ZipFile(handle) as archive:  # type: ignore
+            for info in archive.infolist():
+                if not info.is_dir():
+                    member_size += info.file_size
+                    member_count += 1
+        return ArchivePlan(filepath=name, archive_size=archive_size,
+                           member_size=member_size, member_count=member_count,
+                           nested=[], exact=True)
+
+    @staticmethod
+    def _plan_tar(name: str, handle: Union[IO[bytes], tarfile.ExFileObject],
+                  archive_size: int, detailed: bool) -> ArchivePlan:
+        """
+        Plans extraction of a tar stream from its headers
+        """
+        handle.seek(0)
+        member_size = 0
+        member_count = 0
+        nested = []
+        with tarfile.open(fileobj=handle, mode="r:*") as tar:  # type: ignore
+            for member in tar:
+                if not member.isfile():
+                    continue
+                member_size += member.size
+                member_count += 1
+                if not detailed or \
+                        decompressor_for_name(member.name) is None:
+                    continue
+
+                source = tar.extractfile(member)
+                if source is None:
+                    continue
+                plan = ExtractionPlanner._plan(
+                    f"{name}/{member.name}", source, member.size, detailed)
+                if plan:
+                    nested.append(plan)
+
+        return ArchivePlan(filepath=name, archive_size=archive_size,
+                           member_size=member_size, member_count=member_count,
+                           nested=nested, exact=True)
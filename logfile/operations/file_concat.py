@@ -0,0 +1,205 @@
+"""
+Module contains byte level concatenation of files, copying inside the
+kernel where the platform allows it
+"""
+import io
+import os
+import errno
+import logging
+from typing import IO, Any, Callable, Iterable, List, Tuple
+from logfile.operations.block_compressor import BlockCompressor
+
+# pylint: disable=W1203
+
+MAX_CHUNK = 1024 * 1024 * 1024
+
+# Errors telling a kernel copy is not possible for these files, like
+# copying across file systems or from a file system without support
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                   errno.EOPNOTSUPP, errno.ETXTBSY, errno.EPERM,
+                   getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+def _copy_file_range(source_fd: int, target_fd: int, count: int) -> int:
+    return os.copy_file_range(source_fd, target_fd, count)  # type: ignore
+
+
+def _sendfile(source_fd: int, target_fd: int, count: int) -> int:
+    offset = os.lseek(source_fd, 0, os.SEEK_CUR)
+    sent = os.sendfile(target_fd, source_fd, offset, count)
+    os.lseek(source_fd, offset + sent, os.SEEK_SET)
+    return sent
+
+
+def kernel_copies() -> List[Callable[[int, int, int], int]]:
+    """
+    Get kernel copy functions available on this platform, best first.
+    Every function copies from the current position of source to the
+    current position of target and moves both positions.
+
+    Returns:
+        list: Copy functions
+    """
+    functions: List[Callable[[int, int, int], int]] = []
+    if hasattr(os, "copy_file_range"):
+        functions.append(_copy_file_range)
+    if hasattr(os, "sendfile"):
+        functions.append(_sendfile)
+    return functions
+
+
+def _kernel_copy(source_fd: int, target_fd: int) -> int:
+    """
+    Copies rest of source inside the kernel, stopping early when no kernel
+    copy is possible so the caller can copy the rest through a buffer
+    """
+    copied = 0
+    for function in kernel_copies():
+        try:
+            count = function(source_fd, target_fd, MAX_CHUNK)
+            while count:
+                copied += count
+                count = function(source_fd, target_fd, MAX_CHUNK)
+            return copied
+        except OSError as exc:
+            if exc.errno not in FALLBACK_ERRNOS:
+                raise
+            logging.debug(f"Kernel copy '{function.__name__}' not possible "
+                          f"{exc}")
+    return copied
+
+
+def write_all(target: IO[bytes], data: Any) -> None:
+    """
+    Writes all of data, unbuffered files may take part of it at a time
+
+    Args:
+        target(IO): Stream to write
+        data(bytes): Data to write
+    """
+    view = memoryview(data)
+    while view:
+        written = target.write(view)
+        view = view[written:]
+
+
+def copy_data(source: IO[bytes], target: IO[bytes],
+              buffer: memoryview) -> Tuple[int, bytes]:
+    """
+    Copies everything readable from source to target. Unbuffered files
+    are copied inside the kernel, the rest, or everything when that is
+    not possible, is copied through buffer.
+
+    Args:
+        source(IO): Stream to read from, unbuffered file for kernel copy
+        target(IO): Stream to write, unbuffered file for kernel copy
+        buffer(memoryview): Buffer reused for every read
+
+    Returns:
+        tuple: Bytes copied and the last byte copied, b"" if none
+    """
+    copied = 0
+    last = b""
+    if isinstance(source, io.FileIO) and isinstance(target, io.FileIO):
+        copied = _kernel_copy(source.fileno(), target.fileno())
+        if copied:
+            source.seek(-1, io.SEEK_CUR)
+            last = source.read(1)
+    count = source.readinto(buffer)  # type: ignore
+    while count:
+        write_all(target, buffer[:count])
+        copied += count
+        last = bytes(buffer[count - 1:count])
+        count = source.readinto(buffer)  # type: ignore
+    return copied, last
+
+
+def open_target(filepath: str, append: bool) -> io.FileIO:
+    """
+    Opens file for unbuffered writing at its end. O_APPEND is not used,
+    kernel copies refuse targets opened with it.
+
+    Args:
+        filepath(str): File to write
+        append(bool): Keep content of file
+
+    Returns:
+        FileIO: Unbuffered file, must be closed by caller
+    """
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    if not append:
+        flags |= os.O_TRUNC
+    target = io.FileIO(os.open(filepath, flags, 0o666), "wb")
+    target.seek(0, io.SEEK_END)
+    return target
+
+
+def concatenate(target: io.FileIO, sources: Iterable[IO[bytes]],
+                buffer_size: int, ensure_newline: bool) -> int:
+    """
+    Concatenates sources into target without decoding them
+
+    Args:
+        target(FileIO): Unbuffered file to write
+        sources(Iterable[IO]): Streams, closed when copied
+        buffer_size(int): Bytes copied at a time without kernel copy
+        ensure_newline(bool): Write a newline after a source not ending
+                              with one
+
+    Returns:
+        int: Bytes written
+    """
+    buffer = memoryview(bytearray(max(1, buffer_size)))
+    written = 0
+    for source in sources:
+        with source:
+            copied, last = copy_data(source, target, buffer)
+            written += copied
+            if ensure_newline and copied and last != b"\n":
+                target.write(b"\n")
+                written += 1
+    return written
+
+
+def concatenate_compressed(target: IO[bytes],
+                           sources: Iterable[Tuple[IO[bytes], bool]],
+                           compressor: BlockCompressor, buffer_size: int,
+                           ensure_newline: bool) -> int:
+    """
+    Concatenates sources into a compressed file whose format allows
+    concatenating compressed data, like multi member gzip files. Sources
+    already compressed in that format are copied as they are, inside the
+    kernel where possible, other sources are written through compressor.
+    Decompressing target gives the concatenated content of every source.
+
+    Args:
+        target(IO): Unbuffered file to write
+        sources(Iterable[Tuple[IO, bool]]): Streams, closed when copied,
+                                            and whether each is already
+                                            compressed
+        compressor(BlockCompressor): Compressor writing to target, not
+                                     closing it
+        buffer_size(int): Bytes read at a time
+        ensure_newline(bool): Write a newline after a source compressed
+                              here not ending with one, compressed sources
+                              are not decompressed to check
+
+    Returns:
+        int: Uncompressed bytes compressed here
+    """
+    buffer = memoryview(bytearray(max(1, buffer_size)))
+    size = 0
+    for source, compressed in sources:
+        with source:
+            if compressed:
+                compressor.finish()
+                copy_data(source, target, buffer)
+                continue
+            copied, last = copy_data(source, compressor,  # type: ignore
+                                     buffer)
+            size += copied
+            if ensure_newline and copied and last != b"\n":
+                compressor.write(b"\n")
+                size += 1
+    compressor.finish()
+    return size
@@ -0,0 +1,196 @@
+"""
+Module contains a persistent manifest of files processed in a workfolder
+"""
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+from logfile.operations.workfolder_snapshot import FileStat
+
+# pylint: disable=W1203
+
+
+class FileManifest:
+    """
+    Records fingerprint (size, mtime, inode) of files and which operations
+    processed them, so a re-run on the same workfolder only touches new or
+    changed files.
+
+    The manifest is stored as json inside the workfolder.
+    """
+    FILE_NAME = ".logfile_manifest.json"
+
+    def __init__(self, workfolder: str):
+        """
+        Args:
+            workfolder(str): Workfolder the manifest belongs to
+        """
+        self._workfolder = workfolder
+        self._entries: Dict[str, Dict] = {}
+
+    @property
+    def path(self) -> str:
+        """
+        Get filepath of manifest
+
+        Returns:
+            str: Filepath to manifest, empty if no workfolder
+        """
+        if self._workfolder:
+            return (Path(self._workfolder) / self.FILE_NAME).as_posix()
+        return ""
+
+    def _key(self, filepath: str) -> str:
+        """
+        Makes filepath relative to workfolder
+        """
+        try:
+            return Path(filepath).relative_to(self._workfolder).as_posix()
+        except ValueError:
+            return Path(filepath).as_posix()
+
+    @staticmethod
+    def fingerprint(filepath: str) -> Optional[FileStat]:
+        """
+        Get fingerprint of file
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            FileStat: Fingerprint of file
+            None: File can not be read
+        """
+        try:
+            stat_result = os.stat(filepath)
+            return FileStat(size=stat_result.st_size,
+                            mtime_ns=stat_result.st_mtime_ns,
+                            inode=stat_result.st_ino)
+        except OSError:
+            return None
+
+    def load(self) -> bool:
+        """
+        Loads manifest from workfolder
+
+        Returns:
+            bool: Manifest is loaded
+        """
+        self._entries = {}
+        manifest_path = self.path
+        if manifest_path and Path(manifest_path).exists():
+            try:
+                with open(manifest_path, 'r', encoding="utf-8") as handle:
+                    self._entries = json.load(handle)
+                logging.debug(f"Loaded manifest '{manifest_path}' with "
+                              f"{len(self._entries)} entries")
+                return True
+            except (OSError, ValueError) as exc:
+                logging.warning(f"Could not load manifest "
+                                f"'{manifest_path}' {exc}")
+        return False
+
+    def save(self) -> bool:
+        """
+        Saves manifest to workfolder
+
+        Returns:
+            bool: Manifest is saved
+        """
+        manifest_path = self.path
+        if manifest_path and Path(self._workfolder).exists():
+            temp_path = manifest_path + ".tmp"
+            try:
+                with open(temp_path, 'w', encoding="utf-8") as handle:
+                    json.dump(self._entries, handle)
+                os.replace(temp_path, manifest_path)
+                return True
+            except OSError as exc:
+                logging.warning(f"Could not save manifest "
+                                f"'{manifest_path}' {exc}")
+        return False
+
+    def operations(self, filepath: str) -> List[str]:
+        """
+        Get operations recorded for file
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: Operation keys
+        """
+        entry = self._entries.get(self._key(filepath))
+        if entry:
+            return list(entry["operations"])
+        return []
+
+    def needs_processing(self, filepath: str, operation_key: str) -> bool:
+        """
+        Checks if file is new or changed since operation processed it.
+        Recorded operations of a changed file is forgotten.
+
+        Args:
+            filepath(str): Filepath
+            operation_key(str): Key identifying operation and instructions
+
+        Returns:
+            bool: File must be processed
+        """
+        key = self._key(filepath)
+        entry = self._entries.get(key)
+        if not entry:
+            return True
+
+        if FileStat(*entry["fingerprint"]) != self.fingerprint(filepath):
+            logging.debug(f"File changed since last run '{filepath}'")
+            del self._entries[key]
+            return True
+
+        return operation_key not in entry["operations"]
+
+    def record(self, filepath: str, operation_key: str) -> bool:
+        """
+        Records operation processed file with its current fingerprint
+
+        Args:
+            filepath(str): Filepath
+            operation_key(str): Key identifying operation and instructions
+
+        Returns:
+            bool: File is recorded
+        """
+        fingerprint = self.fingerprint(filepath)
+        if not fingerprint:
+            return False
+
+        entry = self._entries.setdefault(self._key(filepath),
+                                         {"operations": []})
+        entry["fingerprint"] = list(fingerprint)
+        if operation_key not in entry["operations"]:
+            entry["operations"].append(operation_key)
+        return True
+
+    def rename(self, old_filepath: str, new_filepath: str) -> None:
+        """
+        Moves recorded entry to new filepath
+
+        Args:
+            old_filepath(str): Filepath before rename
+            new_filepath(str): Filepath after rename
+        """
+        entry = self._entries.pop(self._key(old_filepath), None)
+        fingerprint = self.fingerprint(new_filepath)
+        if entry and fingerprint:
+            entry["fingerprint"] = list(fingerprint)
+            self._entries[self._key(new_filepath)] = entry
+
+    def remove(self, filepath: str) -> None:
+        """
+        Forgets file, used when file is deleted
+
+        Args:
+            filepath(str): Filepath
+        """
+        self._entries.pop(self._key(filepath), None)
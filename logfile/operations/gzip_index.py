@@ -0,0 +1,532 @@
+"""
+Module contains a checkpoint index giving random access into gzip files
+"""
+import io
+import os
+import json
+import zlib
+import base64
+import bisect
+import logging
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+from logfile.operations.file_manifest import FileManifest
+from logfile.operations.workfolder_snapshot import FileStat
+
+# pylint: disable=W1203
+
+DEFAULT_SPACING = 16 * 1024 * 1024
+WINDOW_SIZE = 32 * 1024
+CHUNK_SIZE = 64 * 1024
+PROBE_SIZE = 4 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_TRAILER_SIZE = 8
+SYNC_MARKER = b"\x00\x00\xff\xff"
+GZIP_WBITS = zlib.MAX_WBITS | 16
+RAW_WBITS = -zlib.MAX_WBITS
+
+
+class GzipCheckpoint(NamedTuple):
+    """
+    Point in a gzip file decompression can restart from.
+
+    At a member start a gzip header is read from compressed_offset and
+    window is empty. Otherwise compressed_offset is the byte aligned start
+    of a deflate block and window holds the uncompressed data before it,
+    which later blocks may refer back to.
+    """
+    compressed_offset: int
+    uncompressed_offset: int
+    window: bytes = b""
+    member_start: bool = True
+
+
+class GzipIndex:
+    """
+    Checkpoints into a gzip file, stored as a json sidecar next to it.
+
+    zlib can only restart where the compressed stream is byte aligned, so
+    checkpoints are taken at gzip members and at sync or full flush points
+    like the ones written by pigz, bgzip and 'gzip --rsyncable', at most
+    one every spacing uncompressed bytes. A file written in one go by
+    plain gzip has a single checkpoint at its start.
+
+    The sidecar records the size, modification time and inode of the gzip
+    file and is ignored once the file changes.
+    """
+    SUFFIX = ".gzidx"
+    VERSION = 1
+
+    def __init__(self, filepath: str, checkpoints: List[GzipCheckpoint],
+                 uncompressed_size: Optional[int] = None,
+                 fingerprint: Optional[FileStat] = None):
+        """
+        Args:
+            filepath(str): Gzip filepath
+            checkpoints(list): Checkpoints ordered by offset
+            uncompressed_size(int): Size of decompressed file if known
+            fingerprint(FileStat): Fingerprint of file index is built from
+        """
+        self._filepath = filepath
+        self._checkpoints = checkpoints or [GzipCheckpoint(0, 0)]
+        self._offsets = [checkpoint.uncompressed_offset
+                         for checkpoint in self._checkpoints]
+        self._uncompressed_size = uncompressed_size
+        self._fingerprint = fingerprint
+
+    @property
+    def filepath(self) -> str:
+        """
+        Get gzip filepath
+
+        Returns:
+            str: Filepath
+        """
+        return self._filepath
+
+    @property
+    def checkpoints(self) -> List[GzipCheckpoint]:
+        """
+        Get checkpoints ordered by offset
+
+        Returns:
+            list: Checkpoints
+        """
+        return list(self._checkpoints)
+
+    @property
+    def uncompressed_size(self) -> Optional[int]:
+        """
+        Get size of decompressed file
+
+        Returns:
+            int: Size in bytes
+            None: Size is not known
+        """
+        return self._uncompressed_size
+
+    @staticmethod
+    def sidecar_path(filepath: str) -> str:
+        """
+        Get filepath of index sidecar
+
+        Args:
+            filepath(str): Gzip filepath
+
+        Returns:
+            str: Sidecar filepath
+        """
+        return str(filepath) + GzipIndex.SUFFIX
+
+    def checkpoint_before(self, offset: int) -> GzipCheckpoint:
+        """
+        Get last checkpoint at or before an uncompressed offset
+
+        Args:
+            offset(int): Uncompressed offset
+
+        Returns:
+            GzipCheckpoint: Checkpoint to restart from
+        """
+        position = bisect.bisect_right(self._offsets, max(0, offset))
+        return self._checkpoints[max(0, position - 1)]
+
+    def is_current(self) -> bool:
+        """
+        Checks gzip file is unchanged since index is built
+
+        Returns:
+            bool: Index matches file
+        """
+        return self._fingerprint is not None and \
+            self._fingerprint == FileManifest.fingerprint(self._filepath)
+
+    @staticmethod
+    def build(filepath: str,
+              spacing: int = DEFAULT_SPACING) -> Optional["GzipIndex"]:
+        """
+        Builds index by decompressing gzip file once, nothing is written
+
+        Args:
+            filepath(str): Gzip filepath
+            spacing(int): Least uncompressed bytes between checkpoints
+
+        Returns:
+            GzipIndex: Index of file
+            None: File could not be read or is not gzip
+        """
+        fingerprint = FileManifest.fingerprint(filepath)
+        try:
+            with open(filepath, "rb") as handle:
+                if handle.read(2) != GZIP_MAGIC:
+                    logging.warning(f"Not a gzip file '{filepath}'")
+                    return None
+                handle.seek(0)
+                scanner = _CheckpointScanner(max(1, spacing))
+                checkpoints, size = scanner.scan(handle)
+        except (OSError, EOFError, zlib.error) as exc:
+            logging.warning(f"Could not index '{filepath}' {exc}")
+            return None
+
+        logging.debug(f"Indexed '{filepath}' with {len(checkpoints)} "
+                      f"checkpoints")
+        return GzipIndex(filepath, checkpoints, size, fingerprint)
+
+    def save(self) -> bool:
+        """
+        Saves index as sidecar next to gzip file
+
+        Returns:
+            bool: Index is saved
+        """
+        sidecar = self.sidecar_path(self._filepath)
+        temp_path = sidecar + ".tmp"
+        content = {
+            "version": self.VERSION,
+            "fingerprint": list(self._fingerprint or []),
+            "uncompressed_size": self._uncompressed_size,
+            "checkpoints": [
+                [checkpoint.compressed_offset, checkpoint.uncompressed_offset,
+                 checkpoint.member_start,
+                 base64.b64encode(zlib.compress(checkpoint.window)).decode()]
+                for checkpoint in self._checkpoints]
+        }
+        try:
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(content, handle)
+            os.replace(temp_path, sidecar)
+            return True
+        except OSError as exc:
+            logging.warning(f"Could not save index '{sidecar}' {exc}")
+        return False
+
+    @staticmethod
+    def load(filepath: str) -> Optional["GzipIndex"]:
+        """
+        Loads index sidecar of gzip file
+
+        Args:
+            filepath(str): Gzip filepath
+
+        Returns:
+            GzipIndex: Index of file
+            None: No sidecar, or gzip file changed since it is built
+        """
+        sidecar = GzipIndex.sidecar_path(filepath)
+        if not Path(sidecar).exists():
+            return None
+        try:
+            with open(sidecar, "r", encoding="utf-8") as handle:
+                content = json.load(handle)
+            if content["version"] != GzipIndex.VERSION:
+                return None
+            checkpoints = [
+                GzipCheckpoint(compressed, uncompressed,
+                               zlib.decompress(base64.b64decode(window)),
+                               member_start)
+                for compressed, uncompressed, member_start, window
+                in content["checkpoints"]]
+            index = GzipIndex(filepath, checkpoints,
+                              content["uncompressed_size"],
+                              FileStat(*content["fingerprint"]))
+        except (OSError, ValueError, KeyError, TypeError, zlib.error) as exc:
+            logging.warning(f"Could not load index '{sidecar}' {exc}")
+            return None
+
+        if not index.is_current():
+            logging.debug(f"Index is outdated '{sidecar}'")
+            return None
+        return index
+
+    @staticmethod
+    def load_or_build(filepath: str, spacing: int = DEFAULT_SPACING,
+                      save: bool = True) -> Optional["GzipIndex"]:
+        """
+        Loads index sidecar, building it if missing or outdated
+
+        Args:
+            filepath(str): Gzip filepath
+            spacing(int): Least uncompressed bytes between checkpoints
+            save(bool): Save a built index as sidecar
+
+        Returns:
+            GzipIndex: Index of file
+            None: File could not be indexed
+        """
+        index = GzipIndex.load(filepath)
+        if index is None:
+            index = GzipIndex.build(filepath, spacing)
+            if index and save:
+                index.save()
+        return index
+
+
+class _CheckpointScanner:  # pylint: disable=R0903
+    """
+    Decompresses a gzip stream once, recording checkpoints on the way
+    """
+
+    def __init__(self, spacing: int):
+        self._spacing = spacing
+        self._decompressor = zlib.decompressobj(GZIP_WBITS)
+        self._compressed_offset = 0
+        self._total = 0
+        self._window = b""
+        self._member_started = False
+        self.checkpoints = [GzipCheckpoint(0, 0)]
+
+    def scan(self, handle: io.BufferedIOBase) -> Tuple[List[GzipCheckpoint],
+                                                       int]:
+        """
+        Reads every chunk of handle
+
+        Returns:
+            tuple: Checkpoints and uncompressed size
+        """
+        chunk = handle.read(CHUNK_SIZE)
+        while chunk:
+            self._scan_chunk(chunk)
+            chunk = handle.read(CHUNK_SIZE)
+
+        if not self._decompressor.eof and self._member_started:
+            raise EOFError("Compressed file ended before the end-of-stream "
+                           "marker was reached")
+        last = self.checkpoints[-1]
+        if len(self.checkpoints) > 1 and last.member_start and \
+                last.uncompressed_offset == self._total:
+            self.checkpoints.pop()
+        return self.checkpoints, self._total
+
+    def _due(self) -> bool:
+        last = self.checkpoints[-1].uncompressed_offset
+        return self._total - last >= self._spacing
+
+    def _scan_chunk(self, data: bytes) -> None:
+        """
+        Feeds chunk, splitting it after every sync marker to check if a
+        checkpoint is due there
+        """
+        while data:
+            position = data.find(SYNC_MARKER)
+            if position < 0:
+                self._feed(data)
+                return
+
+            end = position + len(SYNC_MARKER)
+            self._feed(data[:end])
+            data = data[end:]
+            if self._due() and self._restarts_at(data[:PROBE_SIZE]):
+                self.checkpoints.append(GzipCheckpoint(
+                    self._compressed_offset, self._total, self._window,
+                    member_start=False))
+
+    def _restarts_at(self, probe: bytes) -> bool:
+        """
+        Checks decompression restarted from the window gives the same data
+        as the running decompressor, ruling out marker bytes which are not
+        a flush point
+        """
+        if len(probe) < PROBE_SIZE or self._decompressor.eof or \
+                not self._member_started:
+            return False
+        try:
+            expected = self._decompressor.copy().decompress(probe)
+            restarted = zlib.decompressobj(
+                RAW_WBITS, zdict=self._window).decompress(probe)
+        except zlib.error:
+            return False
+        size = min(len(expected), len(restarted))
+        return size > 0 and expected[:size] == restarted[:size]
+
+    def _feed(self, data: bytes) -> None:
+        """
+        Decompresses data, starting a new member after every member end
+        """
+        while data:
+            output = self._decompressor.decompress(data)
+            self._member_started = True
+            self._total += len(output)
+            if len(output) >= WINDOW_SIZE:
+                self._window = output[-WINDOW_SIZE:]
+            elif output:
+                self._window = (self._window + output)[-WINDOW_SIZE:]
+
+            if not self._decompressor.eof:
+                self._compressed_offset += len(data)
+                return
+
+            unused = self._decompressor.unused_data
+            self._compressed_offset += len(data) - len(unused)
+            data = unused.lstrip(b"\x00")
+            self._compressed_offset += len(unused) - len(data)
+            self._decompressor = zlib.decompressobj(GZIP_WBITS)
+            self._window = b""
+            self._member_started = False
+            if self._due():
+                self.checkpoints.append(GzipCheckpoint(
+                    self._compressed_offset, self._total))
+
+
+class IndexedGzipReader(io.RawIOBase):  # pylint: disable=R0902
+    """
+    Readable and seekable decompressed view of a gzip file. Seeking
+    restarts decompression from the nearest checkpoint before the offset,
+    so only the blocks from there on are decompressed.
+
+    Wrap it in io.BufferedReader or io.TextIOWrapper to read lines.
+    """
+
+    def __init__(self, filepath: str, index: Optional[GzipIndex] = None):
+        """
+        Args:
+            filepath(str): Gzip filepath
+            index(GzipIndex): Checkpoints, only the file start if None
+        """
+        super().__init__()
+        self._index = index or GzipIndex(filepath, [])
+        # The reader owns the handle for its lifetime, close closes it
+        self._handle = open(filepath, "rb")  # pylint: disable=R1732
+        self._position = 0
+        self._output = b""
+        self._output_offset = 0
+        self._input = b""
+        self._raw = False
+        self._decompressor = zlib.decompressobj(GZIP_WBITS)
+        try:
+            self._restart(self._index.checkpoint_before(0))
+        except BaseException:
+            self._handle.close()
+            raise
+
+    @staticmethod
+    def open(filepath: str) -> "IndexedGzipReader":
+        """
+        Opens gzip file with its index sidecar if there is a current one
+
+        Args:
+            filepath(str): Gzip filepath
+
+        Returns:
+            IndexedGzipReader: Reader of decompressed data
+        """
+        return IndexedGzipReader(filepath, GzipIndex.load(filepath))
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            self._handle.close()
+        super().close()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            if self._index.uncompressed_size is None:
+                raise io.UnsupportedOperation("Size of gzip file is unknown")
+            offset += self._index.uncompressed_size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence {whence}")
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        checkpoint = self._index.checkpoint_before(offset)
+        if offset < self._position or \
+                checkpoint.uncompressed_offset > self._position:
+            self._restart(checkpoint)
+        self._skip(offset - self._position)
+        return self._position
+
+    def readinto(self, buffer) -> int:  # type: ignore
+        if self._output_offset >= len(self._output):
+            self._output = self._decompress()
+            self._output_offset = 0
+        size = min(len(buffer), len(self._output) - self._output_offset)
+        buffer[:size] = self._output[self._output_offset:
+                                     self._output_offset + size]
+        self._output_offset += size
+        self._position += size
+        return size
+
+    def _restart(self, checkpoint: GzipCheckpoint) -> None:
+        """
+        Restarts decompression at checkpoint
+        """
+        self._handle.seek(checkpoint.compressed_offset)
+        self._raw = not checkpoint.member_start
+        if self._raw:
+            self._decompressor = zlib.decompressobj(RAW_WBITS,
+                                                    zdict=checkpoint.window)
+        else:
+            self._decompressor = zlib.decompressobj(GZIP_WBITS)
+        self._position = checkpoint.uncompressed_offset
+        self._output = b""
+        self._output_offset = 0
+        self._input = b""
+
+    def _skip(self, size: int) -> None:
+        """
+        Decompresses and drops size bytes
+        """
+        while size > 0:
+            if self._output_offset >= len(self._output):
+                self._output = self._decompress()
+                self._output_offset = 0
+                if not self._output:
+                    return
+            count = min(size, len(self._output) - self._output_offset)
+            self._output_offset += count
+            self._position += count
+            size -= count
+
+    def _next_member(self) -> bool:
+        """
+        Starts decompressing the member after the one ending
+
+        Returns:
+            bool: Another member follows
+        """
+        unused = self._decompressor.unused_data + self._input
+        if self._raw:
+            while len(unused) < GZIP_TRAILER_SIZE:
+                chunk = self._handle.read(CHUNK_SIZE)
+                if not chunk:
+                    return False
+                unused += chunk
+            unused = unused[GZIP_TRAILER_SIZE:]
+
+        unused = unused.lstrip(b"\x00")
+        while not unused:
+            chunk = self._handle.read(CHUNK_SIZE)
+            if not chunk:
+                return False
+            unused = chunk.lstrip(b"\x00")
+        self._decompressor = zlib.decompressobj(GZIP_WBITS)
+        self._raw = False
+        self._input = unused
+        return True
+
+    def _decompress(self) -> bytes:
+        """
+        Get next decompressed bytes, empty at the end of the file
+        """
+        while True:
+            if self._decompressor.eof and not self._next_member():
+                return b""
+            data = self._input or self._handle.read(CHUNK_SIZE)
+            if not data:
+                if self._decompressor.eof:
+                    return b""
+                raise EOFError("Compressed file ended before the "
+                               "end-of-stream marker was reached")
+            output = self._decompressor.decompress(data, CHUNK_SIZE * 16)
+            self._input = self._decompressor.unconsumed_tail
+            if output:
+                return output
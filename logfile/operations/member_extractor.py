@@ -0,0 +1,685 @@
+"""
+Module contains extraction of archive members streamed from other archives
+"""
+import io
+import tarfile
+import contextlib
+import zipfile
+import logging
+import threading
+from concurrent import futures
+from pathlib import Path, PurePosixPath
+from typing import (IO, Any, Callable, Dict, Iterable, Iterator, List,
+                    NamedTuple, Optional, Set, Tuple, Union)
+from logfile.operations.decompressors import DECOMPRESSION_ERRORS, \
+    Decompressor, decompressor_for_name
+
+# pylint: disable=W1203
+
+ByteStream = Union[IO[bytes], io.BufferedIOBase]
+
+DEFAULT_MAX_IN_FLIGHT_BYTES = 256 * 1024 * 1024
+
+
+class MemberFilter(NamedTuple):
+    """
+    Include and exclude patterns matched against tar member names, a
+    pattern matches when it is part of the name like in ConvertFiles
+    """
+    include: List[str]
+    exclude: List[str]
+
+    @staticmethod
+    def _matches(patterns: List[str], name: str) -> bool:
+        return any(pattern and pattern in name for pattern in patterns)
+
+    def accepts(self, name: str) -> bool:
+        """
+        Checks member is included and not excluded
+
+        Args:
+            name(str): Member name
+
+        Returns:
+            bool: Member is extracted
+        """
+        if self._matches(self.exclude, name):
+            return False
+        if not any(self.include):
+            return True
+        return self._matches(self.include, name) or \
+            decompressor_for_name(name) is not None
+
+
+class ParallelDecompression(NamedTuple):
+    """
+    Threads decompressing independent archives concurrently, and the most
+    compressed bytes held in memory waiting for or being decompressed
+    """
+    threads: int = 1
+    max_in_flight_bytes: int = DEFAULT_MAX_IN_FLIGHT_BYTES
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Get more than one thread is used
+
+        Returns:
+            bool: Archives are decompressed concurrently
+        """
+        return self.threads > 1
+
+
+class InFlightBytes:
+    """
+    Blocks producers while the bytes handed to workers exceeds a limit.
+    A single item larger than the limit is let through when nothing else
+    is in flight, so it can never wait forever
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes(int): Bytes allowed in flight
+        """
+        self._max_bytes = max(1, max_bytes)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Get bytes currently in flight
+
+        Returns:
+            int: Bytes acquired and not released
+        """
+        with self._condition:
+            return self._in_flight
+
+    def acquire(self, size: int) -> None:
+        """
+        Waits until size bytes fits the limit and adds them
+
+        Args:
+            size(int): Bytes to add
+        """
+        with self._condition:
+            while self._in_flight and \
+                    self._in_flight + size > self._max_bytes:
+                self._condition.wait()
+            self._in_flight += size
+
+    def release(self, size: int) -> None:
+        """
+        Removes size bytes and wakes waiting producers
+
+        Args:
+            size(int): Bytes to remove
+        """
+        with self._condition:
+            self._in_flight -= size
+            self._condition.notify_all()
+
+
+class SharedDecompression:
+    """
+    Threads and bytes in flight shared by every archive extracted in a
+    run, so DecompressThreads and MaxInFlightBytes limit the whole run
+    instead of each archive.
+
+    There is one pool of threads extracting queued archives and one
+    decompressing members held in memory, members are never waited for on
+    the archive pool so neither can block the other. Pools are started
+    when first used and stopped by shutdown. A copy sent to another
+    process starts its own pools and budget.
+    """
+
+    def __init__(self, parallel: ParallelDecompression):
+        """
+        Args:
+            parallel(ParallelDecompression): Threads and bytes in flight
+        """
+        self.parallel = parallel
+        self.in_flight = InFlightBytes(parallel.max_in_flight_bytes)
+        self._lock = threading.Lock()
+        self._executors: Dict[str, futures.ThreadPoolExecutor] = {}
+        self._detached = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"parallel": self.parallel}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["parallel"])  # type: ignore
+        self._detached = True
+
+    @property
+    def detached(self) -> bool:
+        """
+        Get shared decompression is a copy sent to another process, which
+        is stopped by whoever uses it
+
+        Returns:
+            bool: Copy from another process
+        """
+        return self._detached
+
+    @staticmethod
+    @contextlib.contextmanager
+    def use(parallel: Optional[Union[ParallelDecompression,
+                                     "SharedDecompression"]]
+            ) -> Iterator["SharedDecompression"]:
+        """
+        Get shared decompression for parallel, pools of one created here
+        or copied from another process are stopped on exit
+
+        Args:
+            parallel: Shared decompression, or threads and bytes in flight
+                      to share
+
+        Returns:
+            Iterator[SharedDecompression]: Shared decompression
+        """
+        if isinstance(parallel, SharedDecompression) and \
+                not parallel.detached:
+            yield parallel
+            return
+        shared = parallel if isinstance(parallel, SharedDecompression) \
+            else SharedDecompression(parallel or ParallelDecompression())
+        try:
+            yield shared
+        finally:
+            shared.shutdown()
+
+    def executor(self, name: str) -> futures.ThreadPoolExecutor:
+        """
+        Get pool of threads, started by the first call for name
+
+        Args:
+            name(str): 'archives' or 'members'
+
+        Returns:
+            ThreadPoolExecutor: Pool of DecompressThreads threads
+        """
+        with self._lock:
+            if name not in self._executors:
+                self._executors[name] = futures.ThreadPoolExecutor(
+                    self.parallel.threads)
+            return self._executors[name]
+
+    def shutdown(self) -> None:
+        """
+        Waits for queued work and stops the threads
+        """
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+
+# Threads and bytes in flight, shared by the run or by a single extractor
+Parallelism = Union[ParallelDecompression, SharedDecompression]
+
+
+class MemberExtractor:  # pylint: disable=R0902
+    """
+    Writes streams and tar members to disk through a single reused buffer.
+
+    Tar and compressed members inside a tar is decompressed while the tar is
+    read, so only the files inside them reaches disk. Every file written is
+    recorded in produced, inner archives which could not be decompressed is
+    written as is and recorded in kept_archives too.
+
+    Members rejected by the member filter are never opened, tarfile skips
+    their data by seeking or, for compressed streams, reading past it.
+    Archives are let through include patterns, so their members can be
+    matched, but not through exclude patterns.
+
+    No ownership, permissions or timestamps are restored, and every
+    directory is created once no matter how many members it holds.
+
+    With parallel decompression, compressed members like rotated gz logs
+    are read into memory and decompressed on a thread pool while the tar
+    is read on, zlib, bz2 and lzma release the GIL while decompressing.
+    Reading blocks while more than max_in_flight_bytes is waiting, and
+    members larger than that are decompressed in the stream as before.
+    Extractors given the same SharedDecompression share its threads and
+    bytes in flight. finish must be called to wait for them once the tar
+    is read.
+    """
+
+    def __init__(self,  # pylint: disable=R0913
+                 buffer_size: int, nested: bool = True,
+                 member_filter: Optional[MemberFilter] = None,
+                 extract_links: bool = False, *,
+                 parallel: Optional[Parallelism] = None):
+        """
+        Args:
+            buffer_size(int): Bytes decompressed at a time
+            nested(bool): Decompress archives inside tar files
+            member_filter(MemberFilter): Members to extract, all if None
+            extract_links(bool): Extract symbolic and hard links too
+            parallel(Parallelism): Decompress nested members on a thread
+                                   pool, a ParallelDecompression is used
+                                   by this extractor only
+        """
+        self._buffer = memoryview(bytearray(max(1, buffer_size)))
+        self._nested = nested
+        self._member_filter = member_filter
+        self._extract_links = extract_links
+        self._pool = DecompressPool(parallel, len(self._buffer))
+        self._max_held_bytes = self._pool.max_in_flight_bytes
+        self._directories: Set[str] = set()
+        self.produced: List[str] = []
+        self.kept_archives: List[str] = []
+
+    @staticmethod
+    def member_path(destination: Path, name: str) -> Optional[Path]:
+        """
+        Get path a tar member is extracted to, refusing members escaping
+        the destination
+
+        Args:
+            destination(Path): Directory tar is extracted in
+            name(str): Member name
+
+        Returns:
+            Path: Path inside destination
+            None: Member name is absolute or contains '..'
+        """
+        member = PurePosixPath(name)
+        if member.is_absolute() or ".." in member.parts:
+            logging.warning(f"Skipping unsafe member '{name}'")
+            return None
+        parts = [part for part in member.parts if part != "."]
+        if not parts:
+            return None
+        return destination.joinpath(*parts)
+
+    def make_directory(self, directory: Path) -> None:
+        """
+        Creates directory and its parents unless created before
+
+        Args:
+            directory(Path): Directory path
+        """
+        key = str(directory)
+        if key in self._directories:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directories.add(key)
+        self._directories.update(str(parent) for parent in directory.parents)
+
+    def make_directories(self, members: Iterable[tarfile.TarInfo],
+                         destination: Path) -> None:
+        """
+        Creates every directory members are extracted in up front. Deepest
+        directories are created first, so their parents are never created
+        on their own
+
+        Args:
+            members(Iterable): Tar members
+            destination(Path): Directory tar is extracted in
+        """
+        directories: Set[Path] = set()
+        for member in members:
+            if self._member_filter and \
+                    not self._member_filter.accepts(member.name):
+                continue
+            member_path = self.member_path(destination, member.name)
+            if member_path is None:
+                continue
+            directories.add(member_path if member.isdir()
+                            else member_path.parent)
+
+        for directory in sorted(directories, key=lambda path: len(path.parts),
+                                reverse=True):
+            self.make_directory(directory)
+
+    @staticmethod
+    def copy_stream(source: ByteStream, filepath: str,
+                    buffer: memoryview) -> None:
+        """
+        Copies everything readable from source to filepath through buffer
+
+        Args:
+            source(ByteStream): Stream to read from
+            filepath(str): File to write
+            buffer(memoryview): Buffer reused for every read
+        """
+        with open(filepath, "wb") as output:
+            count = source.readinto(buffer)  # type: ignore
+            while count:
+                output.write(buffer[:count])
+                count = source.readinto(buffer)  # type: ignore
+
+    def write_file(self, source: ByteStream, filepath: str) -> None:
+        """
+        Writes everything readable from source to filepath
+
+        Args:
+            source(ByteStream): Stream to read from
+            filepath(str): File to write
+        """
+        self.copy_stream(source, filepath, self._buffer)
+        self.produced.append(filepath)
+
+    def extract_compressed_stream(self, source: ByteStream,
+                                  filepath: Path,
+                                  decompressor: Decompressor) -> bool:
+        """
+        Extracting a compressed file read from a stream
+
+        Args:
+            source(ByteStream): Stream of compressed data
+            filepath(Path): File to extract to
+            decompressor(Decompressor): Decompressor of stream format
+
+        Returns:
+            bool: File is extracted
+        """
+        try:
+            with decompressor.wrap(source) as stream:
+                self.write_file(stream, filepath.as_posix())
+            return True
+        except DECOMPRESSION_ERRORS as exc:
+            logging.warning(f"Nested archive is corrupted '{filepath}' {exc}")
+            self.remove_partial(filepath.as_posix())
+        return False
+
+    def extract_tar_stream(self, source: ByteStream, destination: Path,
+                           decompressor: Optional[Decompressor] = None
+                           ) -> bool:
+        """
+        Extracting a tar read from a stream
+
+        Args:
+            source(ByteStream): Stream of tar data
+            destination(Path): Directory to extract in
+            decompressor(Decompressor): Decompressor of a compressed tar,
+                                        None lets tarfile detect it
+
+        Returns:
+            bool: Tar is extracted
+        """
+        try:
+            destination.mkdir(parents=True, exist_ok=True)
+            if decompressor and decompressor.is_stream:
+                with decompressor.wrap(source) as stream:
+                    with tarfile.open(fileobj=stream, mode="r|") as tar:
+                        self.extract_members(tar, destination)
+            else:
+                with tarfile.open(fileobj=source, mode="r|*") as tar:
+                    self.extract_members(tar, destination)
+            return True
+        except DECOMPRESSION_ERRORS as exc:
+            logging.warning(f"Nested archive is corrupted "
+                            f"'{destination}' {exc}")
+        return False
+
+    def extract_zip_members(self, archive: zipfile.ZipFile,
+                            destination: Path) -> None:
+        """
+        Extracting members of a zip file in order they are stored, nested
+        archives are written as is
+
+        Args:
+            archive(ZipFile): Zip file to extract
+            destination(Path): Directory to extract in
+        """
+        for info in archive.infolist():
+            member_path = self.member_path(destination, info.filename)
+            if member_path is None:
+                continue
+
+            if self._member_filter and \
+                    not self._member_filter.accepts(info.filename):
+                logging.debug(f"Skipping filtered member '{info.filename}'")
+            elif info.is_dir():
+                self.make_directory(member_path)
+            else:
+                self.make_directory(member_path.parent)
+                with archive.open(info) as source:
+                    self.write_file(source, member_path.as_posix())
+
+    def extract_members(self, tar: tarfile.TarFile,
+                        destination: Path) -> None:
+        """
+        Extracting members of a tar in order they are stored
+
+        Args:
+            tar(TarFile): Tar to extract
+            destination(Path): Directory to extract in
+        """
+        for member in tar:
+            member_path = self.member_path(destination, member.name)
+            if member_path is None:
+                continue
+
+            if self._member_filter and \
+                    not self._member_filter.accepts(member.name):
+                logging.debug(f"Skipping filtered member '{member.name}'")
+            elif member.isdir():
+                self.make_directory(member_path)
+            elif member.isfile():
+                self.make_directory(member_path.parent)
+                self._extract_member(tar, member, member_path)
+            elif self._extract_links and (member.issym() or member.islnk()):
+                self.make_directory(member_path.parent)
+                self._extract_link(tar, member, destination)
+            else:
+                logging.debug(f"Skipping member '{member.name}' "
+                              f"not a file or directory")
+
+    @staticmethod
+    def _extract_link(tar: tarfile.TarFile, member: tarfile.TarInfo,
+                      destination: Path) -> None:
+        """
+        Extracting a symbolic or hard link member
+        """
+        try:
+            tar.extract(member, destination.as_posix(), set_attrs=False)
+        except (tarfile.TarError, OSError) as exc:
+            logging.warning(f"Could not extract link '{member.name}' {exc}")
+
+    def _extract_member(self, tar: tarfile.TarFile, member: tarfile.TarInfo,
+                        member_path: Path) -> None:
+        """
+        Extracting a single file member, decompressing archives inside it
+        on the fly
+        """
+        source: Optional[ByteStream] = tar.extractfile(member)
+        if source is None:
+            return
+
+        decompressor = decompressor_for_name(member_path.name)
+        nested_target = member_path.parent / member_path.stem
+        if not self._nested or decompressor is None or \
+                decompressor.name == "zip":
+            self.write_file(source, member_path.as_posix())
+            return
+
+        if decompressor.name == "tar" or \
+                decompressor.is_tar(member_path.name):
+            stem = PurePosixPath(member_path.stem)
+            if stem.suffix.lower() == ".tar":
+                nested_target = member_path.parent / stem.stem
+            source = self._rewindable(source, member.size)
+            extracted = self.extract_tar_stream(source, nested_target,
+                                                decompressor)
+        elif self._pool.accepts(member.size):
+            self._pool.submit(source.read, member.size, member_path,
+                              nested_target, decompressor)
+            return
+        else:
+            source = self._rewindable(source, member.size)
+            extracted = self.extract_compressed_stream(source, nested_target,
+                                                       decompressor)
+
+        if extracted:
+            return
+        if self._seekable(source):
+            logging.debug(f"Keeping archive as is '{member_path}'")
+            source.seek(0)
+            self.write_file(source, member_path.as_posix())
+            self.kept_archives.append(member_path.as_posix())
+        else:
+            logging.warning(f"Could not keep corrupted archive as is "
+                            f"'{member_path}'")
+
+    @staticmethod
+    def _seekable(source: ByteStream) -> bool:
+        """
+        Checks source can be read again, members of a tar read as a stream
+        can not and their file objects have no seekable
+        """
+        try:
+            return bool(source.seekable())
+        except AttributeError:
+            return False
+
+    def _rewindable(self, source: ByteStream, size: int) -> ByteStream:
+        """
+        Get source as a stream which can be read again, a member of a tar
+        read as a stream is held in memory when it fits max_in_flight_bytes
+        so it can be kept as is if it does not decompress
+        """
+        if self._seekable(source) or size > self._max_held_bytes:
+            return source
+        return io.BytesIO(source.read())
+
+    def finish(self) -> None:
+        """
+        Waits for members decompressed on the thread pool and records the
+        files they produced, in the order members were read
+        """
+        for filepath, kept in self._pool.finish():
+            self.produced.append(filepath)
+            if kept:
+                self.kept_archives.append(filepath)
+
+    @staticmethod
+    def remove_partial(filepath: str) -> None:
+        """
+        Removes output left behind by a failed extraction
+
+        Args:
+            filepath(str): File to remove
+        """
+        try:
+            Path(filepath).unlink()
+        except OSError:
+            pass
+
+
+class DecompressPool:
+    """
+    Decompresses members held in memory on the member threads of a shared
+    decompression, which are started by the first member submitted
+    """
+
+    def __init__(self, parallel: Optional[Parallelism], buffer_size: int):
+        """
+        Args:
+            parallel(Parallelism): Threads and bytes in flight, owned by
+                                   this pool if it is a
+                                   ParallelDecompression
+            buffer_size(int): Bytes decompressed at a time by each thread
+        """
+        self._owns_shared = not isinstance(parallel, SharedDecompression)
+        self._shared = parallel \
+            if isinstance(parallel, SharedDecompression) \
+            else SharedDecompression(parallel or ParallelDecompression())
+        self._parallel = self._shared.parallel
+        self._buffer_size = buffer_size
+        self._pending: List[futures.Future] = []
+
+    @property
+    def max_in_flight_bytes(self) -> int:
+        """
+        Get most compressed bytes held in memory
+
+        Returns:
+            int: Size in bytes
+        """
+        return self._parallel.max_in_flight_bytes
+
+    def accepts(self, size: int) -> bool:
+        """
+        Checks a member of size is decompressed on the pool
+
+        Args:
+            size(int): Compressed size of member
+
+        Returns:
+            bool: Pool is enabled and member fits bytes in flight
+        """
+        return self._parallel.enabled and \
+            size <= self._parallel.max_in_flight_bytes
+
+    def submit(self,  # pylint: disable=R0913
+               read: Callable[[], bytes], size: int, member_path: Path,
+               nested_target: Path, decompressor: Decompressor) -> None:
+        """
+        Reads a compressed member into memory and queues it for
+        decompression, waiting while too many bytes are in flight
+
+        Args:
+            read(Callable): Reads the whole compressed member
+            size(int): Compressed size of member
+            member_path(Path): Path member is written to if kept as is
+            nested_target(Path): Path member is decompressed to
+            decompressor(Decompressor): Decompressor of member format
+        """
+        executor = self._shared.executor("members")
+        in_flight = self._shared.in_flight
+        in_flight.acquire(size)
+        try:
+            future = executor.submit(
+                self._decompress_bytes, read(), member_path, nested_target,
+                decompressor, self._buffer_size)
+        except BaseException:
+            in_flight.release(size)
+            raise
+        future.add_done_callback(lambda _: in_flight.release(size))
+        self._pending.append(future)
+
+    @staticmethod
+    def _decompress_bytes(data: bytes, member_path: Path,
+                          nested_target: Path, decompressor: Decompressor,
+                          buffer_size: int) -> Tuple[str, bool]:
+        """
+        Decompresses a member held in memory, writing it as is if it could
+        not be decompressed
+        """
+        buffer = memoryview(bytearray(buffer_size))
+        try:
+            with decompressor.wrap(io.BytesIO(data)) as stream:
+                MemberExtractor.copy_stream(stream, nested_target.as_posix(),
+                                            buffer)
+            return nested_target.as_posix(), False
+        except DECOMPRESSION_ERRORS as exc:
+            logging.warning(f"Nested archive is corrupted "
+                            f"'{nested_target}' {exc}")
+            MemberExtractor.remove_partial(nested_target.as_posix())
+
+        logging.debug(f"Keeping archive as is '{member_path}'")
+        MemberExtractor.copy_stream(io.BytesIO(data), member_path.as_posix(),
+                                    buffer)
+        return member_path.as_posix(), True
+
+    def finish(self) -> List[Tuple[str, bool]]:
+        """
+        Waits for every submitted member, the threads are stopped unless
+        they are shared
+
+        Returns:
+            list: Path written for each member in order submitted, and
+                  whether it was kept as is
+        """
+        pending, self._pending = self._pending, []
+        try:
+            return [future.result() for future in pending]
+        finally:
+            if self._owns_shared:
+                self._shared.shutdown()
@@ -2,21 +2,71 @@
 Module contains a base class for file operations
 """
 import abc
+import os
+import json
+import hashlib
 import logging
+from concurrent import futures
 from pathlib import Path
-from typing import List, Dict
+from typing import (Any, Callable, Dict, Iterable, Iterator, List,
+                    NamedTuple, Optional)
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+from logfile.operations.file_manifest import FileManifest
+from logfile.operations.gzip_index import GzipIndex
+from logfile.operations.archive_filesystem import ArchiveFileSystem
+from logfile.operations.timestamp_merge import DEFAULT_TIMESTAMP_REGEX
 
 # pylint: disable=W1203
 
 
-class OperationBase(metaclass=abc.ABCMeta):
+class ItemResult(NamedTuple):
+    """
+    Result of running work on a single item
+    """
+    item: Any
+    value: Any
+    error: str
+
+    @property
+    def success(self) -> bool:
+        """
+        Get item work succeeded
+
+        Returns:
+            bool: No error and work returned a true value
+        """
+        return not self.error and bool(self.value)
+
+
+class OperationBase(metaclass=abc.ABCMeta):  # pylint: disable=R0902,R0904
     """
     Base class for sharing methods across file operations
+
+    Operations reading files through ArchiveFileSystem set
+    READS_ARCHIVES, only they are given paths inside archives with
+    BrowseArchives
     """
-    def __init__(self, workfolder: str, instructions: Dict[str, str]):
+    READS_ARCHIVES = False
+
+    def __init__(self, workfolder: str, instructions: Dict[str, str],
+                 snapshot: Optional[WorkfolderSnapshot] = None):
+        """
+        Args:
+            workfolder(str): Base where relative paths can be made from
+            instructions(Dict[str, str]): Instructions to operation
+            snapshot(WorkfolderSnapshot): Shared snapshot of workfolder,
+                                          None walks the file system
+        """
         logging.info(f"Running FileOperation'{self.__class__.__name__}'")
         self._workfolder = workfolder
         self._instructions = instructions
+        self._snapshot = snapshot
+        self._manifest: Optional[FileManifest] = None
+        self.failed_items: List[ItemResult] = []
+        self._stream_directory = ""
+        self._stream_recursive = False
+        self._filesystem: Optional[ArchiveFileSystem] = None
+        self._filesystem_checked = False
 
         if not self._instructions:
             logging.warning(r"Instructions is set to None, set it to {}")
@@ -77,6 +127,25 @@ class OperationBase(metaclass=abc.ABCMeta):
         self._log_instruction(recursive_key, str(val))
         return val
 
+    @property
+    def include_files_instruction(self) -> List[str]:
+        """
+        Get file names to include from instructions
+
+        Returns:
+            List<string>: Values to include
+
+        Default value: []
+        """
+        include_files_key = "IncludeFiles"
+        val: List[str] = []
+        if include_files_key in self._instructions:
+            value = self._instructions[include_files_key]
+            val = value.split('|')
+
+        self._log_instruction(include_files_key, str(val))
+        return val
+
     @property
     def exclude_files_instruction(self) -> List[str]:
         """
@@ -199,6 +268,188 @@ class OperationBase(metaclass=abc.ABCMeta):
         self._log_instruction(key, val)
         return val
 
+    def _get_int_instruction(self, key: str, default: int) -> int:
+        """
+        Get integer instruction, falling back to default if not a number
+
+        Args:
+            key(str): Instruction key
+            default(int): Default value
+
+        Returns:
+            int: Instruction value
+        """
+        val = default
+        if key in self._instructions:
+            try:
+                val = int(self._instructions[key])
+            except ValueError:
+                logging.warning(f"Instruction '{key}' is not a number "
+                                f"'{self._instructions[key]}'")
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def workers_instruction(self) -> int:
+        """
+        Get number of workers from instructions
+
+        Returns:
+            int: Number of items processed concurrently
+
+        Default value: 1
+        """
+        return max(1, self._get_int_instruction("Workers", 1))
+
+    @property
+    def executor_instruction(self) -> str:
+        """
+        Get executor type from instructions
+
+        Returns:
+            str: 'thread' or 'process'
+
+        Default value: 'thread'
+        """
+        key = "Executor"
+        val = "thread"
+        if key in self._instructions:
+            val = self._instructions[key].lower()
+            if val not in ("thread", "process"):
+                logging.warning(f"Unknown executor '{val}', using 'thread'")
+                val = "thread"
+        self._log_instruction(key, val)
+        return val
+
+    @property
+    def buffer_size_instruction(self) -> int:
+        """
+        Get buffer size from instructions
+
+        Returns:
+            int: Bytes read or written at a time
+
+        Default value: 1048576
+        """
+        return max(1, self._get_int_instruction("BufferSize", 1024 * 1024))
+
+    @property
+    def dry_run_instruction(self) -> bool:
+        """
+        Get dry run instruction from instructions
+
+        Returns:
+            bool: Only report what would be done
+
+        Default value: False
+        """
+        key = "DryRun"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def timestamp_regex_instruction(self) -> str:
+        """
+        Get timestamp regex from instructions
+
+        Returns:
+            str: Regex finding timestamp in a line
+
+        Default value: ISO 8601 date and time
+        """
+        key = "TimestampRegex"
+        val = DEFAULT_TIMESTAMP_REGEX
+        if key in self._instructions:
+            val = self._instructions[key]
+        self._log_instruction(key, val)
+        return val
+
+    @property
+    def timestamp_format_instruction(self) -> str:
+        """
+        Get timestamp format from instructions
+
+        Returns:
+            str: strptime format of timestamp
+
+        Default value: ''
+        """
+        key = "TimestampFormat"
+        val = ""
+        if key in self._instructions:
+            val = self._instructions[key]
+        self._log_instruction(key, val)
+        return val
+
+    @property
+    def incremental_instruction(self) -> bool:
+        """
+        Get incremental instruction from instructions
+
+        Returns:
+            bool: Only process files new or changed since last run
+
+        Default value: False
+        """
+        key = "Incremental"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def browse_archives_instruction(self) -> bool:
+        """
+        Get browse archives instruction from instructions
+
+        Returns:
+            bool: Walk inside archives as if they were directories
+
+        Default value: False
+        """
+        key = "BrowseArchives"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def archive_filesystem(self) -> Optional[ArchiveFileSystem]:
+        """
+        Get file system exposing archive members as paths, created once
+        when BrowseArchives is set and the operation reads archives
+
+        Returns:
+            ArchiveFileSystem: File system walking inside archives
+            None: Only the real file system is walked
+        """
+        if not self._filesystem_checked:
+            self._filesystem_checked = True
+            if self.browse_archives_instruction and not self.READS_ARCHIVES:
+                logging.warning(f"BrowseArchives is ignored, "
+                                f"{self.__class__.__name__} can not read "
+                                f"files inside archives")
+            elif self.browse_archives_instruction:
+                self._filesystem = ArchiveFileSystem()
+        return self._filesystem
+
+    @property
+    def operation_key(self) -> str:
+        """
+        Get key identifying operation and its instructions in manifest
+
+        Returns:
+            str: Operation key
+        """
+        instructions = json.dumps(self._instructions, sort_keys=True)
+        digest = hashlib.sha1(instructions.encode("utf-8")).hexdigest()
+        return f"{self.__class__.__name__}:{digest[:12]}"
+
     def make_directory_path(self, relative_path: str) -> str:
         """
         Combines workfolder with relative path
@@ -221,27 +472,122 @@ class OperationBase(metaclass=abc.ABCMeta):
         return val
 
     @staticmethod
-    def get_files(directory: str, recursive: bool) -> List[str]:
+    def _scan_directory(directory: str) -> List[os.DirEntry]:
+        """
+        Reads all entries in a single directory
+
+        The listing is read completely before returning, so operations
+        can rename, extract or delete inside the directory while walking
+        without seeing their own results again.
+
+        Args:
+            directory(str): Directory path
+
+        Returns:
+            list: Directory entries sorted by name
+        """
+        try:
+            with os.scandir(directory) as iterator:
+                return sorted(iterator, key=lambda entry: entry.name)
+        except OSError as exc:
+            logging.warning(f"Could not scan directory '{directory}' {exc}")
+        return []
+
+    @staticmethod
+    def is_sidecar(filepath: str) -> bool:
+        """
+        Checks file is bookkeeping written next to logs, like the manifest
+        or a gzip index, which operations never match
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is a sidecar
+        """
+        return os.path.basename(filepath) == FileManifest.FILE_NAME or \
+            filepath.endswith(GzipIndex.SUFFIX)
+
+    @staticmethod
+    def walk_files(directory: str, recursive: bool) -> Iterator[str]:
+        """
+        Lazily walking files in directory
+
+        Files in a directory are yielded before its sub directories
+        are visited. Symlinked directories are not followed.
+
+        Args:
+            directory(str): Directory path
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Filepaths
+        """
+        if not directory or not os.path.isdir(directory):
+            return
+
+        pending = [str(Path(directory))]
+        while pending:
+            sub_directories = []
+            for entry in OperationBase._scan_directory(pending.pop()):
+                if entry.is_dir(follow_symlinks=False):
+                    sub_directories.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+
+            if recursive:
+                pending.extend(reversed(sub_directories))
+
+    @staticmethod
+    def walk_directories(directory: str, recursive: bool) -> Iterator[str]:
+        """
+        Lazily walking sub directories in directory
+
+        Directories are yielded in pre-order, a directory is yielded
+        before its own sub directories.
+
+        Args:
+            directory(str): Directory path
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Directory paths
+        """
+        if not directory or not os.path.isdir(directory):
+            return
+
+        def sub_directories(path: str) -> List[str]:
+            return [entry.path
+                    for entry in OperationBase._scan_directory(path)
+                    if entry.is_dir(follow_symlinks=False)]
+
+        pending = sub_directories(str(Path(directory)))
+        pending.reverse()
+        while pending:
+            current = pending.pop()
+            yield current
+            if recursive:
+                pending.extend(reversed(sub_directories(current)))
+
+    @staticmethod
+    def get_files(directory: str, recursive: bool,
+                  filesystem: Optional[ArchiveFileSystem] = None
+                  ) -> List[str]:
         """
         Getting files from directory
 
         Args:
             directory(str): Directory path
             recursive(bool): Run recursive through sub directories
+            filesystem(ArchiveFileSystem): Walk inside archives too,
+                                           directory may be inside one
 
         Returns:
             list: Filepaths
         """
-        files: List[str] = []
-        if directory:
-            path = Path(directory)
-            if path.exists():
-                if recursive:
-                    files = list(str(x) for x in path.glob("**/*.*")
-                                 if x.is_file())
-                else:
-                    files = list(str(x) for x in path.iterdir() if x.is_file())
-        return files
+        if filesystem:
+            return list(filesystem.walk_files(directory, recursive))
+        return list(OperationBase.walk_files(directory, recursive))
 
     @staticmethod
     def get_directories(directory: str, recursive: bool) -> List[str]:
@@ -255,12 +601,246 @@ class OperationBase(metaclass=abc.ABCMeta):
         Returns:
             list: Direcory paths
         """
-        if directory:
-            path = Path(directory)
-            if path.exists():
-                if recursive:
-                    return [str(x) for x in path.glob("*/**") if x.is_dir()]
-                return [str(x) for x in path.iterdir() if x.is_dir()]
+        return list(OperationBase.walk_directories(directory, recursive))
+
+    def list_files(self, directory: str, recursive: bool) -> Iterator[str]:
+        """
+        Getting files from directory, using the snapshot when it covers
+        the directory, or walking inside archives with BrowseArchives
+
+        Args:
+            directory(str): Directory path
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Filepaths
+        """
+        filesystem = self.archive_filesystem
+        if filesystem:
+            files = filesystem.walk_files(directory, recursive)
+        elif self._snapshot and self._snapshot.contains(directory):
+            files = self._snapshot.files(directory, recursive)
+        else:
+            files = self.walk_files(directory, recursive)
+        return (filepath for filepath in files
+                if not self.is_sidecar(filepath))
+
+    def list_directories(self, directory: str,
+                         recursive: bool) -> Iterator[str]:
+        """
+        Getting sub directories from directory, using the snapshot when
+        it covers the directory, or walking inside archives with
+        BrowseArchives
+
+        Args:
+            directory(str): Directory path
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Directory paths
+        """
+        filesystem = self.archive_filesystem
+        if filesystem:
+            return filesystem.walk_directories(directory, recursive)
+        if self._snapshot and self._snapshot.contains(directory):
+            return self._snapshot.directories(directory, recursive)
+        return self.walk_directories(directory, recursive)
+
+    @staticmethod
+    def _run_item(function: Callable[[Any], Any], item: Any) -> ItemResult:
+        """
+        Running function on item in current process
+        """
+        try:
+            return ItemResult(item=item, value=function(item), error="")
+        except Exception as exc:  # pylint: disable=broad-except
+            return ItemResult(item=item, value=None, error=repr(exc))
+
+    @staticmethod
+    def _collect_results(pending: Dict[futures.Future, Any],
+                         return_when: str) -> Iterator[ItemResult]:
+        """
+        Waits for pending futures and yields their results
+        """
+        done, _ = futures.wait(list(pending), return_when=return_when)
+        for future in done:
+            item = pending.pop(future)
+            try:
+                yield ItemResult(item=item, value=future.result(), error="")
+            except Exception as exc:  # pylint: disable=broad-except
+                yield ItemResult(item=item, value=None, error=repr(exc))
+
+    def _run_items_in_pool(self, function: Callable[[Any], Any],
+                           items: Iterable[Any],
+                           workers: int) -> Iterator[ItemResult]:
+        """
+        Fans items out to a thread or process pool, keeping a bounded
+        number of items in flight
+        """
+        pool_class: Any = futures.ThreadPoolExecutor
+        if self.executor_instruction == "process":
+            pool_class = futures.ProcessPoolExecutor
+
+        with pool_class(max_workers=workers) as pool:
+            pending: Dict[futures.Future, Any] = {}
+            for item in items:
+                pending[pool.submit(function, item)] = item
+                if len(pending) >= workers * 2:
+                    yield from self._collect_results(pending,
+                                                     futures.FIRST_COMPLETED)
+            while pending:
+                yield from self._collect_results(pending,
+                                                 futures.ALL_COMPLETED)
+
+    def run_items(self, function: Callable[[Any], Any],
+                  items: Iterable[Any],
+                  workers: Optional[int] = None) -> Iterator[ItemResult]:
+        """
+        Running function on every item, concurrently when instructions
+        asks for more than one worker. Results are yielded as items
+        complete, failed items is also kept in failed_items.
+
+        Function and items must be picklable with Executor=process
+
+        Args:
+            function(Callable): Work to do on a single item
+            items(Iterable): Items to work on
+            workers(int): Workers to use instead of Workers instruction
+
+        Returns:
+            Iterator[ItemResult]: Result of each item
+        """
+        if workers is None:
+            workers = self.workers_instruction
+        if workers > 1:
+            results = self._run_items_in_pool(function, items, workers)
+        else:
+            results = (self._run_item(function, item) for item in items)
+
+        for result in results:
+            if result.error:
+                logging.warning(f"Failed processing '{result.item}' "
+                                f"{result.error}")
+                self.failed_items.append(result)
+            yield result
+
+    def _open_manifest(self) -> None:
+        """
+        Loads manifest from workfolder when running incremental
+        """
+        self._manifest = None
+        if self._workfolder and self.incremental_instruction:
+            self._manifest = FileManifest(self._workfolder)
+            self._manifest.load()
+
+    def _close_manifest(self) -> None:
+        """
+        Saves manifest to workfolder when running incremental
+        """
+        if self._manifest:
+            self._manifest.save()
+            self._manifest = None
+
+    def _needs_processing(self, filepath: str) -> bool:
+        """
+        Checks file is new or changed since this operation processed it,
+        always True when not running incremental
+        """
+        if self._manifest:
+            return self._manifest.needs_processing(filepath,
+                                                   self.operation_key)
+        return True
+
+    def _track_file_processed(self, filepath: str) -> None:
+        """
+        Records the operation processed a file
+        """
+        if self._manifest:
+            self._manifest.record(filepath, self.operation_key)
+
+    def _track_file_added(self, filepath: str) -> None:
+        """
+        Records a file created or modified by the operation
+        """
+        if self._snapshot:
+            self._snapshot.add_file(filepath)
+
+    def _track_file_removed(self, filepath: str) -> None:
+        """
+        Records a file deleted by the operation
+        """
+        if self._snapshot:
+            self._snapshot.remove_file(filepath)
+        if self._manifest:
+            self._manifest.remove(filepath)
+
+    def _track_file_renamed(self, old_filepath: str,
+                            new_filepath: str) -> None:
+        """
+        Records a file renamed by the operation
+        """
+        if self._snapshot:
+            self._snapshot.rename_file(old_filepath, new_filepath)
+        if self._manifest:
+            self._manifest.rename(old_filepath, new_filepath)
+
+    def _track_directory_added(self, directory: str) -> None:
+        """
+        Records a directory tree created by the operation
+        """
+        if self._snapshot:
+            self._snapshot.add_directory(directory)
+
+    def begin_stream(self) -> bool:
+        """
+        Prepares operation for having files pushed through process_file
+        by a pipeline, instructions are read once here
+
+        Returns:
+            bool: Operation can run
+        """
+        self._stream_directory = self.make_directory_path(
+            self.directory_instruction)
+        self._stream_recursive = self.recursive_instruction
+        return bool(self._stream_directory)
+
+    def accepts_file(self, filepath: str) -> bool:
+        """
+        Checks if a file pushed by a pipeline is handled by the operation,
+        files not accepted are passed on untouched
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is inside the operations directory
+        """
+        directory = Path(self._stream_directory)
+        parent = Path(filepath).parent
+        if self._stream_recursive:
+            return parent == directory or directory in parent.parents
+        return parent == directory
+
+    def process_file(self, filepath: str) -> List[str]:
+        """
+        Processing a single file pushed by a pipeline, passes the file on
+        untouched unless overridden
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: Files to pass on to the next operation
+        """
+        return [filepath]
+
+    def end_stream(self) -> List[str]:
+        """
+        Finishing after every file is pushed by a pipeline
+
+        Returns:
+            list: Files held back by the operation to pass on
+        """
         return []
 
     @abc.abstractmethod
@@ -0,0 +1,162 @@
+"""
+Module contains removal of lines repeated at the boundary of adjacent
+files, like rotated logs copied some time before they were truncated
+"""
+from typing import IO, Iterator, List
+
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASE = 1000003
+
+
+def find_overlap(tail: List[bytes], head: List[bytes],
+                 min_lines: int = 1) -> int:
+    """
+    Finds the longest run of lines starting head that ends tail. Rolling
+    hashes of the first lines of head and the last lines of tail are
+    compared for every length, and matching lengths are verified line
+    by line, longest first.
+
+    Args:
+        tail(list): Last lines of the previous file
+        head(list): First lines of the next file
+        min_lines(int): Fewest lines counted as an overlap
+
+    Returns:
+        int: Lines of head repeating the end of tail, 0 if none
+    """
+    candidates = []
+    prefix = suffix = 0
+    power = 1
+    for count in range(1, min(len(tail), len(head)) + 1):
+        prefix = (prefix * HASH_BASE + hash(head[count - 1])) % HASH_MODULUS
+        suffix = (hash(tail[-count]) * power + suffix) % HASH_MODULUS
+        power = power * HASH_BASE % HASH_MODULUS
+        if count >= min_lines and prefix == suffix:
+            candidates.append(count)
+    for count in reversed(candidates):
+        if head[:count] == tail[-count:]:
+            return count
+    return 0
+
+
+def _split_lines(data: bytes) -> List[bytes]:
+    """
+    Splits data after every newline, keeping the newlines
+    """
+    parts = data.split(b"\n")
+    lines = [part + b"\n" for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def _read_up_to(source: IO[bytes], size: int) -> bytes:
+    """
+    Reads size bytes, less only when source ends
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = source.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+class OverlapFilter:  # pylint: disable=R0903
+    """
+    Streams sources one after another, dropping lines at the start of a
+    source which repeat the end of the source before it.
+
+    Only window bytes of the end of the previous source and of the start
+    of the current source are held in memory, an overlap longer than
+    window is kept. Empty sources are skipped.
+    """
+
+    def __init__(self, window: int, min_lines: int = 1,
+                 ensure_newline: bool = True):
+        """
+        Args:
+            window(int): Bytes compared at each boundary
+            min_lines(int): Fewest repeated lines dropped
+            ensure_newline(bool): Write a newline after a source not
+                                  ending with one
+        """
+        self._window = max(1, window)
+        self._min_lines = max(1, min_lines)
+        self._ensure_newline = ensure_newline
+        self._tail = bytearray()
+        self._tail_cut = False
+        self.dropped = 0
+
+    def _remember(self, data: bytes) -> None:
+        """
+        Keeps the last window bytes of the current source
+        """
+        self._tail += data
+        excess = len(self._tail) - self._window
+        if excess > 0:
+            del self._tail[:excess]
+            self._tail_cut = True
+
+    def _tail_lines(self) -> List[bytes]:
+        """
+        Get whole lines at the end of the previous source
+        """
+        data = bytes(self._tail)
+        if self._tail_cut:
+            data = data[data.find(b"\n") + 1:] if b"\n" in data else b""
+        return _split_lines(data)
+
+    def _head_lines(self, head: bytes) -> List[bytes]:
+        """
+        Get whole lines at the start of the current source, a last line
+        of a source shorter than window is whole too
+        """
+        lines = _split_lines(head)
+        if not lines or lines[-1].endswith(b"\n"):
+            return lines
+        if len(head) >= self._window:
+            return lines[:-1]
+        if self._ensure_newline:
+            lines[-1] += b"\n"
+        return lines
+
+    def filter(self, source: IO[bytes], buffer_size: int) -> Iterator[bytes]:
+        """
+        Streams source without the lines repeating the end of the source
+        before it
+
+        Args:
+            source(IO): Stream to read
+            buffer_size(int): Bytes read at a time after window
+
+        Returns:
+            Iterator[bytes]: Data to write
+        """
+        head = _read_up_to(source, self._window)
+        if not head:
+            return
+        lines = self._head_lines(head)
+        count = find_overlap(self._tail_lines(), lines, self._min_lines)
+        self.dropped += count
+        skip = min(sum(len(line) for line in lines[:count]), len(head))
+
+        self._tail = bytearray()
+        self._tail_cut = False
+        self._remember(head)
+        last = b""
+        if skip < len(head):
+            yield head[skip:]
+            last = head[-1:]
+
+        block = source.read(max(1, buffer_size))
+        while block:
+            self._remember(block)
+            yield block
+            last = block[-1:]
+            block = source.read(max(1, buffer_size))
+
+        if self._ensure_newline and last and last != b"\n":
+            self._remember(b"\n")
+            yield b"\n"
@@ -0,0 +1,114 @@
+"""
+Module contains a runner pushing files through a chain of file operations
+in a single pass
+"""
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+from logfile.operations.operation_base import OperationBase
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+
+# pylint: disable=W1203
+
+PipelineStep = Tuple[Type[OperationBase], Dict[str, str]]
+
+
+class PipelineRunner:
+    """
+    Runs a chain of file operations in a single pass over the workfolder.
+
+    The workfolder is walked once and every file is pushed through each
+    operation accepting it, files produced by an operation goes straight
+    on to the next one. Operations holding files back, like MergeFiles,
+    passes them on when every file is pushed.
+
+    Pipeline is an ordered list of operation classes and instructions:
+        [(UnzipFiles, {"Recursive": "True"}),
+         (ConvertFiles, {"Recursive": "True"}),
+         (MergeFiles, {"RegexExpression": "messages", "OutputName": "out"})]
+    """
+
+    def __init__(self, workfolder: str, pipeline: List[PipelineStep],
+                 snapshot: Optional[WorkfolderSnapshot] = None):
+        """
+        Args:
+            workfolder(str): Workfolder to run pipeline on
+            pipeline(list): Operation classes and instructions to run
+            snapshot(WorkfolderSnapshot): Snapshot to walk instead of
+                                          the file system
+        """
+        self._workfolder = workfolder
+        self._snapshot = snapshot
+        self._operations = [
+            operation_class(workfolder, instructions, snapshot)
+            for operation_class, instructions in pipeline or []
+        ]
+        self._active: List[bool] = []
+        self._files_affected: List[int] = []
+
+    def _workfolder_files(self) -> Iterator[str]:
+        """
+        Walks workfolder once, from snapshot if given
+        """
+        if self._snapshot and self._snapshot.contains(self._workfolder):
+            files = self._snapshot.files(self._workfolder, True)
+        else:
+            files = OperationBase.walk_files(self._workfolder, True)
+        return (filepath for filepath in files
+                if not OperationBase.is_sidecar(filepath))
+
+    def _push(self, filepath: str, first_index: int) -> None:
+        """
+        Pushing file through operations starting at first_index
+
+        Args:
+            filepath(str): Filepath
+            first_index(int): Index of first operation to push file to
+        """
+        pending = [(filepath, first_index)]
+        while pending:
+            current, index = pending.pop()
+            while index < len(self._operations):
+                operation = self._operations[index]
+                index += 1
+                if self._active[index - 1] and \
+                   operation.accepts_file(current):
+                    self._files_affected[index - 1] += 1
+                    produced = operation.process_file(current)
+                    pending.extend((produced_file, index)
+                                   for produced_file in reversed(produced))
+                    break
+
+    def run(self) -> bool:
+        """
+        Running pipeline over workfolder
+
+        Returns:
+            bool: Every operation affected files
+        """
+        if not self._workfolder or not self._operations:
+            logging.warning("Pipeline has no workfolder or operations")
+            return False
+
+        self._active = [operation.begin_stream()
+                        for operation in self._operations]
+        self._files_affected = [0] * len(self._operations)
+
+        for filepath in self._workfolder_files():
+            self._push(filepath, 0)
+
+        for index, operation in enumerate(self._operations):
+            if self._active[index]:
+                for released in operation.end_stream():
+                    self._push(released, index + 1)
+
+        success = True
+        for index, operation in enumerate(self._operations):
+            name = operation.__class__.__name__
+            if self._active[index] and self._files_affected[index]:
+                logging.info(f"'{name}' processed "
+                             f"{self._files_affected[index]} files")
+            else:
+                logging.warning(f"'{name}'Execution Failed. "
+                                f"No files affected")
+                success = False
+        return success
@@ -0,0 +1,259 @@
+"""
+Module contains incremental tail merging, appending only data added to
+sources since the last merge into an output
+"""
+import os
+import json
+import hashlib
+import logging
+from typing import IO, Callable, Dict, List, NamedTuple, Optional, Set, \
+    Tuple
+from logfile.operations.file_concat import write_all
+
+# pylint: disable=W1203
+
+HEAD_SIZE = 4096
+NO_INODE = (-1, -1)
+
+
+class SourceState(NamedTuple):
+    """
+    How much of a source is merged. The source is identified by device
+    and inode, which survive renames by log rotation, and by a hash of its
+    first head_size bytes, which survives copies.
+    """
+    path: str
+    device: int
+    inode: int
+    offset: int
+    head_size: int
+    head: str
+
+    def head_matches(self, head: bytes) -> bool:
+        """
+        Checks source starts like it did when merged
+
+        Args:
+            head(bytes): First bytes of source, up to HEAD_SIZE
+
+        Returns:
+            bool: Source starts with the same bytes
+        """
+        return len(head) >= self.head_size and \
+            _hash(head[:self.head_size]) == self.head
+
+
+class TailSource(NamedTuple):
+    """
+    Where merging a source continues
+    """
+    path: str
+    identity: Tuple[int, int]
+    head: bytes
+    offset: int
+    rotated: bool
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class TailState:
+    """
+    State of a tail merged output, saved as json next to the output.
+
+    A source found at the same inode and starting with the same bytes
+    continues at its offset, at another path it is rotated. A source at
+    a new inode starting with the bytes of a merged source, like a copy
+    made by copytruncate, continues at the offset of that source and is
+    rotated too. A source at the same inode not starting with the same
+    bytes or shorter than its offset is truncated and merged from the
+    start. Everything else is new. Files inside archives have no inode
+    and are found by their first bytes only.
+    """
+    SUFFIX = ".tail.json"
+    VERSION = 1
+
+    def __init__(self, sources: Optional[List[SourceState]] = None):
+        """
+        Args:
+            sources(list): State of every source merged
+        """
+        self.sources = sources or []
+
+    @staticmethod
+    def sidecar_path(output_path: str) -> str:
+        """
+        Get path state of output is saved to
+
+        Args:
+            output_path(str): Merged output path
+
+        Returns:
+            str: State path
+        """
+        return output_path + TailState.SUFFIX
+
+    @staticmethod
+    def load(output_path: str) -> "TailState":
+        """
+        Loads state of output, empty when missing, unreadable or when
+        the output changed since the state was saved
+
+        Args:
+            output_path(str): Merged output path
+
+        Returns:
+            TailState: State of output
+        """
+        try:
+            with open(TailState.sidecar_path(output_path),
+                      encoding="utf-8") as handle:
+                data = json.load(handle)
+            if data.get("version") != TailState.VERSION or \
+                    data.get("output_size") != os.path.getsize(output_path):
+                logging.info(f"Output changed since tail merge "
+                             f"'{output_path}'")
+                return TailState()
+            return TailState([SourceState(*source)
+                              for source in data["sources"]])
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logging.debug(f"No tail state for '{output_path}' {exc}")
+        return TailState()
+
+    def save(self, output_path: str) -> bool:
+        """
+        Saves state with the current size of output
+
+        Args:
+            output_path(str): Merged output path
+
+        Returns:
+            bool: State is saved
+        """
+        path = self.sidecar_path(output_path)
+        try:
+            data = {"version": self.VERSION,
+                    "output_size": os.path.getsize(output_path),
+                    "sources": [list(source) for source in self.sources]}
+            with open(path + ".tmp", "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(path + ".tmp", path)
+            return True
+        except OSError as exc:
+            logging.warning(f"Could not save tail state '{path}' {exc}")
+        return False
+
+    def resolve(self, sources: List[Tuple[str, Tuple[int, int], bytes]]
+                ) -> List[TailSource]:
+        """
+        Finds where merging each source continues, every saved state is
+        used by one source at most
+
+        Args:
+            sources(list): Path, device and inode, and first bytes of
+                           every source in merge order
+
+        Returns:
+            list: Where merging continues, in order of sources
+        """
+        claimed: Set[int] = set()
+        found: Dict[int, TailSource] = {}
+        by_inode = {(state.device, state.inode): index
+                    for index, state in enumerate(self.sources)
+                    if (state.device, state.inode) != NO_INODE}
+
+        for position, (path, identity, head) in enumerate(sources):
+            index = by_inode.get(identity, -1) \
+                if identity != NO_INODE else -1
+            if index >= 0 and self.sources[index].head_matches(head):
+                state = self.sources[index]
+                claimed.add(index)
+                found[position] = TailSource(path, identity, head,
+                                             state.offset, state.path != path)
+
+        for position, (path, identity, head) in enumerate(sources):
+            if position in found:
+                continue
+            for index, state in enumerate(self.sources):
+                if index not in claimed and state.head_size and \
+                        state.head_matches(head) and \
+                        (identity == NO_INODE or
+                         (state.device, state.inode) != identity):
+                    claimed.add(index)
+                    found[position] = TailSource(
+                        path, identity, head, state.offset,
+                        identity != NO_INODE or state.path != path)
+                    break
+            else:
+                found[position] = TailSource(path, identity, head, 0, False)
+
+        return [found[position] for position in range(len(sources))]
+
+
+def _skip(handle: IO[bytes], count: int) -> bool:
+    """
+    Moves count bytes forward, False when source ends before
+    """
+    if handle.seekable():
+        position = handle.tell()
+        if handle.seek(0, os.SEEK_END) < position + count:
+            return False
+        handle.seek(position + count)
+        return True
+    while count > 0:
+        data = handle.read(min(count, 1024 * 1024))
+        if not data:
+            return False
+        count -= len(data)
+    return True
+
+
+def merge_tail(target: IO[bytes], source: TailSource,
+               open_source: Callable[[str], IO[bytes]], buffer_size: int,
+               ensure_newline: bool) -> SourceState:
+    """
+    Appends data of source after its offset to target. A last line
+    without newline is held back until it is completed, unless source is
+    rotated and does not grow anymore. A source ending before its offset
+    is truncated and appended from the start.
+
+    Args:
+        target(IO): Stream to write
+        source(TailSource): Source and where merging continues
+        open_source(Callable): Opens a source path for binary reading
+        buffer_size(int): Bytes read at a time
+        ensure_newline(bool): Write a newline after the last line of a
+                              rotated source not ending with one
+
+    Returns:
+        SourceState: State of source to save
+    """
+    offset = source.offset
+    with open_source(source.path) as handle:
+        head = handle.read(HEAD_SIZE)
+        if offset > len(head) and not _skip(handle, offset - len(head)):
+            logging.info(f"Source truncated since tail merge "
+                         f"'{source.path}'")
+            return merge_tail(target, source._replace(offset=0),
+                              open_source, buffer_size, ensure_newline)
+
+        hold = b""
+        chunk = head[offset:]
+        while True:
+            data = hold + chunk
+            cut = data.rfind(b"\n") + 1
+            if not cut and len(data) >= buffer_size:
+                cut = len(data)
+            write_all(target, data[:cut])
+            offset += cut
+            hold = data[cut:]
+            chunk = handle.read(buffer_size)
+            if not chunk:
+                break
+
+    if hold and source.rotated:
+        write_all(target, hold + b"\n" if ensure_newline else hold)
+        offset += len(hold)
+    return SourceState(source.path, source.identity[0], source.identity[1],
+                       offset, len(head), _hash(head))
@@ -0,0 +1,108 @@
+"""
+Module contains a streaming k-way merge of log records in timestamp order
+"""
+import heapq
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, \
+    Pattern, Tuple
+
+DEFAULT_TIMESTAMP_REGEX = \
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"
+
+
+class TimestampOrder(NamedTuple):
+    """
+    Describes how timestamps are found in log lines.
+
+    The first group of regex is the timestamp, or the whole match if regex
+    has no groups. Without time_format timestamps are compared as text,
+    which orders ISO 8601 timestamps correctly. With time_format they are
+    parsed with datetime.strptime, timestamps with a timezone are compared
+    in UTC.
+    """
+    regex: Pattern[str]
+    time_format: str = ""
+
+    @property
+    def lowest(self) -> Any:
+        """
+        Get key sorting before every timestamp, used for lines before the
+        first timestamp of a file
+
+        Returns:
+            Any: Lowest key
+        """
+        return datetime.min if self.time_format else ""
+
+    def key(self, line: str) -> Optional[Any]:
+        """
+        Get sort key of line
+
+        Args:
+            line(str): Log line
+
+        Returns:
+            Any: Timestamp of line
+            None: Line has no timestamp and continues the record before it
+        """
+        match = self.regex.search(line)
+        if not match:
+            return None
+        text = match.group(1) if self.regex.groups else match.group(0)
+        if not self.time_format:
+            return text
+        try:
+            value = datetime.strptime(text, self.time_format)
+        except ValueError:
+            return None
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+def read_records(lines: Iterable[str],
+                 order: TimestampOrder) -> Iterator[Tuple[Any, str]]:
+    """
+    Groups lines into records, a record starts at a line with a timestamp
+    and holds the lines without one following it, like stack traces.
+    Only a single record is held in memory.
+
+    Args:
+        lines(Iterable[str]): Lines of a log file
+        order(TimestampOrder): Timestamp description
+
+    Returns:
+        Iterator[Tuple[Any, str]]: Sort key and text of each record, text
+                                   always ends with a newline
+    """
+    key = order.lowest
+    record: List[str] = []
+    for line in lines:
+        line_key = order.key(line)
+        if line_key is not None and record:
+            yield key, "".join(record)
+            record = []
+        if line_key is not None:
+            key = line_key
+        record.append(line if line.endswith("\n") else line + "\n")
+    if record:
+        yield key, "".join(record)
+
+
+def merge_records(sources: Iterable[Iterable[str]],
+                  order: TimestampOrder) -> Iterator[str]:
+    """
+    Merges records of log files sorted by time into a single stream sorted
+    by time, holding one record of each file in a heap. Records with equal
+    timestamps keep the order of sources.
+
+    Args:
+        sources(Iterable[Iterable[str]]): Lines of each log file
+        order(TimestampOrder): Timestamp description
+
+    Returns:
+        Iterator[str]: Record texts in timestamp order
+    """
+    streams = [read_records(lines, order) for lines in sources]
+    for _, text in heapq.merge(*streams, key=lambda record: record[0]):
+        yield text
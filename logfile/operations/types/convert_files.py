@@ -2,9 +2,11 @@
 Module contains file operation to convert files to new extensions
 """
 import logging
+import functools
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Optional
 from logfile.operations.operation_base import OperationBase
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
 
 # pylint: disable=W1203
 
@@ -25,8 +27,20 @@ class ConvertFiles(OperationBase):
             Exclude extensions ".txt|.exe"
         ExcludeFiles(str):
             Exclude files "messages.0|log.txt"
+        Incremental(str):
+            True skips files converted by an earlier run
+        Workers(str):
+            Number of files converted concurrently
+        Executor(str):
+            'thread' or 'process' pool used with Workers
     """
 
+    def __init__(self, workfolder: str, instructions: Dict[str, str],
+                 snapshot: Optional[WorkfolderSnapshot] = None):
+        super().__init__(workfolder, instructions, snapshot)
+        self._stream_extension = ""
+        self._stream_excludes: List[str] = []
+
     @staticmethod
     def convert_file(filepath: str, new_extension: str) -> bool:
         """
@@ -97,6 +111,60 @@ class ConvertFiles(OperationBase):
                     result.append(filepath)
         return result
 
+    def begin_stream(self) -> bool:
+        """
+        Reading instructions before files is pushed by a pipeline
+
+        Returns:
+            bool: Operation can run
+        """
+        self._stream_extension = self.new_file_extension_instruction
+        self._stream_excludes = self.exclude_files_instruction + \
+            self.exclude_extensions_instruction
+        self._open_manifest()
+        return super().begin_stream() and bool(self._stream_extension)
+
+    def accepts_file(self, filepath: str) -> bool:
+        """
+        Checks file is inside directory and not excluded
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is converted
+        """
+        return super().accepts_file(filepath) and \
+            not self.list_item_in_string(self._stream_excludes, filepath)
+
+    def process_file(self, filepath: str) -> List[str]:
+        """
+        Converting a single file pushed by a pipeline
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: Converted file
+        """
+        if self._needs_processing(filepath) and \
+           self.convert_file(filepath, self._stream_extension):
+            new_filepath = filepath + self._stream_extension
+            self._track_file_renamed(filepath, new_filepath)
+            self._track_file_processed(new_filepath)
+            return [new_filepath]
+        return [filepath]
+
+    def end_stream(self) -> List[str]:
+        """
+        Saving manifest after every file is pushed
+
+        Returns:
+            list: Nothing is held back
+        """
+        self._close_manifest()
+        return []
+
     def run(self) -> bool:
         """
         Converting files with selected instructions
@@ -111,15 +179,35 @@ class ConvertFiles(OperationBase):
         relative_file_path = self.directory_instruction
 
         directory_path = self.make_directory_path(relative_file_path)
+        self._open_manifest()
 
-        files = self.get_files(directory_path, recursive)
-        files = self.sort_files(files, exclude_files)
-        files = self.sort_files(files, exclude_ext)
+        files_affected = 0
 
-        if files != []:
-            for filepath in files:
-                self.convert_file(filepath, new_extension)
+        def files_to_convert() -> Iterator[str]:
+            nonlocal files_affected
+            for filepath in self.list_files(directory_path, recursive):
+                if self.list_item_in_string(exclude_files, filepath) or \
+                   self.list_item_in_string(exclude_ext, filepath):
+                    logging.debug(f"Skipping file to convert {filepath}")
+                    continue
+
+                files_affected += 1
+                if self._needs_processing(filepath):
+                    yield filepath
+                else:
+                    logging.debug(f"File already converted {filepath}")
+
+        convert = functools.partial(ConvertFiles.convert_file,
+                                    new_extension=new_extension)
+        for result in self.run_items(convert, files_to_convert()):
+            if result.success:
+                new_filepath = result.item + new_extension
+                self._track_file_renamed(result.item, new_filepath)
+                self._track_file_processed(new_filepath)
+
+        self._close_manifest()
 
+        if files_affected:
             self._log_run_success()
             return True
 
@@ -1,17 +1,207 @@
 """
 Module contains file operation to merge files together
 """
+import io
+import os
 import re
 import fileinput
 import logging
-from typing import Pattern, List
+import itertools
+import functools
+import contextlib
+from typing import IO, Callable, Dict, Iterator, List, NamedTuple, Optional, \
+    Pattern, Tuple
 from pathlib import Path
 from logfile.operations.operation_base import OperationBase
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+from logfile.operations.archive_filesystem import ArchiveFileSystem
+from logfile.operations.decompressors import HEADER_SIZE, detect_header, \
+    open_decompressed
+from logfile.operations.file_concat import concatenate, \
+    concatenate_compressed, open_target, write_all
+from logfile.operations.block_compressor import BlockCompressor, \
+    Compression, compression_for_name, get_compression
+from logfile.operations.timestamp_merge import TimestampOrder, \
+    merge_records
+from logfile.operations.tail_merge import HEAD_SIZE, NO_INODE, TailState, \
+    merge_tail
+from logfile.operations.overlap_dedup import OverlapFilter
+from logfile.operations.gzip_index import GzipIndex, IndexedGzipReader
 
-# pylint: disable=W1203
+# pylint: disable=W1203,C0302
 
 
-class MergeFiles(OperationBase):
+class MergePlan(NamedTuple):
+    """
+    Files to merge into a single output file
+    """
+    new_file_path: str
+    files: List[str]
+    append: bool
+    order: Optional[TimestampOrder] = None
+
+
+class BinaryMerge(NamedTuple):
+    """
+    Options for concatenating files as bytes, appending only data added
+    since the last merge when tail is set, dropping lines repeated at the
+    start of a file from the end of the file before it when
+    overlap_window is set
+    """
+    ensure_newline: bool = True
+    buffer_size: int = 1024 * 1024
+    tail: bool = False
+    overlap_window: int = 0
+    overlap_min_lines: int = 1
+
+
+class MergeOutput(NamedTuple):
+    """
+    How merged output is written, compressed in blocks on threads when
+    compression is set
+    """
+    compression: Optional[Compression] = None
+    threads: int = 1
+
+    def open_binary(self, filepath: str, append: bool) -> IO[bytes]:
+        """
+        Opens output for binary writing at its end
+
+        Args:
+            filepath(str): Output file path
+            append(bool): Keep content of output
+
+        Returns:
+            IO: Writable file, must be closed by caller
+        """
+        target = open_target(filepath, append)
+        if self.compression is None:
+            return target  # type: ignore
+        return BlockCompressor(target, self.compression,  # type: ignore
+                               self.threads)
+
+    def open_text(self, filepath: str, append: bool) -> IO[str]:
+        """
+        Opens output for text writing at its end
+
+        Args:
+            filepath(str): Output file path
+            append(bool): Keep content of output
+
+        Returns:
+            IO: Writable text file, must be closed by caller
+        """
+        if self.compression is None:
+            return open(filepath, 'a' if append else 'w')
+        return io.TextIOWrapper(self.open_binary(filepath,  # type: ignore
+                                                 append))
+
+
+class MergeInputs(NamedTuple):
+    """
+    How files to merge are opened, inside archives with filesystem and
+    decompressed when decompress is set. A gzip file with a current index
+    sidecar is read through its checkpoints, so a tail merge continuing
+    deep inside it only decompresses from the checkpoint before its offset
+    """
+    filesystem: Optional[ArchiveFileSystem] = None
+    decompress: bool = False
+
+    def open(self, filepath: str) -> IO[bytes]:
+        """
+        Opens file for binary reading, real files are unbuffered
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            IO: Readable file, must be closed by caller
+        """
+        if self.filesystem and self.filesystem.is_virtual(filepath):
+            handle = self.filesystem.open(filepath)
+        else:
+            index = GzipIndex.load(filepath) if self.decompress else None
+            if index is not None:
+                return io.BufferedReader(IndexedGzipReader(filepath, index))
+            # Ownership passes to the caller, who closes the returned file
+            handle = open(filepath, 'rb',  # pylint: disable=R1732
+                          buffering=0)
+        if not self.decompress:
+            return handle
+        try:
+            return open_decompressed(handle)
+        except OSError:
+            handle.close()
+            raise
+
+    def open_text(self, filepath: str, encoding: Optional[str] = None,
+                  errors: Optional[str] = None) -> IO[str]:
+        """
+        Opens file for text reading
+
+        Args:
+            filepath(str): Filepath
+            encoding(str): Text encoding, locale encoding if None
+            errors(str): How encoding errors are handled
+
+        Returns:
+            IO: Readable text file, must be closed by caller
+        """
+        handle = self.open(filepath)
+        if isinstance(handle, io.FileIO):
+            handle = io.BufferedReader(handle)  # type: ignore
+        return io.TextIOWrapper(handle,  # type: ignore
+                                encoding=encoding, errors=errors)
+
+    def open_hook(self, filename: str, mode: str,
+                  encoding: Optional[str] = None,
+                  errors: Optional[str] = None) -> IO:
+        """
+        Open hook for fileinput
+
+        Args:
+            filename(str): Filepath
+            mode(str): 'r' or 'rb'
+            encoding(str): Text encoding
+            errors(str): How encoding errors are handled
+
+        Returns:
+            IO: Readable file
+        """
+        if "b" in mode:
+            return self.open(filename)
+        return self.open_text(filename, encoding, errors)
+
+    def identity(self, filepath: str) -> Tuple[int, int]:
+        """
+        Get device and inode of file
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            tuple: Device and inode, NO_INODE for files inside archives
+        """
+        if self.filesystem and self.filesystem.is_virtual(filepath):
+            return NO_INODE
+        stat = os.stat(filepath)
+        return stat.st_dev, stat.st_ino
+
+    def read_head(self, filepath: str) -> bytes:
+        """
+        Reads first bytes of file
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bytes: Up to HEAD_SIZE first bytes
+        """
+        with self.open(filepath) as handle:
+            return handle.read(HEAD_SIZE)
+
+
+class MergeFiles(OperationBase):  # pylint: disable=R0902,R0904
     """
     This class is responseable for merging files together with regex
 
@@ -25,7 +215,8 @@ class MergeFiles(OperationBase):
             File name for merged file example: 'out.txt'
         Regex(str):
             Regex expression to match filepaths with
-            For sorting first group must be int
+            For sorting first group should be int, files without the
+            group sort before numbered files like logrotate names them
         Delete:
             Delete old files after merge
         SortType:
@@ -33,9 +224,319 @@ class MergeFiles(OperationBase):
                 Sorts file with regex group 1 to combined result high to low
             LowHigh:
                 Sorts file with regex group 1 to combined result low to high
+            Timestamp:
+                Merges lines of all files in timestamp order, files must
+                be sorted by time. Lines without a timestamp belong to
+                the line before them
             None:
                 Do not sort files
+        TimestampRegex:
+            Regex finding timestamp in lines for SortType Timestamp,
+            first group is used if regex has groups.
+            Default is ISO 8601 like '2024-10-17 12:00:00.123'
+        TimestampFormat:
+            strptime format parsing timestamp, like '%b %d %H:%M:%S'.
+            Timestamps are compared as text if not set
+        BinaryMerge:
+            True concatenates files as bytes without decoding them,
+            copied inside the kernel where possible. Not used with
+            SortType Timestamp
+        EnsureNewline:
+            With BinaryMerge, True writes a newline after a file not
+            ending with one. Default True
+        BufferSize:
+            Bytes copied at a time when the kernel can not copy files
+        Decompress:
+            True reads gz, bz2, xz and zstd files decompressed, detected
+            from their first bytes, so rotated logs like 'messages.2.gz'
+            are merged without extracting them first
+        Incremental:
+            True only merges again when matched files are new or changed.
+            With Delete new files are appended to the earlier output
+        Workers:
+            Number of directories merged concurrently
+        Executor:
+            'thread' or 'process' pool used with Workers
+        BrowseArchives:
+            True merges files inside archives without extracting them.
+            Output of a directory inside an archive is written to the
+            directory extracting the archive would create
+        OutputCompression:
+            'gz', 'xz' or 'zstd' compresses the output, 'None' writes it
+            plain. Default is taken from the OutputName extension
+        CompressionThreads:
+            Blocks of output compressed at the same time.
+            Default is the number of CPUs
+        TailMerge:
+            True appends only data added to files since the last merge,
+            for directories where the newest file grows. Not used with
+            SortType Timestamp
+        DeduplicateOverlap:
+            True drops lines at the start of a file repeating the end of
+            the file merged before it, like logs rotated by copying.
+            Not used with SortType Timestamp or TailMerge
+        OverlapWindow:
+            Bytes at the end and start of adjacent files compared with
+            DeduplicateOverlap. Default 4194304
+        OverlapMinLines:
+            Fewest repeated lines dropped with DeduplicateOverlap.
+            Default 1
+
+    Compressed output is written as independently compressed blocks,
+    gzip members, xz streams or zstd frames, which decompress to the
+    concatenated data. Files already compressed in the output format are
+    appended as they are, other files are compressed. Nothing is
+    decompressed and compressed again, unless SortType is Timestamp.
+
+    With TailMerge the merged offset, inode and first bytes of every file
+    are saved next to the output in 'OutputName.tail.json'. A file renamed
+    by rotation continues where it was merged, a copy made by copytruncate
+    too, and a truncated file is merged again from its start. The last
+    line of a file is held back until it ends with a newline or the file
+    is rotated. The output is written again when it changed since the
+    last merge.
     """
+    READS_ARCHIVES = True
+
+    def __init__(self, workfolder: str, instructions: Dict[str, str],
+                 snapshot: Optional[WorkfolderSnapshot] = None):
+        super().__init__(workfolder, instructions, snapshot)
+        self._stream_regex: Optional[Pattern[str]] = None
+        self._stream_output_name = ""
+        self._stream_sort_type = "None"
+        self._stream_delete = False
+        self._stream_pending: Dict[str, List[str]] = {}
+        self._stream_order: Optional[TimestampOrder] = None
+        self._stream_binary: Optional[BinaryMerge] = None
+        self._stream_inputs = MergeInputs()
+        self._stream_output = MergeOutput()
+
+    @property
+    def binary_merge_instruction(self) -> bool:
+        """
+        Get binary merge instruction from instructions
+
+        Returns:
+            bool: Concatenate files as bytes
+
+        Default value: False
+        """
+        key = "BinaryMerge"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def ensure_newline_instruction(self) -> bool:
+        """
+        Get ensure newline instruction from instructions
+
+        Returns:
+            bool: Write a newline after files not ending with one
+
+        Default value: True
+        """
+        key = "EnsureNewline"
+        val = True
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def tail_merge_instruction(self) -> bool:
+        """
+        Get tail merge instruction from instructions
+
+        Returns:
+            bool: Append only data added since the last merge
+
+        Default value: False
+        """
+        key = "TailMerge"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def deduplicate_overlap_instruction(self) -> bool:
+        """
+        Get deduplicate overlap instruction from instructions
+
+        Returns:
+            bool: Drop lines repeated at the boundary of adjacent files
+
+        Default value: False
+        """
+        key = "DeduplicateOverlap"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def overlap_window_instruction(self) -> int:
+        """
+        Get overlap window from instructions
+
+        Returns:
+            int: Bytes compared at the boundary of adjacent files
+
+        Default value: 4194304
+        """
+        return max(1, self._get_int_instruction("OverlapWindow",
+                                                4 * 1024 * 1024))
+
+    @property
+    def overlap_min_lines_instruction(self) -> int:
+        """
+        Get overlap min lines from instructions
+
+        Returns:
+            int: Fewest repeated lines dropped
+
+        Default value: 1
+        """
+        return max(1, self._get_int_instruction("OverlapMinLines", 1))
+
+    @property
+    def decompress_instruction(self) -> bool:
+        """
+        Get decompress instruction from instructions
+
+        Returns:
+            bool: Read compressed files decompressed
+
+        Default value: False
+        """
+        key = "Decompress"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def output_compression_instruction(self) -> str:
+        """
+        Get output compression from instructions
+
+        Returns:
+            str: 'gz', 'xz', 'zstd', 'None' or '' to use OutputName
+
+        Default value: ''
+        """
+        key = "OutputCompression"
+        val = ""
+        if key in self._instructions:
+            val = self._instructions[key]
+        self._log_instruction(key, val)
+        return val
+
+    @property
+    def compression_threads_instruction(self) -> int:
+        """
+        Get compression threads from instructions
+
+        Returns:
+            int: Blocks compressed at the same time
+
+        Default value: os.cpu_count()
+        """
+        return max(1, self._get_int_instruction("CompressionThreads",
+                                                os.cpu_count() or 1))
+
+    def _merge_output(self, output_name: str) -> MergeOutput:
+        """
+        Get how output is written
+
+        Args:
+            output_name(str): OutputName instruction
+
+        Returns:
+            MergeOutput: Output compression and threads
+        """
+        name = self.output_compression_instruction
+        if not name:
+            compression = compression_for_name(output_name)
+        elif name.lower() == "none":
+            compression = None
+        else:
+            compression = get_compression(name)
+            if compression is None:
+                logging.warning(f"Unknown output compression '{name}', "
+                                f"writing plain output")
+        if compression is None:
+            return MergeOutput()
+        return MergeOutput(compression, self.compression_threads_instruction)
+
+    def _merge_function(self, sort_type: str, output_name: str,
+                        filesystem: Optional[ArchiveFileSystem]
+                        ) -> Callable[[MergePlan], bool]:
+        """
+        Get function executing merge plans with instructions of run
+
+        Args:
+            sort_type(str): SortType instruction
+            output_name(str): OutputName instruction
+            filesystem(ArchiveFileSystem): Read files inside archives
+
+        Returns:
+            Callable: Picklable function merging a plan
+        """
+        output = self._merge_output(output_name)
+        return functools.partial(
+            MergeFiles.execute_merge_plan,
+            inputs=MergeInputs(filesystem, self.decompress_instruction),
+            binary=self._binary_merge(sort_type, output),
+            output=output)
+
+    def _binary_merge(self, sort_type: str,
+                      output: MergeOutput) -> Optional[BinaryMerge]:
+        """
+        Get options for concatenating files as bytes, compressed output,
+        tail merges and overlap deduplication always concatenate as bytes
+
+        Args:
+            sort_type(str): SortType instruction
+            output(MergeOutput): How output is written
+
+        Returns:
+            BinaryMerge: Options for binary merge
+            None: Files are merged as text
+        """
+        if sort_type == "Timestamp":
+            return None
+        tail = self.tail_merge_instruction
+        deduplicate = self.deduplicate_overlap_instruction
+        if not (tail or deduplicate or self.binary_merge_instruction or
+                output.compression):
+            return None
+        window = self.overlap_window_instruction if deduplicate else 0
+        return BinaryMerge(self.ensure_newline_instruction,
+                           self.buffer_size_instruction, tail, window,
+                           self.overlap_min_lines_instruction)
+
+    def _timestamp_order(self, sort_type: str) -> Optional[TimestampOrder]:
+        """
+        Get timestamp description when merging in timestamp order
+
+        Args:
+            sort_type(str): SortType instruction
+
+        Returns:
+            TimestampOrder: Timestamp description
+            None: Files are concatenated
+        """
+        if sort_type != "Timestamp":
+            return None
+        return TimestampOrder(re.compile(self.timestamp_regex_instruction),
+                              self.timestamp_format_instruction)
 
     @staticmethod
     def match_files_with_regex(files: List[str],
@@ -61,7 +562,10 @@ class MergeFiles(OperationBase):
     @staticmethod
     def sort_files(files: List[str], regex: Pattern[str]) -> List[str]:
         """
-        Sorting files using first group item in regex match
+        Sorting files using first group item in regex match. Numbers are
+        compared as numbers, so 'messages.10' follows 'messages.9', and
+        files without the group sort first like a logrotate 'messages'.
+        Groups that are not numbers sort last as text.
 
         Args:
             files(list): Files to order
@@ -71,36 +575,256 @@ class MergeFiles(OperationBase):
             list: Sorted list
         """
         if files and regex:
-            def regex_sort(line):
+            def regex_sort(line: str) -> Tuple[int, int, str]:
                 match = regex.search(line)
-                if match:
-                    return match.groups()[0]
-                return 0
+                group = match.group(1) if match and regex.groups else None
+                if not group:
+                    return (0, 0, "")
+                if group.isdigit():
+                    return (1, int(group), "")
+                return (2, 0, group)
             files.sort(key=regex_sort)
         return files
 
     @staticmethod
-    def merge_files(new_file_path: str, files: List[str]) -> bool:
+    def merge_files(new_file_path: str, files: List[str],
+                    append: bool = False,
+                    inputs: Optional[MergeInputs] = None) -> bool:
         """
         Merging files together with that order arg files is in
 
         Args:
             new_file_path(str): Output file path for new file
             files(list): Files to merge
+            append(bool): Append to output file instead of replacing it
+            inputs(MergeInputs): How files are opened, plain files if None
 
         Returns:
             bool: Files is merged
         """
         if new_file_path and files:
+            openhook = inputs.open_hook if inputs else None
             try:
-                with open(new_file_path, 'w') as outfile:
-                    for line in fileinput.input(files):
+                MergeFiles._make_output_directory(new_file_path, inputs)
+                with open(new_file_path, 'a' if append else 'w') as outfile:
+                    for line in fileinput.input(
+                            files, openhook=openhook):  # type: ignore
                         outfile.write(line + "\n")
                 return True
             except OSError as exc:
                 logging.error(f"Could not merge files '{exc}'")
         return False
 
+    @staticmethod
+    def merge_files_by_timestamp(  # pylint: disable=R0913
+            new_file_path: str, files: List[str], order: TimestampOrder,
+            append: bool = False, inputs: Optional[MergeInputs] = None,
+            *, output: MergeOutput = MergeOutput()) -> bool:
+        """
+        Merging lines of files in timestamp order, every file is read at
+        the same time and must be sorted by time
+
+        Args:
+            new_file_path(str): Output file path for new file
+            files(list): Files to merge
+            order(TimestampOrder): Timestamp description
+            append(bool): Append to output file instead of replacing it
+            inputs(MergeInputs): How files are opened, plain files if None
+            output(MergeOutput): How output is written
+
+        Returns:
+            bool: Files is merged
+        """
+        inputs = inputs or MergeInputs()
+        if new_file_path and files:
+            try:
+                MergeFiles._make_output_directory(new_file_path, inputs)
+                with contextlib.ExitStack() as stack:
+                    sources = [stack.enter_context(inputs.open_text(path))
+                               for path in files]
+                    with output.open_text(new_file_path, append) as outfile:
+                        outfile.writelines(merge_records(sources, order))
+                return True
+            except OSError as exc:
+                logging.error(f"Could not merge files '{exc}'")
+        return False
+
+    @staticmethod
+    def merge_files_binary(new_file_path: str, files: List[str],
+                           append: bool = False,
+                           binary: BinaryMerge = BinaryMerge(),
+                           inputs: Optional[MergeInputs] = None) -> bool:
+        """
+        Merging files as bytes in the order of files, without decoding
+
+        Args:
+            new_file_path(str): Output file path for new file
+            files(list): Files to merge
+            append(bool): Append to output file instead of replacing it
+            binary(BinaryMerge): Options for binary merge
+            inputs(MergeInputs): How files are opened, plain files if None
+
+        Returns:
+            bool: Files is merged
+        """
+        inputs = inputs or MergeInputs()
+        if new_file_path and files:
+            try:
+                MergeFiles._make_output_directory(new_file_path, inputs)
+                with open_target(new_file_path, append) as target:
+                    concatenate(target, (inputs.open(path) for path in files),
+                                binary.buffer_size, binary.ensure_newline)
+                return True
+            except OSError as exc:
+                logging.error(f"Could not merge files '{exc}'")
+        return False
+
+    @staticmethod
+    def merge_files_compressed(  # pylint: disable=R0913
+            new_file_path: str, files: List[str], output: MergeOutput,
+            append: bool = False, *, binary: BinaryMerge = BinaryMerge(),
+            inputs: Optional[MergeInputs] = None) -> bool:
+        """
+        Merging files into a compressed file in the order of files. Files
+        compressed in the output format are appended as they are, other
+        files are compressed, and with decompress set in inputs
+        decompressed before
+
+        Args:
+            new_file_path(str): Output file path for new file
+            files(list): Files to merge
+            output(MergeOutput): Output compression, must be set
+            append(bool): Append to output file instead of replacing it
+            binary(BinaryMerge): Options for binary merge
+            inputs(MergeInputs): How files are opened, plain files if None
+
+        Returns:
+            bool: Files is merged
+        """
+        inputs = inputs or MergeInputs()
+        raw = inputs._replace(decompress=False)
+        compression = output.compression or get_compression("gz")
+
+        def sources() -> Iterator[Tuple[IO[bytes], bool]]:
+            for path in files:
+                handle = raw.open(path)
+                header = handle.read(HEADER_SIZE)
+                handle.seek(0)
+                decompressor = detect_header(header)
+                if decompressor and compression and \
+                        decompressor.name == compression.name:
+                    yield handle, True
+                elif inputs.decompress:
+                    yield open_decompressed(handle), False
+                else:
+                    yield handle, False
+
+        if new_file_path and files:
+            try:
+                MergeFiles._make_output_directory(new_file_path, inputs)
+                with open_target(new_file_path, append) as target, \
+                        BlockCompressor(target, compression,  # type: ignore
+                                        output.threads,
+                                        close_target=False) as compressor:
+                    concatenate_compressed(target, sources(), compressor,
+                                           binary.buffer_size,
+                                           binary.ensure_newline)
+                return True
+            except OSError as exc:
+                logging.error(f"Could not merge files '{exc}'")
+        return False
+
+    @staticmethod
+    def merge_files_tail(new_file_path: str, files: List[str],
+                         output: MergeOutput = MergeOutput(), *,
+                         binary: BinaryMerge = BinaryMerge(),
+                         inputs: Optional[MergeInputs] = None) -> bool:
+        """
+        Appending data added to files since the last merge in the order of
+        files, the whole files when output has no saved state
+
+        Args:
+            new_file_path(str): Output file path for new file
+            files(list): Files to merge
+            output(MergeOutput): How output is written
+            binary(BinaryMerge): Options for binary merge
+            inputs(MergeInputs): How files are opened, plain files if None
+
+        Returns:
+            bool: Files is merged
+        """
+        inputs = inputs or MergeInputs()
+        if new_file_path and files:
+            try:
+                MergeFiles._make_output_directory(new_file_path, inputs)
+                state = TailState.load(new_file_path)
+                sources = state.resolve([(path, inputs.identity(path),
+                                          inputs.read_head(path))
+                                         for path in files])
+                with output.open_binary(new_file_path,
+                                        bool(state.sources)) as target:
+                    merged = [merge_tail(target, source, inputs.open,
+                                         binary.buffer_size,
+                                         binary.ensure_newline)
+                              for source in sources]
+                TailState(merged).save(new_file_path)
+                return True
+            except OSError as exc:
+                logging.error(f"Could not merge files '{exc}'")
+        return False
+
+    @staticmethod
+    def merge_files_deduplicated(  # pylint: disable=R0913
+            new_file_path: str, files: List[str], output: MergeOutput,
+            append: bool = False, *, binary: BinaryMerge = BinaryMerge(),
+            inputs: Optional[MergeInputs] = None) -> bool:
+        """
+        Merging files as bytes in the order of files, dropping lines at
+        the start of a file repeating the end of the file before it
+
+        Args:
+            new_file_path(str): Output file path for new file
+            files(list): Files to merge
+            output(MergeOutput): How output is written
+            append(bool): Append to output file instead of replacing it
+            binary(BinaryMerge): Options for binary merge, overlap_window
+                                 must be set
+            inputs(MergeInputs): How files are opened, plain files if None
+
+        Returns:
+            bool: Files is merged
+        """
+        inputs = inputs or MergeInputs()
+        overlap = OverlapFilter(binary.overlap_window,
+                                binary.overlap_min_lines,
+                                binary.ensure_newline)
+        if new_file_path and files:
+            try:
+                MergeFiles._make_output_directory(new_file_path, inputs)
+                with output.open_binary(new_file_path, append) as target:
+                    for path in files:
+                        with inputs.open(path) as source:
+                            for data in overlap.filter(source,
+                                                       binary.buffer_size):
+                                write_all(target, data)
+                if overlap.dropped:
+                    logging.info(f"Dropped {overlap.dropped} repeated lines "
+                                 f"merging '{new_file_path}'")
+                return True
+            except OSError as exc:
+                logging.error(f"Could not merge files '{exc}'")
+        return False
+
+    @staticmethod
+    def _make_output_directory(new_file_path: str,
+                               inputs: Optional[MergeInputs]) -> None:
+        """
+        Creates directory of output file when files inside archives are
+        merged, it is where extracting the archive would write them
+        """
+        if inputs and inputs.filesystem:
+            Path(new_file_path).parent.mkdir(parents=True, exist_ok=True)
+
     @staticmethod
     def delete_files(files: List[str]) -> bool:
         """
@@ -114,14 +838,277 @@ class MergeFiles(OperationBase):
         """
         if files:
             for file_path in files:
-                try:
-                    Path(file_path).unlink()
-                except OSError as exc:
-                    logging.warning(f"""Could not delete file '{file_path}'
-                                    {exc}""")
+                MergeFiles.delete_file(file_path)
+            return True
+        return False
+
+    @staticmethod
+    def delete_file(file_path: str) -> bool:
+        """
+        Delete file
+
+        Args:
+            file_path(str): File to delete
+
+        Returns:
+            bool: File is deleted
+        """
+        try:
+            Path(file_path).unlink()
+            return True
+        except OSError as exc:
+            logging.warning(f"""Could not delete file '{file_path}'
+                            {exc}""")
+        return False
+
+    @staticmethod
+    def execute_merge_plan(plan: MergePlan,
+                           inputs: Optional[MergeInputs] = None,
+                           binary: Optional[BinaryMerge] = None,
+                           output: MergeOutput = MergeOutput()) -> bool:
+        """
+        Merging files in a merge plan
+
+        Args:
+            plan(MergePlan): Files to merge
+            inputs(MergeInputs): How files are opened, plain files if None
+            binary(BinaryMerge): Concatenate files as bytes
+            output(MergeOutput): How output is written
+
+        Returns:
+            bool: Files is merged
+        """
+        if binary and binary.tail and not plan.order:
+            return MergeFiles.merge_files_tail(
+                plan.new_file_path, plan.files, output,
+                binary=binary, inputs=inputs)
+        if binary and binary.overlap_window and not plan.order:
+            return MergeFiles.merge_files_deduplicated(
+                plan.new_file_path, plan.files, output, plan.append,
+                binary=binary, inputs=inputs)
+        if binary and not plan.order and output.compression:
+            return MergeFiles.merge_files_compressed(
+                plan.new_file_path, plan.files, output, plan.append,
+                binary=binary, inputs=inputs)
+        if binary and not plan.order:
+            return MergeFiles.merge_files_binary(
+                plan.new_file_path, plan.files, plan.append, binary, inputs)
+        if plan.order:
+            return MergeFiles.merge_files_by_timestamp(
+                plan.new_file_path, plan.files, plan.order, plan.append,
+                inputs, output=output)
+        return MergeFiles.merge_files(plan.new_file_path, plan.files,
+                                      plan.append, inputs)
+
+    def _matched_files(self, directory: str, regex: Pattern[str],
+                       sort_type: str) -> List[str]:
+        """
+        Getting files in directory matching regex in merge order
+
+        Args:
+            directory(str): Directory path
+            regex(Pattern[str]): Precompiled regex
+            sort_type(str): SortType instruction
+
+        Returns:
+            list: Files to merge
+        """
+        files = [file_path for file_path in self.list_files(directory, False)
+                 if regex.search(file_path) and
+                 not file_path.endswith(TailState.SUFFIX)]
+        return self.order_files(files, regex, sort_type)
+
+    @staticmethod
+    def order_files(files: List[str], regex: Pattern[str],
+                    sort_type: str) -> List[str]:
+        """
+        Ordering files by SortType
+
+        Args:
+            files(list): Files to order
+            regex(Pattern[str]): Precompiled regex
+            sort_type(str): SortType instruction
+
+        Returns:
+            list: Files in merge order
+        """
+        if sort_type == "LowHigh":
+            files = MergeFiles.sort_files(files, regex)
+
+        elif sort_type == "HighLow":
+            files = MergeFiles.sort_files(files, regex)
+            files.reverse()
+
+        return files
+
+    def _plan_directory_merge(self, new_file_path: str, files: List[str],
+                              delete: bool,
+                              order: Optional[TimestampOrder] = None
+                              ) -> Optional[MergePlan]:
+        """
+        Planning merge of files matched in a directory, skipping the merge
+        when running incremental and no file is new or changed
+
+        Args:
+            new_file_path(str): Output file path for new file
+            files(list): Sorted files to merge
+            delete(bool): Delete files after merge
+            order(TimestampOrder): Merge lines in timestamp order
+
+        Returns:
+            MergePlan: Files to merge
+            None: Nothing to merge
+        """
+        if not files:
+            return None
+
+        new_files = [file_path for file_path in files
+                     if self._needs_processing(file_path)]
+        output_current = Path(new_file_path).exists() and \
+            not self._needs_processing(new_file_path)
+
+        if output_current and not new_files:
+            logging.debug(f"No new files to merge into '{new_file_path}'")
+            return None
+
+        append = output_current and delete
+        return MergePlan(new_file_path=new_file_path,
+                         files=new_files if append else files,
+                         append=append, order=order)
+
+    def _finish_directory_merge(self, plan: MergePlan, merged: bool,
+                                delete: bool) -> None:
+        """
+        Recording merged files and deleting them if asked to
+
+        Args:
+            plan(MergePlan): Files merged
+            merged(bool): Merge succeeded
+            delete(bool): Delete files after merge
+        """
+        if merged:
+            self._track_file_added(plan.new_file_path)
+            self._track_file_processed(plan.new_file_path)
+            if not delete:
+                for file_path in plan.files:
+                    self._track_file_processed(file_path)
+
+        if delete:
+            self._delete_merged_files(plan.files)
+
+    def _delete_merged_files(self, files: List[str]) -> None:
+        """
+        Delete merged files and record them as removed, files inside
+        archives are never deleted
+
+        Args:
+            files(list): Files to delete
+        """
+        filesystem = self.archive_filesystem
+        for file_path in files:
+            if filesystem and filesystem.is_virtual(file_path):
+                continue
+            if self.delete_file(file_path):
+                self._track_file_removed(file_path)
+
+    def begin_stream(self) -> bool:
+        """
+        Reading instructions before files is pushed by a pipeline
+
+        Returns:
+            bool: Operation can run
+        """
+        can_run = super().begin_stream()
+        regex_string = self.regex_expression_instruction
+        self._stream_output_name = self.output_name_instruction
+        self._stream_sort_type = self.sort_type_instruction
+        self._stream_delete = self.delete_instruction
+        self._stream_order = self._timestamp_order(self._stream_sort_type)
+        self._stream_output = self._merge_output(self._stream_output_name)
+        self._stream_binary = self._binary_merge(self._stream_sort_type,
+                                                 self._stream_output)
+        self._stream_inputs = MergeInputs(
+            decompress=self.decompress_instruction)
+        self._stream_pending = {}
+
+        if can_run and regex_string and self._stream_output_name and \
+           Path(self._stream_directory).exists():
+            self._stream_regex = re.compile(regex_string)
+            self._open_manifest()
             return True
         return False
 
+    def accepts_file(self, filepath: str) -> bool:
+        """
+        Checks file is inside directory and matches regex
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is merged
+        """
+        return bool(self._stream_regex and
+                    super().accepts_file(filepath) and
+                    self._stream_regex.search(filepath) and
+                    not filepath.endswith(TailState.SUFFIX))
+
+    def process_file(self, filepath: str) -> List[str]:
+        """
+        Holding file back until every file is pushed by a pipeline
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: Nothing, file is passed on by end_stream
+        """
+        directory = str(Path(filepath).parent)
+        self._stream_pending.setdefault(directory, []).append(filepath)
+        return []
+
+    def end_stream(self) -> List[str]:
+        """
+        Merging files held back in each directory
+
+        Returns:
+            list: Merged files, and files held back if not deleted
+        """
+        if not self._stream_regex:
+            return []
+        regex = self._stream_regex
+        delete = self._stream_delete
+
+        def merge_plans() -> Iterator[MergePlan]:
+            for directory, files in self._stream_pending.items():
+                new_file_path = \
+                    (Path(directory) / self._stream_output_name).as_posix()
+                files = self.order_files(files, regex, self._stream_sort_type)
+                plan = self._plan_directory_merge(new_file_path, files,
+                                                  delete, self._stream_order)
+                if plan:
+                    yield plan
+
+        released: List[str] = []
+        merged_files = set()
+        merge = functools.partial(MergeFiles.execute_merge_plan,
+                                  inputs=self._stream_inputs,
+                                  binary=self._stream_binary,
+                                  output=self._stream_output)
+        for result in self.run_items(merge, merge_plans()):
+            self._finish_directory_merge(result.item, result.success, delete)
+            merged_files.update(result.item.files)
+            if result.success:
+                released.append(result.item.new_file_path)
+
+        for files in self._stream_pending.values():
+            released.extend(file_path for file_path in files
+                            if not delete or file_path not in merged_files)
+
+        self._stream_pending = {}
+        self._close_manifest()
+        return released
+
     def run(self) -> bool:
         """
         Running mergefiles operation with given instructions
@@ -133,38 +1120,42 @@ class MergeFiles(OperationBase):
         delete = self.delete_instruction
         sort_type = self.sort_type_instruction
 
+        filesystem = self.archive_filesystem
+        exists = filesystem.exists if filesystem else os.path.exists
+
         if regex_string and \
            output_name and \
            directory_path and \
-           Path(directory_path).exists():
+           exists(directory_path):
 
             regex = re.compile(regex_string)
+            order = self._timestamp_order(sort_type)
+            self._open_manifest()
 
-            directories = None
+            directories = iter([directory_path])
             if recursive:
-                directories = self.get_directories(directory_path, recursive)
-                directories.append(directory_path)
-            else:
-                directories = [directory_path]
-            for path in directories:
-                files = self.get_files(path, False)
-
-                files_to_merge = self.match_files_with_regex(files, regex)
-
-                if files_to_merge:
-                    if sort_type == "LowHigh":
-                        files_to_merge = self.sort_files(files_to_merge, regex)
-
-                    elif sort_type == "HighLow":
-                        files_to_merge = self.sort_files(files_to_merge, regex)
-                        files_to_merge.reverse()
+                directories = itertools.chain(
+                    self.list_directories(directory_path, recursive),
+                    directories)
 
-                    new_file_path = (Path(path) / output_name).as_posix()
-                    self.merge_files(new_file_path, files_to_merge)
+            def merge_plans() -> Iterator[MergePlan]:
+                for path in directories:
+                    output_directory = filesystem.real_directory(path) \
+                        if filesystem else path
+                    new_file_path = \
+                        (Path(output_directory) / output_name).as_posix()
+                    files = self._matched_files(path, regex, sort_type)
+                    plan = self._plan_directory_merge(new_file_path, files,
+                                                      delete, order)
+                    if plan:
+                        yield plan
 
-                    if delete:
-                        self.delete_files(files_to_merge)
+            merge = self._merge_function(sort_type, output_name, filesystem)
+            for result in self.run_items(merge, merge_plans()):
+                self._finish_directory_merge(result.item, result.success,
+                                             delete)
 
+            self._close_manifest()
             self._log_run_success()
             return True
 
@@ -1,9 +1,11 @@
 """
 Module contains file operation to pretty print files in json
 """
+import os
 import logging
 import json
 from json.decoder import JSONDecodeError
+from typing import Iterator, List
 from logfile.operations.operation_base import OperationBase
 
 # pylint: disable=W1203
@@ -12,8 +14,57 @@ from logfile.operations.operation_base import OperationBase
 class PrettyJson(OperationBase):
     """
     This class is responseable for pretty printing json files
+
+    Instructions:
+        Incremental(str):
+            True skips files pretty printed by an earlier run
+        Workers(str):
+            Number of files pretty printed concurrently
+        Executor(str):
+            'thread' or 'process' pool used with Workers
     """
 
+    def begin_stream(self) -> bool:
+        """
+        Preparing for files pushed by a pipeline, every file in workfolder
+        is pretty printed
+
+        Returns:
+            bool: Operation can run
+        """
+        if not super().begin_stream():
+            return False
+        self._stream_directory = self.make_directory_path("*")
+        self._stream_recursive = True
+        self._open_manifest()
+        return bool(self._stream_directory)
+
+    def process_file(self, filepath: str) -> List[str]:
+        """
+        Pretty printing a single file pushed by a pipeline
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: The same file
+        """
+        if self._needs_processing(filepath):
+            if self.pretty_print_file(filepath):
+                self._track_file_added(filepath)
+            self._track_file_processed(filepath)
+        return [filepath]
+
+    def end_stream(self) -> List[str]:
+        """
+        Saving manifest after every file is pushed
+
+        Returns:
+            list: Nothing is held back
+        """
+        self._close_manifest()
+        return []
+
     @staticmethod
     def pretty_print_file(filepath: str) -> bool:
         """
@@ -31,10 +82,14 @@ class PrettyJson(OperationBase):
                     json_data = json.load(handle)
                     handle.close()
 
-                with open(filepath, 'w') as handle:
+                # Replacing instead of writing in place, the file may share
+                # its inode with an extraction cache entry
+                temp_path = filepath + ".tmp"
+                with open(temp_path, 'w') as handle:
                     pretty = json.dumps(json_data, sort_keys=True, indent=4)
                     handle.write(pretty)
                     handle.close()
+                os.replace(temp_path, filepath)
                 return True
 
             except JSONDecodeError:
@@ -50,11 +105,26 @@ class PrettyJson(OperationBase):
             bool: Operation run successfull
         """
         dir_path = self.make_directory_path("*")
-        files = self.get_files(dir_path, True)
-        if files != []:
-            for filepath in files:
-                PrettyJson.pretty_print_file(filepath)
+        self._open_manifest()
+
+        files_affected = 0
+
+        def files_to_print() -> Iterator[str]:
+            nonlocal files_affected
+            for filepath in self.list_files(dir_path, True):
+                files_affected += 1
+                if self._needs_processing(filepath):
+                    yield filepath
+
+        for result in self.run_items(PrettyJson.pretty_print_file,
+                                     files_to_print()):
+            if result.success:
+                self._track_file_added(result.item)
+            self._track_file_processed(result.item)
+
+        self._close_manifest()
 
+        if files_affected:
             self._log_run_success()
             return True
 
@@ -0,0 +1,323 @@
+"""
+Module contains file operation to sort log records of files by timestamp
+"""
+import os
+import re
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Pattern
+from logfile.operations.operation_base import OperationBase
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+from logfile.operations.timestamp_merge import TimestampOrder
+from logfile.operations.external_sort import RUN_MEMORY_FACTOR, \
+    merge_runs, plan_runs, sort_run
+
+# pylint: disable=W1203
+
+
+class SortPlan(NamedTuple):
+    """
+    Files whose records are sorted together into a single output file
+    """
+    output_path: str
+    files: List[str]
+
+
+class SortFiles(OperationBase):
+    """
+    This class is responseable for sorting log records of files by a
+    timestamp or a regex group, without holding files in memory
+
+    Instructions:
+        Directory(str):
+            Relative path in work folder or * for current work folder
+        Recursive(str):
+            False takes current folder
+            True is recursive through current folder and subs
+        RegexExpression(str):
+            Regex expression to match filepaths with
+        OutputName(str):
+            File name records of every matched file in a directory are
+            sorted into. Every file is sorted in place if not set
+        TimestampRegex:
+            Regex finding the sort key in lines, first group is used if
+            regex has groups. Lines without a key belong to the line
+            before them. Default is ISO 8601 like '2024-10-17 12:00:00'
+        TimestampFormat:
+            strptime format parsing the key, like '%b %d %H:%M:%S'.
+            Keys are compared as text if not set
+        MemoryBudget:
+            Bytes of memory used to sort runs, shared by Workers.
+            Default 268435456
+        Incremental:
+            True only sorts again when matched files are new or changed
+        Workers:
+            Number of runs sorted at the same time
+        Executor:
+            'thread' or 'process' pool used with Workers.
+            Default 'process'
+
+    Files are sorted with an external merge sort. Files are split at
+    records into runs small enough to sort in memory, runs are sorted on
+    Workers and spilled to a temporary directory next to the output, and
+    the sorted runs are merged into the output. Records with equal keys
+    keep their order. Bytes are written back unchanged, text is read as
+    utf-8 keeping undecodable bytes.
+    """
+
+    def __init__(self, workfolder: str, instructions: Dict[str, str],
+                 snapshot: Optional[WorkfolderSnapshot] = None):
+        super().__init__(workfolder, instructions, snapshot)
+        self._stream_regex: Optional[Pattern[str]] = None
+        self._stream_output_name = ""
+        self._stream_pending: Dict[str, List[str]] = {}
+
+    @property
+    def executor_instruction(self) -> str:
+        """
+        Get executor type from instructions, sorting runs is bound by CPU
+
+        Returns:
+            str: 'thread' or 'process'
+
+        Default value: 'process'
+        """
+        if "Executor" not in self._instructions:
+            self._log_instruction("Executor", "process")
+            return "process"
+        return super().executor_instruction
+
+    @property
+    def memory_budget_instruction(self) -> int:
+        """
+        Get memory budget from instructions
+
+        Returns:
+            int: Bytes of memory used to sort runs
+
+        Default value: 268435456
+        """
+        return max(1, self._get_int_instruction("MemoryBudget",
+                                                256 * 1024 * 1024))
+
+    def _sort_order(self) -> TimestampOrder:
+        """
+        Get description of sort keys
+
+        Returns:
+            TimestampOrder: Sort key description
+        """
+        return TimestampOrder(re.compile(self.timestamp_regex_instruction),
+                              self.timestamp_format_instruction)
+
+    def _run_size(self) -> int:
+        """
+        Get bytes of a file sorted in a single run, every worker sorts a
+        run at the same time
+
+        Returns:
+            int: Bytes in each run
+        """
+        workers = max(1, self.workers_instruction)
+        return max(1, self.memory_budget_instruction //
+                   (workers * RUN_MEMORY_FACTOR))
+
+    def sort_plan(self, plan: SortPlan, order: TimestampOrder,
+                  run_size: int) -> bool:
+        """
+        Sorting records of files in a plan into its output, replacing the
+        output when every run is sorted
+
+        Args:
+            plan(SortPlan): Files to sort
+            order(TimestampOrder): Sort key description
+            run_size(int): Bytes of a file in each run
+
+        Returns:
+            bool: Files is sorted
+        """
+        if not (plan.output_path and plan.files):
+            return False
+        directory = os.path.dirname(plan.output_path) or "."
+        try:
+            with tempfile.TemporaryDirectory(prefix=".sort-",
+                                             dir=directory) as temp_dir:
+                results = list(self.run_items(
+                    sort_run, plan_runs(plan.files, run_size, order,
+                                        temp_dir)))
+                if not all(result.success for result in results):
+                    logging.error(f"Could not sort runs of "
+                                  f"'{plan.output_path}'")
+                    return False
+                runs = sorted(result.value for result in results)
+                sorted_path = os.path.join(temp_dir, "sorted")
+                merge_runs(runs, sorted_path, order)
+                os.replace(sorted_path, plan.output_path)
+                logging.debug(f"Sorted {len(plan.files)} files in "
+                              f"{len(runs)} runs into "
+                              f"'{plan.output_path}'")
+            return True
+        except OSError as exc:
+            logging.error(f"Could not sort files '{exc}'")
+        return False
+
+    def _plan_directory_sort(self, directory: str, files: List[str],
+                             output_name: str) -> Iterator[SortPlan]:
+        """
+        Planning sort of files matched in a directory, skipping files not
+        new or changed when running incremental
+
+        Args:
+            directory(str): Directory path
+            files(list): Files to sort
+            output_name(str): OutputName instruction
+
+        Returns:
+            Iterator[SortPlan]: Files to sort
+        """
+        files = sorted(files)
+        if output_name:
+            output_path = (Path(directory) / output_name).as_posix()
+            files = [file_path for file_path in files
+                     if file_path != output_path]
+            output_current = Path(output_path).exists() and \
+                not self._needs_processing(output_path)
+            changed = [file_path for file_path in files
+                       if self._needs_processing(file_path)]
+            if changed or (files and not output_current):
+                yield SortPlan(output_path, files)
+            return
+        for file_path in files:
+            if self._needs_processing(file_path):
+                yield SortPlan(file_path, [file_path])
+
+    def _execute_plans(self, plans: Iterator[SortPlan]) -> List[str]:
+        """
+        Sorting every plan and recording sorted files
+
+        Args:
+            plans(Iterator[SortPlan]): Files to sort
+
+        Returns:
+            list: Outputs sorted
+        """
+        order = self._sort_order()
+        run_size = self._run_size()
+        outputs = []
+        for plan in plans:
+            if self.sort_plan(plan, order, run_size):
+                outputs.append(plan.output_path)
+                self._track_file_added(plan.output_path)
+                self._track_file_processed(plan.output_path)
+                for file_path in plan.files:
+                    self._track_file_processed(file_path)
+        return outputs
+
+    def begin_stream(self) -> bool:
+        """
+        Reading instructions before files is pushed by a pipeline
+
+        Returns:
+            bool: Operation can run
+        """
+        can_run = super().begin_stream()
+        regex_string = self.regex_expression_instruction
+        self._stream_output_name = self.output_name_instruction
+        self._stream_pending = {}
+
+        if can_run and regex_string and \
+           Path(self._stream_directory).exists():
+            self._stream_regex = re.compile(regex_string)
+            self._open_manifest()
+            return True
+        return False
+
+    def accepts_file(self, filepath: str) -> bool:
+        """
+        Checks file is inside directory and matches regex
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is sorted
+        """
+        return bool(self._stream_regex and
+                    super().accepts_file(filepath) and
+                    self._stream_regex.search(filepath))
+
+    def process_file(self, filepath: str) -> List[str]:
+        """
+        Holding file back until every file is pushed by a pipeline
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: Nothing, file is passed on by end_stream
+        """
+        directory = str(Path(filepath).parent)
+        self._stream_pending.setdefault(directory, []).append(filepath)
+        return []
+
+    def end_stream(self) -> List[str]:
+        """
+        Sorting files held back in each directory
+
+        Returns:
+            list: Sorted files, and files sorted into OutputName
+        """
+        if not self._stream_regex:
+            return []
+        output_name = self._stream_output_name
+
+        def sort_plans() -> Iterator[SortPlan]:
+            for directory, files in self._stream_pending.items():
+                yield from self._plan_directory_sort(directory, files,
+                                                     output_name)
+
+        released = self._execute_plans(sort_plans())
+        for files in self._stream_pending.values():
+            released.extend(file_path for file_path in files
+                            if file_path not in released)
+
+        self._stream_pending = {}
+        self._close_manifest()
+        return released
+
+    def run(self) -> bool:
+        """
+        Running sortfiles operation with given instructions
+        """
+        directory_path = self.make_directory_path(self.directory_instruction)
+        recursive = self.recursive_instruction
+        output_name = self.output_name_instruction
+        regex_string = self.regex_expression_instruction
+
+        if regex_string and directory_path and \
+           os.path.exists(directory_path):
+
+            regex = re.compile(regex_string)
+            self._open_manifest()
+
+            directories = [directory_path]
+            if recursive:
+                directories.extend(self.list_directories(directory_path,
+                                                         recursive))
+
+            def sort_plans() -> Iterator[SortPlan]:
+                for path in directories:
+                    files = [file_path
+                             for file_path in self.list_files(path, False)
+                             if regex.search(file_path)]
+                    yield from self._plan_directory_sort(path, files,
+                                                         output_name)
+
+            self._execute_plans(sort_plans())
+            self._close_manifest()
+            self._log_run_success()
+            return True
+
+        self._log_run_failed("No files affected")
+        return False
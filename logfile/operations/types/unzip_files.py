@@ -2,17 +2,43 @@
 Module contains file operation to unzip files
 """
 
-import gzip
+import os
 import tarfile
+import zipfile
 import logging
+import functools
+import contextlib
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
 from logfile.operations.operation_base import OperationBase
+from logfile.operations.decompressors import DECOMPRESSION_ERRORS, \
+    Decompressor, decompressor_for_name, detect_decompressor, \
+    get_decompressor
+from logfile.operations.member_extractor import \
+    DEFAULT_MAX_IN_FLIGHT_BYTES, MemberExtractor, MemberFilter, \
+    ParallelDecompression, Parallelism, SharedDecompression
+from logfile.operations.extraction_cache import ExtractionCache
+from logfile.operations.gzip_index import GzipIndex
+from logfile.operations.extraction_planner import ExtractionPlan, \
+    ExtractionPlanner
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
 
 # pylint: disable=W1203
 
+TARFILE_FORMATS = ["tar", "gz", "bz2", "xz"]
 
-class UnzipFiles(OperationBase):
+
+class ExtractResult(NamedTuple):
+    """
+    Result of extracting a single archive
+    """
+    extracted_to: Optional[str]
+    files: List[str]
+    kept_archives: List[str]
+
+
+class UnzipFiles(OperationBase):  # pylint: disable=R0902,R0904
     """
     This class is responseable for unzipping files
 
@@ -22,98 +48,842 @@ class UnzipFiles(OperationBase):
         Recursive(str):
             False takes current folder
             true is recursive through current folder and subs
+        Workers(str):
+            Number of archives extracted concurrently
+        Executor(str):
+            'thread' or 'process' pool used with Workers
+        BufferSize(str):
+            Bytes decompressed at a time, default 1 MiB
+        IncludeFiles(str):
+            Only extract tar members matching "var/log/|messages"
+        ExcludeFiles(str):
+            Skip tar members matching "core.|dump"
+        ExcludeExtensions(str):
+            Skip tar members with extensions ".bin|.img"
+        CacheDirectory(str):
+            Directory caching extracted archives by content, off if empty
+        CacheMaxBytes(str):
+            Size of extracted files kept in cache, default 10 GiB
+        DryRun(str):
+            True logs the extraction plan without extracting anything
+        PreserveMetadata(str):
+            True restores ownership, permissions and timestamps of tar
+            members, off by default as it costs more than the data on
+            tars with many small files
+        DecompressThreads(str):
+            Threads decompressing archives inside an archive, default
+            number of CPUs
+        MaxInFlightBytes(str):
+            Compressed bytes held in memory for the decompress threads,
+            default 256 MiB
+        IndexGzip(str):
+            True keeps gzip files which are not tar files compressed and
+            builds a checkpoint index sidecar for random access instead
+
+    Archives are recognised from their magic bytes, falling back to the
+    extension: tar, zip, gz, bz2, xz and zstd when the zstandard package is
+    installed. Compressed files without an extension or ending in a
+    rotation number are decompressed in place, like rotated logs named
+    'messages.1'. Files with other extensions are left alone even when
+    they are zip files, like '.docx' documents or '.jar' packages.
+
+    With Recursive archives inside tar files are decompressed while the
+    outer tar is read, only the files inside them are written to disk.
+    Archives produced by an extraction is queued and extracted in turn,
+    so every produced file is inspected once and nothing is rescanned.
+    Independent compressed members and queued archives are decompressed
+    concurrently on DecompressThreads threads. Every archive of a run,
+    also with Workers, shares these threads and MaxInFlightBytes.
+
+    Include and exclude patterns are matched against tar member names the
+    same way ConvertFiles matches filepaths, filtered members are skipped
+    without being written.
+
+    With CacheDirectory an archive extracted before is hardlinked from the
+    cache instead of being extracted again.
+
+    With IndexGzip large gzip logs can be read at any offset through
+    IndexedGzipReader without being decompressed to disk. MergeFiles with
+    Decompress reads indexed gzip files this way.
+
+    Before extracting, a plan is built from tar headers and gzip trailers.
+    Archives are extracted largest first, and nothing is extracted if the
+    expected size does not fit the free disk space. Only DryRun reads
+    headers of compressed tar files and of archives inside them, which
+    decompresses them once more, so on real runs archives inside archives
+    are not counted towards order and disk space.
     """
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, workfolder: str, instructions: Dict[str, str],
+                 snapshot: Optional[WorkfolderSnapshot] = None):
+        super().__init__(workfolder, instructions, snapshot)
+        self._stream_buffer_size = self.DEFAULT_BUFFER_SIZE
+        self._stream_member_filter: Optional[MemberFilter] = None
+        self._stream_cache: Optional[ExtractionCache] = None
+        self._stream_preserve_metadata = False
+        self._stream_parallel: Optional[SharedDecompression] = None
+        self._stream_index_gzip = False
+
+    @property
+    def member_filter_instruction(self) -> Optional[MemberFilter]:
+        """
+        Get member filter from IncludeFiles, ExcludeFiles and
+        ExcludeExtensions instructions
+
+        Returns:
+            MemberFilter: Filter for tar members
+            None: Every member is extracted
+
+        Default value: None
+        """
+        include = [val for val in self.include_files_instruction if val]
+        exclude = [val for val in self.exclude_files_instruction +
+                   self.exclude_extensions_instruction if val]
+        if include or exclude:
+            return MemberFilter(include=include, exclude=exclude)
+        return None
+
+    @property
+    def preserve_metadata_instruction(self) -> bool:
+        """
+        Get preserve metadata instruction from instructions
+
+        Returns:
+            bool: Restore metadata of tar members
+
+        Default value: False
+        """
+        key = "PreserveMetadata"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def parallel_instruction(self) -> ParallelDecompression:
+        """
+        Get parallel decompression from DecompressThreads and
+        MaxInFlightBytes instructions
+
+        Returns:
+            ParallelDecompression: Threads and bytes in flight
+
+        Default value: number of CPUs and 268435456
+        """
+        threads = self._get_int_instruction("DecompressThreads",
+                                            os.cpu_count() or 1)
+        max_bytes = self._get_int_instruction("MaxInFlightBytes",
+                                              DEFAULT_MAX_IN_FLIGHT_BYTES)
+        return ParallelDecompression(threads=max(1, threads),
+                                     max_in_flight_bytes=max(1, max_bytes))
+
+    @property
+    def index_gzip_instruction(self) -> bool:
+        """
+        Get index gzip instruction from instructions
+
+        Returns:
+            bool: Index gzip files instead of extracting them
+
+        Default value: False
+        """
+        key = "IndexGzip"
+        val = False
+        if key in self._instructions:
+            val = self._instructions[key].lower() == "true"
+        self._log_instruction(key, str(val))
+        return val
+
+    @property
+    def cache_instruction(self) -> Optional[ExtractionCache]:
+        """
+        Get extraction cache from CacheDirectory and CacheMaxBytes
+        instructions
+
+        Returns:
+            ExtractionCache: Cache of extracted archives
+            None: No cache is used
+
+        Default value: None
+        """
+        key = "CacheDirectory"
+        directory = ""
+        if key in self._instructions:
+            directory = self._instructions[key]
+        self._log_instruction(key, directory)
+        if not directory:
+            return None
+
+        max_bytes = self._get_int_instruction("CacheMaxBytes",
+                                              10 * 1024 ** 3)
+        return ExtractionCache(directory, max(0, max_bytes))
+
+    @staticmethod
+    def output_path(filepath: str, decompressor: Decompressor) -> Path:
+        """
+        Get path an archive is extracted to, the archive extension is
+        removed, with '.tar' of compressed tar files. Stream formats
+        without a known extension are decompressed in place, containers
+        go to a directory with '.d' appended
+
+        Args:
+            filepath(str): Filepath to archive
+            decompressor(Decompressor): Decompressor of archive format
+
+        Returns:
+            Path: File or directory to extract to
+        """
+        target = Path(filepath)
+        if decompressor_for_name(target.name) == decompressor:
+            stem = Path(target.stem)
+            if decompressor.is_tar(target.name) and \
+                    stem.suffix.lower() == ".tar":
+                return target.parent / stem.stem
+            return target.parent / target.stem
+        if decompressor.is_stream and not decompressor.is_tar(target.name):
+            return target
+        return target.parent / (target.name + ".d")
+
     @staticmethod
-    def extract_tar(filepath: str) -> Optional[str]:
+    @contextlib.contextmanager
+    def open_tar(filepath: str,
+                 decompressor: Optional[Decompressor] = None
+                 ) -> Iterator[tarfile.TarFile]:
+        """
+        Opens a tar file, compressed tar files tarfile can not read itself
+        are opened as a stream through their decompressor
+
+        Args:
+            filepath(str): Filepath to tar file
+            decompressor(Decompressor): Decompressor of tar format
+
+        Returns:
+            Iterator[TarFile]: Open tar file
+        """
+        if decompressor is None or decompressor.name in TARFILE_FORMATS:
+            with tarfile.open(filepath) as tar:
+                yield tar
+            return
+
+        with open(filepath, "rb") as handle:
+            with decompressor.wrap(handle) as stream:
+                with tarfile.open(fileobj=stream, mode="r|") as tar:
+                    yield tar
+
+    @staticmethod
+    def extract_tar(filepath: str,
+                    member_filter: Optional[MemberFilter] = None,
+                    preserve_metadata: bool = False,
+                    buffer_size: int = DEFAULT_BUFFER_SIZE
+                    ) -> Optional[str]:
         """
         Extracting tar file
 
+        Unless preserve_metadata is given, directories are created up front
+        and file data is written through a single buffer, without restoring
+        ownership, permissions and timestamps for each member.
+
         Args:
             filepath(str): Filepath to tar file
+            member_filter(MemberFilter): Members to extract, all if None
+            preserve_metadata(bool): Extract with tarfile.extractall
+                                     restoring metadata of every member
+            buffer_size(int): Bytes written at a time
 
         Returns:
             str: Directory extracted in
             None: Tar extracting failed
         """
         if filepath and Path(filepath).exists():
-            target_file = Path(filepath)
-            extract_to = (target_file.parent / target_file.stem).as_posix()
+            decompressor = detect_decompressor(filepath)
+            if decompressor is None:
+                logging.warning(f"File is not an archive '{filepath}'")
+                return None
+            extract_to = UnzipFiles.output_path(filepath, decompressor)
 
             try:
                 logging.debug(f"Create directory '{extract_to}'")
-                Path(extract_to).mkdir()
+                extract_to.mkdir()
 
                 logging.debug(f"Extracting '{filepath}' to '{extract_to}'")
-                tar = tarfile.open(filepath)
-                tar.extractall(extract_to)
-                tar.close()
+                with UnzipFiles.open_tar(filepath, decompressor) as tar:
+                    UnzipFiles._extract_tar_members(
+                        tar, extract_to, member_filter, preserve_metadata,
+                        buffer_size)
 
-                logging.debug("Deleting file '{filepath}'")
+                logging.debug(f"Deleting file '{filepath}'")
                 Path(filepath).unlink()
 
-                return extract_to
+                return extract_to.as_posix()
 
-            except tarfile.ReadError as exc:
+            except DECOMPRESSION_ERRORS as exc:
                 logging.warning(f"File is corrupted '{filepath}' {exc}")
 
-            except OSError as exc:
-                logging.warning(f"Could not delete '{filepath}' {exc}")
+        return None
+
+    @staticmethod
+    def _extract_tar_members(tar: tarfile.TarFile, extract_to: Path,
+                             member_filter: Optional[MemberFilter],
+                             preserve_metadata: bool,
+                             buffer_size: int) -> None:
+        """
+        Extracting members of an open tar file
+        """
+        if preserve_metadata:
+            members = None
+            if member_filter:
+                members = (member for member in tar
+                           if member_filter.accepts(member.name))
+            tar.extractall(extract_to.as_posix(),
+                           members=members)  # type: ignore
+            return
+
+        extractor = MemberExtractor(buffer_size, nested=False,
+                                    member_filter=member_filter,
+                                    extract_links=True)
+        if getattr(tar.fileobj, "seekable", lambda: False)():
+            extractor.make_directories(tar.getmembers(), extract_to)
+        extractor.extract_members(tar, extract_to)
+
+    @staticmethod
+    def extract_stream(filepath: str, decompressor: Decompressor,
+                       buffer_size: int = DEFAULT_BUFFER_SIZE
+                       ) -> Optional[str]:
+        """
+        Extract a file compressed with a stream format, streaming it through
+        a reused buffer so memory use do not depend on the size of the file
+
+        Args:
+            filepath(str): Filepath to compressed file
+            decompressor(Decompressor): Decompressor of file format
+            buffer_size(int): Bytes decompressed at a time
+
+        Returns:
+            str: Extracted filepath
+            None: File extracting failed
+        """
+        if filepath and Path(filepath).exists():
+            target = Path(filepath)
+            extract_to = UnzipFiles.output_path(filepath, decompressor)
+            write_to = extract_to
+            if extract_to == target:
+                write_to = target.parent / (target.name + ".tmp")
+
+            try:
+                logging.debug(f"Extracting '{filepath}' to '{extract_to}'")
+                extractor = MemberExtractor(buffer_size)
+                with open(filepath, "rb") as handle:
+                    with decompressor.wrap(handle) as stream:
+                        extractor.write_file(stream, write_to.as_posix())
+
+                if write_to != extract_to:
+                    os.replace(write_to.as_posix(), extract_to.as_posix())
+                else:
+                    logging.debug(f"Deleted file '{filepath}'")
+                    target.unlink()
+                return extract_to.as_posix()
+
+            except DECOMPRESSION_ERRORS as exc:
+                logging.warning(f"Error extracting file '{filepath}' {exc}")
+                UnzipFiles._remove_partial(write_to.as_posix())
 
         return None
 
     @staticmethod
-    def extract_gz(filepath: str) -> bool:
+    def extract_gz(filepath: str,
+                   buffer_size: int = DEFAULT_BUFFER_SIZE) -> bool:
         """
-        Extract gz file
+        Extract gz file, streaming it through a reused buffer so memory
+        use do not depend on the size of the file
 
         Args:
             filepath(str): Filepath to gz file
+            buffer_size(int): Bytes decompressed at a time
 
         Returns:
             bool: Gz extract success
         """
+        decompressor = get_decompressor("gz")
+        if decompressor is None:
+            return False
+        return UnzipFiles.extract_stream(filepath, decompressor,
+                                         buffer_size) is not None
+
+    @staticmethod
+    def extract_zip(filepath: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                    member_filter: Optional[MemberFilter] = None
+                    ) -> Optional[str]:
+        """
+        Extracting zip file
+
+        Args:
+            filepath(str): Filepath to zip file
+            buffer_size(int): Bytes decompressed at a time
+            member_filter(MemberFilter): Members to extract, all if None
+
+        Returns:
+            str: Directory extracted in
+            None: Zip extracting failed
+        """
+        return UnzipFiles._extract_zip(
+            filepath, MemberExtractor(buffer_size,
+                                      member_filter=member_filter))
+
+    @staticmethod
+    def _extract_zip(filepath: str,
+                     extractor: MemberExtractor) -> Optional[str]:
+        """
+        Extracting zip file with extractor recording produced files
+        """
+        decompressor = get_decompressor("zip")
+        if not filepath or not Path(filepath).exists() or \
+                decompressor is None:
+            return None
+
+        extract_to = UnzipFiles.output_path(filepath, decompressor)
+        try:
+            logging.debug(f"Extracting '{filepath}' to '{extract_to}'")
+            extract_to.mkdir()
+            with zipfile.ZipFile(filepath) as archive:
+                extractor.extract_zip_members(archive, extract_to)
+
+            logging.debug(f"Deleting file '{filepath}'")
+            Path(filepath).unlink()
+            return extract_to.as_posix()
+
+        except DECOMPRESSION_ERRORS as exc:
+            logging.warning(f"File is corrupted '{filepath}' {exc}")
+
+        return None
+
+    @staticmethod
+    def _remove_partial(filepath: str) -> None:
+        """
+        Removes output left behind by a failed extraction
+        """
+        try:
+            Path(filepath).unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def extract_tar_nested(filepath: str,
+                           buffer_size: int = DEFAULT_BUFFER_SIZE,
+                           member_filter: Optional[MemberFilter] = None
+                           ) -> Optional[str]:
+        """
+        Extracting tar file and every archive inside it, inner archives
+        are decompressed while reading and never written to disk
+
+        Args:
+            filepath(str): Filepath to tar file
+            buffer_size(int): Bytes decompressed at a time
+            member_filter(MemberFilter): Members to extract, all if None
+
+        Returns:
+            str: Directory extracted in
+            None: Tar extracting failed
+        """
+        return UnzipFiles._extract_tar_nested(
+            filepath, MemberExtractor(buffer_size,
+                                      member_filter=member_filter))
+
+    @staticmethod
+    def _extract_tar_nested(filepath: str,
+                            extractor: MemberExtractor) -> Optional[str]:
+        """
+        Extracting tar file with extractor recording produced files
+        """
         if filepath and Path(filepath).exists():
-            target = Path(filepath)
-            extract_to = (target.parent / target.stem).as_posix()
+            decompressor = detect_decompressor(filepath)
+            if decompressor is None:
+                logging.warning(f"File is not an archive '{filepath}'")
+                return None
+            extract_to = UnzipFiles.output_path(filepath, decompressor)
+
+            try:
+                logging.debug(f"Create directory '{extract_to}'")
+                extract_to.mkdir()
+            except OSError as exc:
+                logging.warning(f"Could not create '{extract_to}' {exc}")
+                return None
 
             try:
                 logging.debug(f"Extracting '{filepath}' to '{extract_to}'")
-                gzfile = gzip.open(filepath)
-                output = open(extract_to, "wb")
-                output.write(gzfile.read())
-                gzfile.close()
-                output.close()
-
-                logging.debug(f"Deleted file '{filepath}'")
-                target.unlink()
-                return True
+                try:
+                    with UnzipFiles.open_tar(filepath, decompressor) as tar:
+                        extractor.extract_members(tar, extract_to)
+                finally:
+                    extractor.finish()
 
-            except OSError as exc:
-                logging.warning(f"Error extracting file '{filepath}' {exc}")
+                logging.debug(f"Deleting file '{filepath}'")
+                Path(filepath).unlink()
+                return extract_to.as_posix()
 
-        return False
+            except DECOMPRESSION_ERRORS as exc:
+                logging.warning(f"File is corrupted '{filepath}' {exc}")
+
+        return None
+
+    @staticmethod
+    def index_gzip(filepath: str) -> bool:
+        """
+        Builds the checkpoint index sidecar of a gzip file holding a
+        single file, unless a current one exists
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is a gzip file and is indexed
+        """
+        decompressor = detect_decompressor(filepath)
+        if decompressor is None or decompressor.name != "gz" or \
+                UnzipFiles.output_path(filepath, decompressor).suffix == \
+                ".tar" or decompressor.is_tar(filepath):
+            return False
+        return GzipIndex.load_or_build(filepath) is not None
+
+    @staticmethod
+    def is_archive(filepath: str) -> bool:
+        """
+        Checks if file is an archive UnzipFiles can extract, from its magic
+        bytes or its extension
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is an archive
+        """
+        return bool(filepath) and detect_decompressor(filepath) is not None
+
+    @staticmethod
+    def _extract_single(filepath: str,  # pylint: disable=R0913
+                        recursive: bool, buffer_size: int,
+                        member_filter: Optional[MemberFilter],
+                        preserve_metadata: bool, *,
+                        parallel: Optional[Parallelism]
+                        ) -> ExtractResult:
+        """
+        Extract a single archive without looking at files it produced
+
+        Args:
+            filepath(str): Filepath to compressed file
+            recursive(bool): Decompress archives inside tar files
+            buffer_size(int): Bytes decompressed at a time
+            member_filter(MemberFilter): Tar members to extract
+            preserve_metadata(bool): Restore metadata of tar members
+            parallel(Parallelism): Decompress nested members
+                                   concurrently
+
+        Returns:
+            ExtractResult: Extracted path and produced files
+        """
+        decompressor = detect_decompressor(filepath)
+        if decompressor is None:
+            return ExtractResult(None, [], [])
+
+        is_tar = decompressor.name == "tar" or decompressor.is_tar(filepath)
+        if is_tar and recursive and not preserve_metadata:
+            extractor = MemberExtractor(buffer_size,
+                                        member_filter=member_filter,
+                                        parallel=parallel)
+            new_dir = UnzipFiles._extract_tar_nested(filepath, extractor)
+            if new_dir:
+                return ExtractResult(new_dir, extractor.produced,
+                                     extractor.kept_archives)
+
+        elif is_tar:
+            new_dir = UnzipFiles.extract_tar(filepath, member_filter,
+                                             preserve_metadata, buffer_size)
+            if new_dir:
+                files = list(OperationBase.walk_files(new_dir, True))
+                return ExtractResult(new_dir, files, [])
+
+        elif decompressor.name == "zip":
+            extractor = MemberExtractor(buffer_size,
+                                        member_filter=member_filter)
+            new_dir = UnzipFiles._extract_zip(filepath, extractor)
+            if new_dir:
+                return ExtractResult(new_dir, extractor.produced, [])
+
+        else:
+            new_file = UnzipFiles.extract_stream(filepath, decompressor,
+                                                 buffer_size)
+            if new_file:
+                return ExtractResult(new_file, [new_file], [])
+
+        return ExtractResult(None, [], [])
+
+    @staticmethod
+    def extract_files(filepath: str, recursive: bool,  # pylint: disable=R0913
+                      buffer_size: int = DEFAULT_BUFFER_SIZE,
+                      member_filter: Optional[MemberFilter] = None, *,
+                      cache: Optional[ExtractionCache] = None,
+                      preserve_metadata: bool = False,
+                      parallel: Optional[Parallelism] = None
+                      ) -> ExtractResult:
+        """
+        Extract compressed file, with recursive archives produced by the
+        extraction is queued and extracted too
+
+        Args:
+            filepath(str): Filepath to compressed file
+            recursive(bool): Extract archives inside archive
+            buffer_size(int): Bytes decompressed at a time
+            member_filter(MemberFilter): Tar members to extract, all if None
+            cache(ExtractionCache): Cache to restore extraction from
+            preserve_metadata(bool): Restore metadata of tar members
+            parallel(Parallelism): Decompress independent archives
+                                   concurrently, every archive shares
+                                   the threads and bytes in flight
+
+        Returns:
+            ExtractResult: Path extracted to and every file left on disk
+        """
+        if not filepath or not UnzipFiles.is_archive(filepath):
+            return ExtractResult(None, [], [])
+
+        if not cache or not Path(filepath).exists():
+            return UnzipFiles._extract_queue(filepath, recursive, buffer_size,
+                                             member_filter, preserve_metadata,
+                                             parallel=parallel)
+
+        options = f"recursive={recursive};filter={member_filter};" \
+            f"metadata={preserve_metadata}"
+        key = cache.key(filepath, options)
+        if key:
+            cached = cache.restore(key, str(Path(filepath).parent))
+            if cached:
+                logging.debug(f"Deleting file '{filepath}'")
+                Path(filepath).unlink()
+                return ExtractResult(cached.extracted_to, cached.files,
+                                     cached.kept_archives)
+
+        result = UnzipFiles._extract_queue(filepath, recursive, buffer_size,
+                                           member_filter, preserve_metadata,
+                                           parallel=parallel)
+        if key and result.extracted_to:
+            cache.store(key, result.extracted_to, result.files,
+                        result.kept_archives)
+        return result
 
     @staticmethod
-    def extract(filepath: str, recursive: bool) -> None:
+    def _extract_queue(filepath: str,  # pylint: disable=R0913
+                       recursive: bool, buffer_size: int,
+                       member_filter: Optional[MemberFilter],
+                       preserve_metadata: bool, *,
+                       parallel: Optional[Parallelism]
+                       ) -> ExtractResult:
+        """
+        Extract archive, queueing archives produced by the extraction if
+        recursive. Queued archives are extracted a level at a time, the
+        archives of a level concurrently when parallel is enabled. When
+        the archive decompressed to another archive, like a tar inside a
+        gz file, the path that archive is extracted to is returned
+        """
+        with SharedDecompression.use(parallel) as shared:
+            extract = functools.partial(
+                UnzipFiles._extract_single, recursive=recursive,
+                buffer_size=buffer_size, member_filter=member_filter,
+                preserve_metadata=preserve_metadata, parallel=shared)
+            result = extract(filepath)
+            if not result.extracted_to or not recursive:
+                return result
+            return UnzipFiles._extract_produced(result, extract, shared)
+
+    @staticmethod
+    def _extract_produced(result: ExtractResult,
+                          extract: Callable[[str], ExtractResult],
+                          shared: SharedDecompression) -> ExtractResult:
+        """
+        Extracting archives produced by an extraction a level at a time,
+        on the archive threads of shared
+        """
+        files: List[str] = []
+        kept = set(result.kept_archives)
+        queue = deque(result.files)
+        while queue:
+            archives = []
+            while queue:
+                current = queue.popleft()
+                if current in kept or not UnzipFiles.is_archive(current):
+                    files.append(current)
+                else:
+                    archives.append(current)
+
+            for current, produced in zip(archives, UnzipFiles._map(
+                    extract, archives, shared)):
+                if produced.extracted_to:
+                    if current == result.extracted_to:
+                        result = result._replace(
+                            extracted_to=produced.extracted_to)
+                    kept.update(produced.kept_archives)
+                    queue.extend(produced.files)
+                else:
+                    kept.add(current)
+                    files.append(current)
+
+        return ExtractResult(result.extracted_to, files, sorted(kept))
+
+    @staticmethod
+    def _map(function: Callable[[str], ExtractResult], archives: List[str],
+             shared: SharedDecompression) -> List[ExtractResult]:
+        """
+        Running function on every archive, on the archive threads of
+        shared if enabled and there is more than one archive
+        """
+        if shared.parallel.enabled and len(archives) > 1:
+            return list(shared.executor("archives").map(function, archives))
+        return [function(archive) for archive in archives]
+
+    @staticmethod
+    def extract(filepath: str, recursive: bool,  # pylint: disable=R0913
+                buffer_size: int = DEFAULT_BUFFER_SIZE,
+                member_filter: Optional[MemberFilter] = None, *,
+                cache: Optional[ExtractionCache] = None,
+                preserve_metadata: bool = False,
+                parallel: Optional[Parallelism] = None
+                ) -> Optional[str]:
         """
         Extract compressed file
 
         Args:
             filepath(str): Filepath to compressed file
             Recursive(bool): Walk through tree and compress files inside
+            buffer_size(int): Bytes decompressed at a time
+            member_filter(MemberFilter): Tar members to extract, all if None
+            cache(ExtractionCache): Cache to restore extraction from
+            preserve_metadata(bool): Restore metadata of tar members
+            parallel(Parallelism): Decompress independent archives
+                                   concurrently, every archive shares
+                                   the threads and bytes in flight
+
+        Returns:
+            str: Directory or file extracted to
+            None: Nothing is extracted
+        """
+        return UnzipFiles.extract_files(
+            filepath, recursive, buffer_size, member_filter, cache=cache,
+            preserve_metadata=preserve_metadata,
+            parallel=parallel).extracted_to
+
+    @staticmethod
+    def plan_extraction(files: List[str], recursive: bool,
+                        detailed: bool = False) -> ExtractionPlan:
+        """
+        Plans extraction of archives without extracting anything
+
+        Args:
+            files(list): Filepaths, files not being archives are skipped
+            recursive(bool): Archives inside archives are extracted too
+            detailed(bool): Read headers of compressed tar files and
+                            nested archives
+
+        Returns:
+            ExtractionPlan: Plan of archives, largest first
+        """
+        archives = []
+        for filepath in files:
+            if UnzipFiles.is_archive(filepath):
+                plan = ExtractionPlanner.plan_file(filepath, detailed)
+                if plan:
+                    archives.append(plan)
+        return ExtractionPlan(archives, recursive)
+
+    def begin_stream(self) -> bool:
+        """
+        Reading instructions before files is pushed by a pipeline, only
+        files directly inside directory is extracted like in run
+
+        Returns:
+            bool: Operation can run
+        """
+        can_run = super().begin_stream()
+        self._stream_buffer_size = self.buffer_size_instruction
+        self._stream_member_filter = self.member_filter_instruction
+        self._stream_cache = self.cache_instruction
+        self._stream_preserve_metadata = self.preserve_metadata_instruction
+        self._stream_parallel = SharedDecompression(
+            self.parallel_instruction)
+        self._stream_index_gzip = self.index_gzip_instruction
+        return can_run
+
+    def accepts_file(self, filepath: str) -> bool:
+        """
+        Checks if a file pushed by a pipeline is directly inside directory,
+        Recursive only applies to archives found while extracting
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is directly inside the operations directory
+        """
+        return Path(filepath).parent == Path(self._stream_directory)
+
+    def process_file(self, filepath: str) -> List[str]:
+        """
+        Extracting a single file pushed by a pipeline
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            list: Extracted files, or the file itself if not an archive
+        """
+        if self._stream_index_gzip and self.index_gzip(filepath):
+            self._track_file_added(GzipIndex.sidecar_path(filepath))
+            return [filepath]
+
+        result = self.extract_files(
+            filepath, self._stream_recursive,
+            self._stream_buffer_size, self._stream_member_filter,
+            cache=self._stream_cache,
+            preserve_metadata=self._stream_preserve_metadata,
+            parallel=self._stream_parallel)
+        if not result.extracted_to:
+            return [filepath]
+
+        self._track_file_removed(filepath)
+        if Path(result.extracted_to).is_dir():
+            self._track_directory_added(result.extracted_to)
+        else:
+            self._track_file_added(result.extracted_to)
+        return result.files
+
+    def end_stream(self) -> List[str]:
+        """
+        Stopping decompression threads once every file is pushed
+
+        Returns:
+            list: Nothing, every file is passed on by process_file
+        """
+        if self._stream_parallel:
+            self._stream_parallel.shutdown()
+            self._stream_parallel = None
+        return super().end_stream()
+
+    def _index_files(self, files: List[str]) -> List[str]:
         """
-        new_dir = None
-        if filepath:
-            ext = Path(filepath).suffix.lower()
-            if ext in [".tgz", ".tar"]:
-                new_dir = UnzipFiles.extract_tar(filepath)
-            elif ext == ".gz":
-                UnzipFiles.extract_gz(filepath)
+        Indexing gzip files
 
-        if recursive and new_dir:
-            filepaths = OperationBase.get_files(new_dir, True)
-            for filep in filepaths:
-                UnzipFiles.extract(filep, recursive)
+        Args:
+            files(list): Filepaths
+
+        Returns:
+            list: Files left to extract
+        """
+        to_extract = []
+        for filepath in files:
+            if self.index_gzip(filepath):
+                self._track_file_added(GzipIndex.sidecar_path(filepath))
+            else:
+                to_extract.append(filepath)
+        return to_extract
 
     def run(self) -> bool:
         """
@@ -123,12 +893,48 @@ class UnzipFiles(OperationBase):
         recursive = self.recursive_instruction
 
         directory_path = self.make_directory_path(directory)
-        files_in_directory = self.get_files(directory_path, False)
 
-        if files_in_directory != []:
-            for filepath in files_in_directory:
-                UnzipFiles.extract(filepath, recursive)
+        files = list(self.list_files(directory_path, False))
+        dry_run = self.dry_run_instruction
+        to_extract = files
+        if self.index_gzip_instruction and not dry_run:
+            to_extract = self._index_files(files)
+        plan = self.plan_extraction(to_extract, recursive, dry_run)
+        if dry_run:
+            for line in plan.report():
+                logging.info(line)
+            if plan.archives:
+                self._log_run_success()
+                return True
+            self._log_run_failed("No archives to extract")
+            return False
+
+        if not plan.fits_disk(directory_path):
+            self._log_run_failed("Not enough free disk space")
+            return False
+
+        planned = set(plan.files)
+        ordered = plan.files + [filepath for filepath in to_extract
+                                if filepath not in planned]
+        workers = min(self.workers_instruction, max(1, len(plan.archives)))
+
+        with SharedDecompression.use(self.parallel_instruction) as shared:
+            extract = functools.partial(
+                UnzipFiles.extract, recursive=recursive,
+                buffer_size=self.buffer_size_instruction,
+                member_filter=self.member_filter_instruction,
+                cache=self.cache_instruction,
+                preserve_metadata=self.preserve_metadata_instruction,
+                parallel=shared)
+            for result in self.run_items(extract, ordered, workers):
+                if result.success:
+                    self._track_file_removed(result.item)
+                    if Path(result.value).is_dir():
+                        self._track_directory_added(result.value)
+                    else:
+                        self._track_file_added(result.value)
 
+        if files:
             self._log_run_success()
             return True
 
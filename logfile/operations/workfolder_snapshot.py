@@ -0,0 +1,267 @@
+"""
+Module contains a snapshot of files and directories inside a workfolder
+"""
+import os
+import logging
+from pathlib import Path
+from typing import Dict, List, Iterator, NamedTuple, Optional
+
+# pylint: disable=W1203
+
+
+class FileStat(NamedTuple):
+    """
+    Stat information recorded for a file in a snapshot
+    """
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+class WorkfolderSnapshot:
+    """
+    Walks and stats a workfolder once, so operations running on the same
+    workfolder can query it instead of walking the file system again.
+
+    Operations changing the tree keeps the snapshot up to date with
+    add_file, remove_file, rename_file and add_directory.
+    """
+
+    def __init__(self, workfolder: str):
+        """
+        Args:
+            workfolder(str): Directory to take snapshot of
+        """
+        self._root = self.normalize(workfolder) if workfolder else ""
+        self._files: Dict[str, Dict[str, FileStat]] = {}
+        self._directories: Dict[str, List[str]] = {}
+        self.refresh()
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        """
+        Normalizing path to the form used as key in the snapshot
+
+        Args:
+            path(str): Path to normalize
+
+        Returns:
+            str: Normalized path
+        """
+        return str(Path(path))
+
+    @property
+    def root(self) -> str:
+        """
+        Get root directory of snapshot
+
+        Returns:
+            str: Root directory
+        """
+        return self._root
+
+    def refresh(self) -> None:
+        """
+        Throws away everything known and walks the workfolder again
+        """
+        self._files = {}
+        self._directories = {}
+        if self._root and os.path.isdir(self._root):
+            self.add_directory(self._root)
+        logging.debug(f"Snapshot of '{self._root}' holds "
+                      f"{self.file_count} files")
+
+    @property
+    def file_count(self) -> int:
+        """
+        Get number of files in snapshot
+
+        Returns:
+            int: File count
+        """
+        return sum(len(files) for files in self._files.values())
+
+    def contains(self, directory: str) -> bool:
+        """
+        Checks if directory is covered by the snapshot
+
+        Args:
+            directory(str): Directory path
+
+        Returns:
+            bool: Directory is inside snapshot
+        """
+        if not directory:
+            return False
+        return self.normalize(directory) in self._directories
+
+    def add_directory(self, directory: str) -> None:
+        """
+        Walks and adds a directory tree to the snapshot, used when a
+        directory is created by an operation
+
+        Args:
+            directory(str): Directory path
+        """
+        if not directory:
+            return
+
+        top = self.normalize(directory)
+        self._register_directory(top)
+
+        pending = [top]
+        while pending:
+            current = pending.pop()
+            files: Dict[str, FileStat] = {}
+            sub_directories: List[str] = []
+            try:
+                with os.scandir(current) as iterator:
+                    for entry in iterator:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_directories.append(entry.path)
+                        elif entry.is_file():
+                            files[entry.name] = self._make_stat(entry.stat())
+            except OSError as exc:
+                logging.warning(f"Could not scan directory '{current}' {exc}")
+
+            sub_directories.sort()
+            self._files[current] = files
+            self._directories[current] = sub_directories
+            pending.extend(sub_directories)
+
+    def _register_directory(self, directory: str) -> None:
+        """
+        Adds directory to its parents sub directories if parent is known
+        """
+        parent = str(Path(directory).parent)
+        if parent != directory and parent in self._directories:
+            siblings = self._directories[parent]
+            if directory not in siblings:
+                siblings.append(directory)
+                siblings.sort()
+
+    @staticmethod
+    def _make_stat(stat_result: os.stat_result) -> FileStat:
+        return FileStat(size=stat_result.st_size,
+                        mtime_ns=stat_result.st_mtime_ns,
+                        inode=stat_result.st_ino)
+
+    def stat(self, filepath: str) -> Optional[FileStat]:
+        """
+        Get recorded stat for file
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            FileStat: Recorded stat
+            None: File is not in snapshot
+        """
+        if not filepath:
+            return None
+        path = Path(filepath)
+        return self._files.get(str(path.parent), {}).get(path.name)
+
+    def add_file(self, filepath: str) -> bool:
+        """
+        Adds or updates a file in the snapshot
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File is added
+        """
+        if filepath:
+            path = Path(filepath)
+            directory = str(path.parent)
+            if directory in self._files:
+                try:
+                    stat_result = os.stat(filepath)
+                    self._files[directory][path.name] = \
+                        self._make_stat(stat_result)
+                    return True
+                except OSError as exc:
+                    logging.warning(f"Could not stat '{filepath}' {exc}")
+        return False
+
+    def remove_file(self, filepath: str) -> bool:
+        """
+        Removes a file from the snapshot
+
+        Args:
+            filepath(str): Filepath
+
+        Returns:
+            bool: File was in snapshot
+        """
+        if filepath:
+            path = Path(filepath)
+            files = self._files.get(str(path.parent), {})
+            if path.name in files:
+                del files[path.name]
+                return True
+        return False
+
+    def rename_file(self, old_filepath: str, new_filepath: str) -> bool:
+        """
+        Moves a file in the snapshot
+
+        Args:
+            old_filepath(str): Filepath before rename
+            new_filepath(str): Filepath after rename
+
+        Returns:
+            bool: File is moved
+        """
+        self.remove_file(old_filepath)
+        return self.add_file(new_filepath)
+
+    def files(self, directory: str, recursive: bool) -> Iterator[str]:
+        """
+        Getting files from directory in same order as
+        OperationBase.walk_files
+
+        Args:
+            directory(str): Directory path
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Filepaths
+        """
+        if not self.contains(directory):
+            return
+
+        pending = [self.normalize(directory)]
+        while pending:
+            current = pending.pop()
+            names = sorted(self._files.get(current, {}))
+            sub_directories = list(self._directories.get(current, []))
+            for name in names:
+                yield os.path.join(current, name)
+
+            if recursive:
+                pending.extend(reversed(sub_directories))
+
+    def directories(self, directory: str, recursive: bool) -> Iterator[str]:
+        """
+        Getting sub directories from directory in same order as
+        OperationBase.walk_directories
+
+        Args:
+            directory(str): Directory path
+            recursive(bool): Run recursive through sub directories
+
+        Returns:
+            Iterator[str]: Directory paths
+        """
+        if not self.contains(directory):
+            return
+
+        top = self.normalize(directory)
+        pending = list(reversed(self._directories.get(top, [])))
+        while pending:
+            current = pending.pop()
+            yield current
+            if recursive:
+                pending.extend(reversed(self._directories.get(current, [])))
@@ -4,9 +4,11 @@ Module contains a base class for file readers
 
 import abc
 import logging
-from typing import Dict
+from typing import IO, Dict, Optional
 from pathlib import Path
 from logfile.readers.reader_result import ReaderResult
+from logfile.operations.archive_filesystem import ArchiveFileSystem, \
+    default_filesystem
 
 # pylint: disable=W1203
 
@@ -17,17 +19,22 @@ class ReaderBase(metaclass=abc.ABCMeta):
     """
 
     def __init__(self, workfolder: str, relative_path: str,
-                 instructions: Dict[str, str]):
+                 instructions: Dict[str, str],
+                 filesystem: Optional[ArchiveFileSystem] = None):
         """
         Args:
             workfolder(str): Base where relative paths can be made from
-            relative_path(str): Relative path to file
+            relative_path(str): Relative path to file, may be inside an
+                                archive like 'bundle.tgz/var/log/messages'
             instructions(Dict[str, str]): Instructions to reader
+            filesystem(ArchiveFileSystem): Resolves files inside archives,
+                                           shared default if None
         """
         logging.info(f"Running FileOperation'{self.__class__.__name__}'")
         self._workfolder = workfolder
         self._relative_path = relative_path
         self._instructions = instructions
+        self._filesystem = filesystem or default_filesystem()
         if not self._instructions:
             logging.warning(r"Instructions is set to None, set it to {}")
             self._instructions = {}
@@ -62,11 +69,23 @@ class ReaderBase(metaclass=abc.ABCMeta):
         target = ""
         if self._workfolder and self._relative_path:
             val = Path(self._workfolder) / self._relative_path
-            if val.exists() and val.is_file():
+            if self._filesystem.is_file(val.as_posix()):
                 target = val.as_posix()
         logging.info(f"Target file to read '{target}'")
         return target
 
+    def open_file(self, filepath: str) -> IO[str]:
+        """
+        Opens file for text reading, real or inside an archive
+
+        Args:
+            filepath(str): Filepath from file_path
+
+        Returns:
+            IO: Readable text file, must be closed by caller
+        """
+        return self._filesystem.open_text(filepath)
+
     @property
     def key_name_instruction(self) -> str:
         """
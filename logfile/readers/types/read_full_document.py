@@ -9,6 +9,8 @@ class ReadFullDocument(ReaderBase):
     """
     Read entire document file reader
 
+    The file may be inside an archive, see ReaderBase.
+
     Instructions:
         KeyName: Key to add to result
         EnableLineNumber: Setting line number as first value in result
@@ -24,7 +26,7 @@ class ReadFullDocument(ReaderBase):
 
         result = ReaderResult()
         if file_to_read and key_name:
-            with open(file_to_read, 'r') as content_file:
+            with self.open_file(file_to_read) as content_file:
                 content = content_file.read()
 
             if enable_linenumber:
@@ -0,0 +1,77 @@
+"""
+Module contains a benchmark of fast tar extraction against extractall
+
+Run with:
+    python -m logfile_tests.benchmarks.tar_extraction_benchmark [files]
+"""
+import io
+import sys
+import time
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+from logfile.operations.types.unzip_files import UnzipFiles
+
+
+def make_tar(filepath: Path, file_count: int) -> None:
+    """
+    Creates a tar with many tiny files spread over directories
+
+    Args:
+        filepath(Path): Tar to create
+        file_count(int): Number of files in tar
+    """
+    with tarfile.open(filepath.as_posix(), "w") as tar:
+        for index in range(file_count):
+            content = f"line {index}\n".encode("utf-8")
+            info = tarfile.TarInfo(f"dir{index % 100}/sub{index % 7}/"
+                                   f"file{index}.log")
+            info.size = len(content)
+            info.mtime = 1000
+            tar.addfile(info, io.BytesIO(content))
+
+
+def measure(source: Path, workdir: Path, preserve_metadata: bool) -> float:
+    """
+    Extracts a copy of source and measures the time
+
+    Args:
+        source(Path): Tar to extract
+        workdir(Path): Directory to extract in
+        preserve_metadata(bool): Use tarfile.extractall
+
+    Returns:
+        float: Seconds used
+    """
+    workdir.mkdir()
+    target = workdir / source.name
+    shutil.copyfile(source.as_posix(), target.as_posix())
+    start = time.perf_counter()
+    if not UnzipFiles.extract_tar(target.as_posix(),
+                                  preserve_metadata=preserve_metadata):
+        raise RuntimeError(f"Could not extract '{target}'")
+    return time.perf_counter() - start
+
+
+def main(file_count: int) -> None:
+    """
+    Runs the benchmark
+
+    Args:
+        file_count(int): Number of files in benchmarked tar
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        source = root / "bundle.tar"
+        make_tar(source, file_count)
+
+        extractall = measure(source, root / "extractall", True)
+        fast = measure(source, root / "fast", False)
+        print(f"{file_count} files")
+        print(f"extractall: {extractall:.3f}s")
+        print(f"fast:       {fast:.3f}s ({extractall / fast:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,255 @@
+"""
+Module contains tests for ArchiveFileSystem class
+"""
+import io
+import gzip
+import pickle
+import tarfile
+import zipfile
+import pytest
+from logfile.operations.archive_filesystem import ArchiveFileSystem
+
+
+def add_tar_member(tar, name, data):
+    """
+    Adds bytes as a member of an open tar
+
+    Args:
+        tar(TarFile): Tar opened for writing
+        name(str): Member name
+        data(bytes): Member content
+    """
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+@pytest.fixture(name="bundle")
+def bundle_fixture(tmp_path):
+    """
+    Writes a tgz holding a log file and a zip holding a gzip file
+
+    Args:
+        tmp_path(Path): pathlib/pathlib2.Path object
+
+    Returns:
+        Path: Work folder
+    """
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as archive:
+        archive.writestr("app/messages.1", b"app 1\n")
+        archive.writestr("app/messages.2.gz", gzip.compress(b"app 2\n"))
+
+    with tarfile.open(tmp_path / "bundle.tgz", "w:gz") as tar:
+        add_tar_member(tar, "var/log/messages", b"var 1\nvar 2\n")
+        add_tar_member(tar, "logs.zip", zip_buffer.getvalue())
+
+    with tarfile.open(tmp_path / "plain.tar", "w") as tar:
+        add_tar_member(tar, "a/b.txt", b"plain\n")
+
+    (tmp_path / "messages.1.gz").write_bytes(gzip.compress(b"gz 1\n"))
+    (tmp_path / "real.txt").write_text("real\n")
+    return tmp_path
+
+
+def test_walk_files(bundle):
+    """
+    Test files inside archives are walked like files in directories
+    """
+    filesystem = ArchiveFileSystem()
+    root = bundle.as_posix()
+    files = sorted(filesystem.walk_files(root, True))
+
+    expected = sorted(f"{root}/{name}" for name in [
+        "real.txt",
+        "plain.tar/a/b.txt",
+        "messages.1.gz/messages.1",
+        "bundle.tgz/var/log/messages",
+        "bundle.tgz/logs.zip/app/messages.1",
+        "bundle.tgz/logs.zip/app/messages.2.gz/messages.2"])
+    assert files == expected, "Not expected return"
+
+
+def test_walk_files_zip_document(tmp_path):
+    """
+    Test zip based documents are walked as files
+    """
+    document = tmp_path / "report.docx"
+    with zipfile.ZipFile(document.as_posix(), "w") as archive:
+        archive.writestr("word/document.xml", "<document/>")
+    filesystem = ArchiveFileSystem()
+    files = list(filesystem.walk_files(tmp_path.as_posix(), True))
+    assert files == [document.as_posix()], "Not expected return"
+
+
+def test_walk_files_not_recursive(bundle):
+    """
+    Test archives are directories when walking a single directory
+    """
+    filesystem = ArchiveFileSystem()
+    root = bundle.as_posix()
+
+    assert list(filesystem.walk_files(root, False)) == \
+        [f"{root}/real.txt"], "Not expected return"
+    assert f"{root}/bundle.tgz" in \
+        filesystem.walk_directories(root, False), "Not expected return"
+
+
+def test_read_nested_members(bundle):
+    """
+    Test members of archives inside archives can be read
+    """
+    filesystem = ArchiveFileSystem()
+    root = bundle.as_posix()
+
+    nested = f"{root}/bundle.tgz/logs.zip/app/messages.2.gz/messages.2"
+    assert filesystem.read_bytes(nested) == b"app 2\n", "Not expected return"
+    assert filesystem.read_bytes(f"{root}/plain.tar/a/b.txt") == \
+        b"plain\n", "Not expected return"
+    with filesystem.open_text(f"{root}/bundle.tgz/var/log/messages") as text:
+        assert text.readlines() == ["var 1\n", "var 2\n"], \
+            "Not expected return"
+
+
+def test_is_file_is_dir(bundle):
+    """
+    Test archives are directories and members are files
+    """
+    filesystem = ArchiveFileSystem()
+    root = bundle.as_posix()
+
+    assert filesystem.is_dir(f"{root}/bundle.tgz"), "Not expected return"
+    assert filesystem.is_dir(f"{root}/bundle.tgz/var/log"), \
+        "Not expected return"
+    assert filesystem.is_file(f"{root}/bundle.tgz/var/log/messages"), \
+        "Not expected return"
+    assert filesystem.is_virtual(f"{root}/bundle.tgz/var"), \
+        "Not expected return"
+    assert not filesystem.is_virtual(f"{root}/real.txt"), \
+        "Not expected return"
+    assert not filesystem.exists(f"{root}/bundle.tgz/missing"), \
+        "Not expected return"
+
+
+def test_open_missing_member(bundle):
+    """
+    Test opening a missing member raises FileNotFoundError
+    """
+    filesystem = ArchiveFileSystem()
+    with pytest.raises(FileNotFoundError):
+        filesystem.open(f"{bundle.as_posix()}/bundle.tgz/missing")
+
+
+def test_real_directory(bundle):
+    """
+    Test directories inside archives map to extracted directories
+    """
+    filesystem = ArchiveFileSystem()
+    root = bundle.as_posix()
+
+    assert filesystem.real_directory(f"{root}/bundle.tgz/logs.zip/app") == \
+        f"{root}/bundle/logs/app", "Not expected return"
+    assert filesystem.real_directory(f"{root}/messages.1.gz") == \
+        f"{root}/messages.1", "Not expected return"
+    assert filesystem.real_directory(root) == root, "Not expected return"
+
+
+def test_cache_evicts_least_recently_used(bundle):
+    """
+    Test cache is kept below its size
+    """
+    filesystem = ArchiveFileSystem(cache_bytes=8)
+    root = bundle.as_posix()
+
+    filesystem.read_bytes(f"{root}/messages.1.gz/messages.1")
+    assert filesystem.cached_bytes == 5, "Not expected return"
+    filesystem.read_bytes(f"{root}/bundle.tgz/logs.zip/app/messages.1")
+    assert filesystem.cached_bytes <= 8, "Not expected return"
+
+
+def test_large_member_not_cached(bundle):
+    """
+    Test members larger than cache are read from a temporary file
+    """
+    filesystem = ArchiveFileSystem(cache_bytes=4)
+    path = f"{bundle.as_posix()}/bundle.tgz/var/log/messages"
+
+    assert filesystem.read_bytes(path) == b"var 1\nvar 2\n", \
+        "Not expected return"
+    assert filesystem.cached_bytes == 0, "Not expected return"
+
+
+def test_walk_files_probes_files_once(bundle, monkeypatch):
+    """
+    Test files are not opened again when walked again unchanged
+    """
+    probed = []
+    # pylint: disable=W0212
+    has_archive_header = ArchiveFileSystem._has_archive_header
+
+    def counting_probe(filepath):
+        probed.append(filepath)
+        return has_archive_header(filepath)
+
+    monkeypatch.setattr(ArchiveFileSystem, "_has_archive_header",
+                        staticmethod(counting_probe))
+    filesystem = ArchiveFileSystem()
+    first = list(filesystem.walk_files(bundle.as_posix(), True))
+    count = len(probed)
+    assert count, "Not expected return"
+    assert list(filesystem.walk_files(bundle.as_posix(), True)) == first, \
+        "Not expected return"
+    assert len(probed) == count, "Files should not be probed again"
+
+
+def test_compressed_tar_members_read_ahead(tmp_path, monkeypatch):
+    """
+    Test members of a compressed tar are cached while reading the first,
+    so every member is read with one more pass over the tar
+    """
+    with tarfile.open(tmp_path / "logs.tgz", "w:gz") as tar:
+        for index in range(3):
+            add_tar_member(tar, f"messages.{index}", f"{index}\n".encode())
+
+    passes = []
+    open_tar = ArchiveFileSystem._open_tar  # pylint: disable=W0212
+
+    def counting_open_tar(handle, decompressor):
+        passes.append(decompressor.name)
+        return open_tar(handle, decompressor)
+
+    monkeypatch.setattr(ArchiveFileSystem, "_open_tar",
+                        staticmethod(counting_open_tar))
+    filesystem = ArchiveFileSystem()
+    root = (tmp_path / "logs.tgz").as_posix()
+    for index in (1, 0, 2):
+        assert filesystem.read_bytes(f"{root}/messages.{index}") == \
+            f"{index}\n".encode(), "Not expected return"
+    assert len(passes) == 2, "Tar should be listed and read once"
+
+
+def test_listing_read_again_when_archive_changes(bundle):
+    """
+    Test a changed archive is listed again
+    """
+    filesystem = ArchiveFileSystem()
+    root = bundle.as_posix()
+    assert filesystem.is_file(f"{root}/plain.tar/a/b.txt"), \
+        "Not expected return"
+
+    with tarfile.open(bundle / "plain.tar", "w") as tar:
+        add_tar_member(tar, "c.txt", b"changed archive\n")
+
+    assert not filesystem.exists(f"{root}/plain.tar/a/b.txt"), \
+        "Not expected return"
+    assert filesystem.read_bytes(f"{root}/plain.tar/c.txt") == \
+        b"changed archive\n", "Not expected return"
+
+
+def test_pickle(bundle):
+    """
+    Test file system can be sent to process pools
+    """
+    filesystem = pickle.loads(pickle.dumps(ArchiveFileSystem(cache_bytes=9)))
+    path = f"{bundle.as_posix()}/messages.1.gz/messages.1"
+    assert filesystem.read_bytes(path) == b"gz 1\n", "Not expected return"
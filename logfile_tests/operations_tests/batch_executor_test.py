@@ -0,0 +1,90 @@
+"""
+Testing BatchExecutor class
+"""
+import gzip
+from pathlib import Path
+import pytest
+from logfile.operations.batch_executor import BatchExecutor
+from logfile.operations.types.unzip_files import UnzipFiles
+from logfile.operations.types.merge_files import MergeFiles
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def workfolders(tmp_path):
+    """
+    Setup workfolders with rotated gz logs
+
+    Returns:
+        list: Workfolder paths, smallest first
+    """
+    result = []
+    for index, line_count in enumerate([1, 50, 10]):
+        workfolder = tmp_path / f"bundle{index}"
+        workfolder.mkdir()
+        for number in range(1, 3):
+            content = "".join(f"{number}\n" for _ in range(line_count))
+            target = workfolder / f"messages.{number}.gz"
+            with gzip.open(target.as_posix(), 'wt') as handle:
+                handle.write(content)
+        result.append(workfolder.as_posix())
+    return result
+
+
+PIPELINE = [
+    (UnzipFiles, {"Recursive": "True"}),
+    (MergeFiles, {"RegexExpression": r"messages\.(\d)$",
+                  "OutputName": "messages.log",
+                  "SortType": "LowHigh"})
+]
+
+
+def test_schedule_largest_first(workfolders):
+    """
+    Test largest workfolder is started first
+    """
+    executor = BatchExecutor(workfolders, PIPELINE)
+    assert executor.schedule() == [workfolders[1], workfolders[2],
+                                   workfolders[0]]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run(workfolders, max_workers):
+    """
+    Test pipeline runs on every workfolder
+    """
+    executor = BatchExecutor(workfolders, PIPELINE, max_workers)
+    result = executor.run()
+
+    assert sorted(result.succeeded) == sorted(workfolders)
+    assert result.failed == []
+    for workfolder in workfolders:
+        merged = Path(workfolder) / "messages.log"
+        assert merged.exists(), "Expected merged output"
+
+
+def test_run_failing_step(workfolders):
+    """
+    Test a failing step is reported in result
+    """
+    pipeline = [(MergeFiles, {})]
+    result = BatchExecutor(workfolders[:1], pipeline, 1).run()
+    assert result.failed == workfolders[:1]
+    assert result.results[0].steps == [False]
+
+
+def test_run_pipeline_raising():
+    """
+    Test an exception in a step is reported as error
+    """
+    result = BatchExecutor.run_pipeline("invalid/path", [(None, {})])
+    assert not result.success, "Not expected return"
+    assert result.error, "Expected error"
+
+
+def test_workfolder_size_invalid_path():
+    """
+    Test size of invalid workfolder is 0
+    """
+    assert BatchExecutor.workfolder_size("invalid/path") == 0
@@ -0,0 +1,91 @@
+"""
+Module contains tests for BlockCompressor class
+"""
+import io
+import gzip
+import lzma
+import pytest
+from logfile.operations.block_compressor import BlockCompressor, \
+    compression_for_name, get_compression
+
+DATA = b"".join(b"Oct 17 12:00:00 host daemon: message %d\n" % index
+                for index in range(20000))
+
+
+def decompress(name, data):
+    """
+    Decompresses concatenated blocks
+
+    Args:
+        name(str): Compression name
+        data(bytes): Compressed data
+
+    Returns:
+        bytes: Decompressed data
+    """
+    if name == "gz":
+        return gzip.decompress(data)
+    if name == "xz":
+        return lzma.decompress(data)
+    zstandard = pytest.importorskip("zstandard")
+    return b"".join(zstandard.ZstdDecompressor().read_to_iter(
+        io.BytesIO(data)))
+
+
+@pytest.mark.parametrize("name", ["gz", "xz", "zstd"])
+@pytest.mark.parametrize("threads", [1, 3])
+def test_block_compressor(name, threads):
+    """
+    Test blocks decompress to the written data, in order
+    """
+    if name == "zstd":
+        pytest.importorskip("zstandard")
+    target = io.BytesIO()
+    compressor = BlockCompressor(target, get_compression(name), threads,
+                                 block_size=100000, close_target=False)
+    with compressor:
+        for start in range(0, len(DATA), 7777):
+            compressor.write(DATA[start:start + 7777])
+
+    assert compressor.closed, "Not expected return"
+    assert not target.closed, "Not expected return"
+    assert decompress(name, target.getvalue()) == DATA, "Not expected return"
+
+
+def test_block_compressor_finish():
+    """
+    Test finish writes buffered data without closing
+    """
+    target = io.BytesIO()
+    compressor = BlockCompressor(target, get_compression("gz"), 2,
+                                 close_target=False)
+    compressor.write(b"first\n")
+    compressor.finish()
+    written = target.getvalue()
+    target.write(gzip.compress(b"raw\n"))
+    compressor.write(b"last\n")
+    compressor.close()
+
+    assert gzip.decompress(written) == b"first\n", "Not expected return"
+    assert gzip.decompress(target.getvalue()) == b"first\nraw\nlast\n", \
+        "Not expected return"
+
+
+def test_block_compressor_closes_target():
+    """
+    Test target is closed by default
+    """
+    target = io.BytesIO()
+    with BlockCompressor(target, get_compression("xz")) as compressor:
+        compressor.write(b"data")
+    assert target.closed, "Not expected return"
+
+
+def test_compression_names():
+    """
+    Test compressions are found by name and extension
+    """
+    assert get_compression("GZ").name == "gz", "Not expected return"
+    assert get_compression("bz2") is None, "Not expected return"
+    assert compression_for_name("out.xz").name == "xz", "Not expected return"
+    assert compression_for_name("out.txt") is None, "Not expected return"
@@ -0,0 +1,166 @@
+"""
+Module contains tests for the decompressor registry
+"""
+import io
+import bz2
+import gzip
+import lzma
+import tarfile
+import zipfile
+import pytest
+from logfile.operations import decompressors
+from logfile.operations.decompressors import Decompressor, \
+    archive_extensions, decompressor_for_name, detect_decompressor, \
+    detect_header, get_decompressor, register_decompressor, trusts_magic
+
+
+def make_tar_bytes():
+    """
+    Creates an uncompressed tar in memory
+
+    Returns:
+        bytes: Tar data
+    """
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        info = tarfile.TarInfo("a.txt")
+        tar.addfile(info, io.BytesIO(b""))
+    return data.getvalue()
+
+
+def make_zip_bytes():
+    """
+    Creates a zip file in memory
+
+    Returns:
+        bytes: Zip data
+    """
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("a.txt", "a")
+    return data.getvalue()
+
+
+@pytest.mark.parametrize("name, data", [
+    ("gz", gzip.compress(b"data")),
+    ("bz2", bz2.compress(b"data")),
+    ("xz", lzma.compress(b"data")),
+    ("zip", make_zip_bytes()),
+    ("tar", make_tar_bytes()),
+])
+def test_detect_header(name, data):
+    """
+    Testing formats are detected from magic bytes
+    """
+    assert detect_header(data).name == name, "Not expected result"
+
+
+def test_detect_header_unknown():
+    """
+    Testing detect_header returns None for plain text
+    """
+    assert detect_header(b"plain text") is None, "Not expected return"
+
+
+def test_detect_decompressor_ignores_extension(tmp_path):
+    """
+    Testing magic bytes wins over the extension
+    """
+    target = tmp_path / "messages.1"
+    target.write_bytes(gzip.compress(b"data"))
+    assert detect_decompressor(target.as_posix()).name == "gz"
+
+
+@pytest.mark.parametrize("name", ["report.docx", "sheet.xlsx", "app.jar",
+                                  "app.apk"])
+def test_detect_decompressor_other_extension(tmp_path, name):
+    """
+    Testing zip based documents and packages are not archives
+    """
+    target = tmp_path / name
+    target.write_bytes(make_zip_bytes())
+    assert detect_decompressor(target.as_posix()) is None, \
+        "Not expected return"
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("messages", True),
+    ("messages.1", True),
+    ("bundle.ZIP", True),
+    ("bundle.tar.gz", True),
+    ("report.docx", False),
+    ("app.log", False),
+])
+def test_trusts_magic(name, expected):
+    """
+    Testing magic bytes are trusted without extension, for archive
+    extensions and for rotation numbers
+    """
+    assert trusts_magic(name) == expected, "Not expected return"
+
+
+def test_detect_decompressor_falls_back_to_extension(tmp_path):
+    """
+    Testing extension is used when no magic bytes match
+    """
+    target = tmp_path / "old.tar"
+    target.write_bytes(b"no magic")
+    assert detect_decompressor(target.as_posix()).name == "tar"
+    assert detect_decompressor("Invalid/path/a.gz") is None
+
+
+def test_decompressor_for_name():
+    """
+    Testing decompressor is found from extensions of tar files too
+    """
+    assert decompressor_for_name("bundle.txz").name == "xz"
+    assert decompressor_for_name("bundle.txz").is_tar("bundle.txz")
+    assert decompressor_for_name("messages") is None
+
+
+@pytest.mark.parametrize("name, compress", [
+    ("gz", gzip.compress),
+    ("bz2", bz2.compress),
+    ("xz", lzma.compress),
+])
+def test_wrap(name, compress):
+    """
+    Testing stream formats decompress a wrapped stream
+    """
+    decompressor = get_decompressor(name)
+    with decompressor.wrap(io.BytesIO(compress(b"data"))) as stream:
+        assert stream.read() == b"data", "Not expected result"
+
+
+def test_wrap_container_format():
+    """
+    Testing container formats can not wrap streams
+    """
+    with pytest.raises(ValueError):
+        get_decompressor("zip").wrap(io.BytesIO())
+
+
+def test_register_decompressor(monkeypatch):
+    """
+    Testing a registered decompressor is detected
+    """
+    registry = dict(decompressors._REGISTRY)  # pylint: disable=W0212
+    monkeypatch.setattr(decompressors, "_REGISTRY", registry)
+    register_decompressor(Decompressor("test", b"TEST", (".test",)))
+    assert detect_header(b"TEST data").name == "test"
+    assert ".test" in archive_extensions()
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress,
+                                      lzma.compress, lambda data: data])
+def test_open_decompressed(tmp_path, compress):
+    """
+    Test streams are decompressed when compressed and closed together
+    """
+    path = tmp_path / "messages"
+    path.write_bytes(compress(b"line 1\nline 2\n"))
+
+    handle = open(path, "rb")
+    with decompressors.open_decompressed(handle) as stream:
+        assert stream.read() == b"line 1\nline 2\n", "Not expected return"
+    assert handle.closed, "Not expected return"
@@ -0,0 +1,94 @@
+"""
+Module contains tests for external merge sort of log records
+"""
+import re
+import random
+from logfile.operations.timestamp_merge import DEFAULT_TIMESTAMP_REGEX, \
+    TimestampOrder
+from logfile.operations.external_sort import merge_runs, plan_runs, \
+    sort_run, split_file
+
+ORDER = TimestampOrder(re.compile(DEFAULT_TIMESTAMP_REGEX))
+
+
+def log_lines(count, seed=1):
+    """
+    Get shuffled log lines, every fifth with a trace line
+
+    Args:
+        count(int): Records to make
+        seed(int): Random seed
+
+    Returns:
+        list: Record texts
+    """
+    records = []
+    for index in range(count):
+        record = f"2024-10-17 12:{index // 60 % 60:02d}:{index % 60:02d} " \
+                 f"host message {index}\n"
+        if index % 5 == 0:
+            record += f"  trace {index}\n"
+        records.append(record)
+    shuffled = list(records)
+    random.Random(seed).shuffle(shuffled)
+    return shuffled, records
+
+
+def test_split_file_at_records(tmp_path):
+    """
+    Test ranges start at lines with a timestamp
+    """
+    path = tmp_path / "in.log"
+    path.write_bytes(b"2024-10-17 12:00:00 a\n  trace\n  trace\n"
+                     b"2024-10-17 12:00:01 b\n")
+    ranges = split_file(path.as_posix(), 5, ORDER)
+
+    assert ranges == [(0, 38), (38, 60)], "Not expected return"
+
+
+def test_split_file_empty(tmp_path):
+    """
+    Test empty file has no ranges
+    """
+    path = tmp_path / "in.log"
+    path.write_bytes(b"")
+    assert split_file(path.as_posix(), 5, ORDER) == [], "Not expected return"
+
+
+def test_sort_runs_and_merge(tmp_path):
+    """
+    Test runs sorted separately merge into sorted records
+    """
+    shuffled, records = log_lines(500)
+    path = tmp_path / "in.log"
+    path.write_text("".join(shuffled))
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+
+    tasks = list(plan_runs([path.as_posix()], 1000, ORDER,
+                           runs_dir.as_posix()))
+    runs = [sort_run(task) for task in tasks]
+    target = tmp_path / "out.log"
+    merge_runs(runs, target.as_posix(), ORDER, fan_in=3)
+
+    assert len(tasks) > 9, "Not expected return"
+    assert target.read_text() == "".join(records), "Not expected return"
+    assert list(runs_dir.iterdir()) == [], "Not expected return"
+
+
+def test_sort_run_keeps_bytes(tmp_path):
+    """
+    Test equal keys keep their order and undecodable bytes are kept
+    """
+    path = tmp_path / "in.log"
+    content = b"2024-10-17 12:00:01 a\r\n2024-10-17 12:00:00 \xff\n" \
+              b"2024-10-17 12:00:01 b"
+    path.write_bytes(content)
+    task = next(plan_runs([path.as_posix()], 1024, ORDER,
+                          tmp_path.as_posix()))
+    run = sort_run(task)
+
+    with open(run, "rb") as handle:
+        assert handle.read() == b"2024-10-17 12:00:00 \xff\n" \
+            b"2024-10-17 12:00:01 a\r\n2024-10-17 12:00:01 b\n", \
+            "Not expected return"
@@ -0,0 +1,124 @@
+"""
+Module contains tests for ExtractionCache class
+"""
+import os
+from pathlib import Path
+from logfile.operations.extraction_cache import ExtractionCache
+
+
+def make_extraction(parent, name, content):
+    """
+    Creates a directory looking like an extracted archive
+
+    Args:
+        parent(Path): Directory archive was in
+        name(str): Directory name
+        content(str): Content of the extracted file
+
+    Returns:
+        list: Extracted files
+    """
+    extracted = parent / name / "logs"
+    extracted.mkdir(parents=True)
+    log_file = extracted / "messages"
+    log_file.write_text(content)
+    return [log_file.as_posix()]
+
+
+def test_key_depends_on_content_and_options(tmp_path):
+    """
+    Testing key changes with archive content and options
+    """
+    archive = tmp_path / "a.tgz"
+    archive.write_bytes(b"first")
+    cache = ExtractionCache((tmp_path / "cache").as_posix(), 1024)
+
+    first = cache.key(archive.as_posix())
+    assert first == cache.key(archive.as_posix()), "Not expected return"
+    assert first != cache.key(archive.as_posix(), "recursive=True")
+    archive.write_bytes(b"second")
+    assert first != cache.key(archive.as_posix()), "Not expected return"
+
+
+def test_key_invalid_path(tmp_path):
+    """
+    Testing key returns None if archive can not be read
+    """
+    cache = ExtractionCache(tmp_path.as_posix(), 1024)
+    assert cache.key("Invalid/path/a.tgz") is None, "Not expected return"
+
+
+def test_store_and_restore(tmp_path):
+    """
+    Testing a stored extraction is hardlinked into another directory
+    """
+    first = tmp_path / "first"
+    files = make_extraction(first, "bundle", "log")
+    cache = ExtractionCache((tmp_path / "cache").as_posix(), 1024)
+    assert cache.store("key", (first / "bundle").as_posix(), files, [])
+
+    second = tmp_path / "second"
+    second.mkdir()
+    restored = cache.restore("key", second.as_posix())
+
+    restored_file = second / "bundle" / "logs" / "messages"
+    assert restored.extracted_to == (second / "bundle").as_posix()
+    assert restored.files == [restored_file.as_posix()]
+    assert restored_file.read_text() == "log"
+    assert os.stat(restored_file.as_posix()).st_ino == \
+        os.stat(files[0]).st_ino, "File should be hardlinked"
+
+
+def test_restore_missing_entry(tmp_path):
+    """
+    Testing restore returns None for unknown key
+    """
+    cache = ExtractionCache((tmp_path / "cache").as_posix(), 1024)
+    assert cache.restore("missing", tmp_path.as_posix()) is None
+
+
+def test_restore_existing_target(tmp_path):
+    """
+    Testing restore does not overwrite an existing directory
+    """
+    files = make_extraction(tmp_path / "first", "bundle", "log")
+    cache = ExtractionCache((tmp_path / "cache").as_posix(), 1024)
+    cache.store("key", (tmp_path / "first" / "bundle").as_posix(), files, [])
+
+    assert cache.restore("key", (tmp_path / "first").as_posix()) is None
+
+
+def test_store_larger_than_cache(tmp_path):
+    """
+    Testing extraction larger than cache is not stored
+    """
+    files = make_extraction(tmp_path, "bundle", "a" * 100)
+    cache = ExtractionCache((tmp_path / "cache").as_posix(), 10)
+    assert not cache.store("key", (tmp_path / "bundle").as_posix(), files,
+                           [])
+    assert cache.size() == 0
+
+
+def test_evict_least_recently_used(tmp_path):
+    """
+    Testing least recently used entry is evicted first
+    """
+    cache_dir = tmp_path / "cache"
+    cache = ExtractionCache(cache_dir.as_posix(), 25)
+    old_files = make_extraction(tmp_path / "old", "bundle", "a" * 10)
+    cache.store("old", (tmp_path / "old" / "bundle").as_posix(), old_files, [])
+    used_files = make_extraction(tmp_path / "used", "bundle", "b" * 10)
+    cache.store("used", (tmp_path / "used" / "bundle").as_posix(),
+                used_files, [])
+
+    os.utime((cache_dir / "old" / "entry.json").as_posix(), (1, 1))
+    os.utime((cache_dir / "used" / "entry.json").as_posix(), (2, 2))
+    cache.restore("old", (tmp_path / "restored").as_posix())
+
+    new_files = make_extraction(tmp_path / "new", "bundle", "c" * 10)
+    cache.store("new", (tmp_path / "new" / "bundle").as_posix(), new_files,
+                [])
+
+    assert sorted(Path(path).name for path in os.listdir(
+        cache_dir.as_posix())) == ["new", "old"], "Not expected result"
+    assert cache.size() == 20
@@ -0,0 +1,145 @@
+"""
+Module contains tests for ExtractionPlanner and ExtractionPlan classes
+"""
+import io
+import gzip
+import tarfile
+from collections import namedtuple
+from logfile.operations import extraction_planner
+from logfile.operations.extraction_planner import ArchivePlan, \
+    ExtractionPlan, ExtractionPlanner
+
+
+def add_member(tar, name, content):
+    """
+    Adds a member with content to tar
+
+    Args:
+        tar(TarFile): Tar to add to
+        name(str): Member name
+        content(bytes): Member content
+    """
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    tar.addfile(info, io.BytesIO(content))
+
+
+def make_plan(filepath, size):
+    """
+    Creates plan of a gz archive
+
+    Args:
+        filepath(str): Archive filepath
+        size(int): Expected size
+
+    Returns:
+        ArchivePlan: Plan
+    """
+    return ArchivePlan(filepath=filepath, archive_size=1, member_size=size,
+                       member_count=1, nested=[], exact=False)
+
+
+def test_plan_file_gz(tmp_path):
+    """
+    Testing gz is planned from its trailer
+    """
+    target = tmp_path / "messages.gz"
+    with gzip.open(target.as_posix(), "wb") as handle:
+        handle.write(b"a" * 5000)
+
+    plan = ExtractionPlanner.plan_file(target.as_posix())
+
+    assert plan.member_size == 5000, "Not expected result"
+    assert plan.member_count == 1, "Not expected result"
+    assert not plan.exact, "Not expected result"
+
+
+def test_plan_file_tar(tmp_path):
+    """
+    Testing tar is planned from its headers
+    """
+    target = tmp_path / "bundle.tar"
+    with tarfile.open(target.as_posix(), "w") as tar:
+        add_member(tar, "a.log", b"a" * 10)
+        add_member(tar, "b/b.log", b"b" * 20)
+
+    plan = ExtractionPlanner.plan_file(target.as_posix())
+
+    assert plan.member_size == 30, "Not expected result"
+    assert plan.member_count == 2, "Not expected result"
+    assert plan.exact, "Not expected result"
+
+
+def test_plan_file_tgz_detailed(tmp_path):
+    """
+    Testing detailed plan reads compressed tar headers and nested archives
+    """
+    nested = io.BytesIO()
+    with gzip.GzipFile(fileobj=nested, mode="wb") as handle:
+        handle.write(b"n" * 1000)
+    target = tmp_path / "bundle.tgz"
+    with tarfile.open(target.as_posix(), "w:gz") as tar:
+        add_member(tar, "a.log", b"a" * 10)
+        add_member(tar, "kernel.log.gz", nested.getvalue())
+
+    quick = ExtractionPlanner.plan_file(target.as_posix())
+    detailed = ExtractionPlanner.plan_file(target.as_posix(), True)
+
+    assert not quick.exact, "Not expected result"
+    assert detailed.exact, "Not expected result"
+    assert detailed.member_count == 2, "Not expected result"
+    assert len(detailed.nested) == 1, "Not expected result"
+    assert detailed.expected_size(True) == 1010, "Not expected result"
+    assert detailed.expected_members(True) == 2, "Not expected result"
+
+
+def test_plan_file_not_archive(tmp_path):
+    """
+    Testing plan_file returns None for files not being archives
+    """
+    target = tmp_path / "text.txt"
+    target.write_text("text")
+    assert ExtractionPlanner.plan_file(target.as_posix()) is None
+
+
+def test_plan_file_corrupted(tmp_path):
+    """
+    Testing plan_file returns None for corrupted archives
+    """
+    target = tmp_path / "file.gz"
+    target.write_text("I am corrupted")
+    assert ExtractionPlanner.plan_file(target.as_posix()) is None
+    assert ExtractionPlanner.plan_file("Invalid/path/a.gz") is None
+
+
+def test_gzip_size_wraps_modulo():
+    """
+    Testing 4 GiB is added when trailer is smaller than the archive
+    """
+    data = b"\x1f\x8b" + b"\x00" * 98 + (10).to_bytes(4, "little")
+    size = ExtractionPlanner.gzip_size(io.BytesIO(data), len(data))
+    assert size == 2 ** 32 + 10, "Not expected result"
+
+
+def test_extraction_plan_largest_first():
+    """
+    Testing archives are ordered largest first
+    """
+    plan = ExtractionPlan([make_plan("small.gz", 1), make_plan("big.gz", 9)],
+                          False)
+    assert plan.files == ["big.gz", "small.gz"], "Not expected result"
+    assert plan.expected_size == 10, "Not expected result"
+    assert plan.report()[0] == "2 archives, 2 files, 10 bytes expected"
+
+
+def test_extraction_plan_fits_disk(tmp_path, monkeypatch):
+    """
+    Testing plan does not fit a disk with too little free space
+    """
+    usage = namedtuple("usage", ["total", "used", "free"])
+    monkeypatch.setattr(extraction_planner.shutil, "disk_usage",
+                        lambda path: usage(100, 95, 5))
+    plan = ExtractionPlan([make_plan("big.gz", 9)], False)
+    assert not plan.fits_disk(tmp_path.as_posix()), "Not expected return"
+    assert ExtractionPlan([make_plan("small.gz", 1)], False).fits_disk(
+        tmp_path.as_posix()), "Not expected return"
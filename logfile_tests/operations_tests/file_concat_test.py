@@ -0,0 +1,153 @@
+"""
+Module contains tests for byte level concatenation of files
+"""
+import io
+import gzip
+import errno
+import pytest
+from logfile.operations import file_concat
+from logfile.operations.block_compressor import BlockCompressor, \
+    get_compression
+from logfile.operations.file_concat import concatenate, \
+    concatenate_compressed, copy_data, open_target
+
+
+def open_sources(paths):
+    """
+    Opens files unbuffered one at a time
+
+    Args:
+        paths(list): Filepaths
+
+    Returns:
+        Iterator[FileIO]: Opened files
+    """
+    for path in paths:
+        yield open(path, "rb", buffering=0)
+
+
+@pytest.fixture(name="sources")
+def sources_fixture(tmp_path):
+    """
+    Writes files with and without trailing newline
+
+    Args:
+        tmp_path(Path): pathlib/pathlib2.Path object
+
+    Returns:
+        list: Filepaths
+    """
+    contents = [b"a1\na2\n", b"b1\nb2", b"", b"c1\n" * 10000]
+    paths = []
+    for index, content in enumerate(contents):
+        path = tmp_path / f"file{index}"
+        path.write_bytes(content)
+        paths.append(path)
+    return paths
+
+
+def test_concatenate(tmp_path, sources):
+    """
+    Test files are concatenated as they are
+    """
+    target_path = tmp_path / "out"
+    with open_target(target_path, False) as target:
+        written = concatenate(target, open_sources(sources), 16, False)
+
+    expected = b"".join(path.read_bytes() for path in sources)
+    assert target_path.read_bytes() == expected, "Not expected return"
+    assert written == len(expected), "Not expected return"
+
+
+def test_concatenate_ensure_newline(tmp_path, sources):
+    """
+    Test newline is only added after files not ending with one
+    """
+    target_path = tmp_path / "out"
+    with open_target(target_path, False) as target:
+        concatenate(target, open_sources(sources), 16, True)
+
+    assert target_path.read_bytes() == \
+        b"a1\na2\nb1\nb2\n" + b"c1\n" * 10000, "Not expected return"
+
+
+def test_concatenate_append(tmp_path, sources):
+    """
+    Test appending keeps content of target
+    """
+    target_path = tmp_path / "out"
+    target_path.write_bytes(b"old\n")
+    with open_target(target_path, True) as target:
+        concatenate(target, open_sources(sources[:1]), 16, True)
+
+    assert target_path.read_bytes() == b"old\na1\na2\n", "Not expected return"
+
+
+def test_copy_data_fallback(tmp_path, sources, monkeypatch):
+    """
+    Test data is copied through buffer when kernel copy is refused
+    """
+    def refuse(source_fd, target_fd, count):
+        raise OSError(errno.EXDEV, "Cross-device link")
+
+    monkeypatch.setattr(file_concat, "kernel_copies", lambda: [refuse])
+    target_path = tmp_path / "out"
+    with open_target(target_path, False) as target:
+        with open(sources[3], "rb", buffering=0) as source:
+            copied = copy_data(source, target, memoryview(bytearray(7)))
+
+    assert target_path.read_bytes() == sources[3].read_bytes(), \
+        "Not expected return"
+    assert copied == (len(sources[3].read_bytes()), b"\n"), \
+        "Not expected return"
+
+
+def test_copy_data_error_raised(tmp_path, sources, monkeypatch):
+    """
+    Test errors not asking for a fallback are raised
+    """
+    def fail(source_fd, target_fd, count):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(file_concat, "kernel_copies", lambda: [fail])
+    with open_target(tmp_path / "out", False) as target:
+        with open(sources[0], "rb", buffering=0) as source:
+            with pytest.raises(OSError):
+                copy_data(source, target, memoryview(bytearray(7)))
+
+
+def test_copy_data_buffered_source(tmp_path):
+    """
+    Test streams without file descriptor are copied through buffer
+    """
+    target_path = tmp_path / "out"
+    with open_target(target_path, False) as target:
+        copied = copy_data(io.BytesIO(b"in memory"), target,
+                           memoryview(bytearray(4)))
+
+    assert copied == (9, b"y"), "Not expected return"
+    assert target_path.read_bytes() == b"in memory", "Not expected return"
+
+
+def test_concatenate_compressed(tmp_path):
+    """
+    Test compressed sources are copied as members, plain sources
+    compressed with a newline added when missing
+    """
+    member = gzip.compress(b"compressed\n")
+    target_path = tmp_path / "out.gz"
+    with open_target(target_path, False) as target:
+        compressor = BlockCompressor(target, get_compression("gz"),
+                                     close_target=False)
+        size = concatenate_compressed(
+            target, [(io.BytesIO(member), True),
+                     (io.BytesIO(b"plain"), False),
+                     (io.BytesIO(b""), False),
+                     (io.BytesIO(member), True)], compressor, 4, True)
+
+    content = target_path.read_bytes()
+    assert size == 6, "Not expected return"
+    assert content.startswith(member), "Not expected return"
+    assert content.endswith(member), "Not expected return"
+    assert gzip.decompress(content) == \
+        b"compressed\nplain\ncompressed\n", "Not expected return"
@@ -0,0 +1,122 @@
+"""
+Testing FileManifest class
+"""
+import os
+import pytest
+from logfile.operations.file_manifest import FileManifest
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def file_system(tmp_path):
+    """
+    Setup directory with a file
+
+    Returns:
+        dict: Filesystem inside dictionary
+    """
+    main_dir = tmp_path / "main"
+    main_file1 = main_dir / "file1.txt"
+
+    main_dir.mkdir()
+    main_file1.write_text("1")
+
+    return {
+        "main": {
+            "dir": main_dir,
+            "file1": main_file1
+        }
+    }
+
+
+def test_needs_processing_new_file(file_system):
+    """
+    Test a file not recorded needs processing
+    """
+    manifest = FileManifest(file_system["main"]["dir"].as_posix())
+    target = file_system["main"]["file1"].as_posix()
+    assert manifest.needs_processing(target, "Op"), "Not expected return"
+
+
+def test_needs_processing_recorded_file(file_system):
+    """
+    Test a recorded file is skipped by the same operation only
+    """
+    manifest = FileManifest(file_system["main"]["dir"].as_posix())
+    target = file_system["main"]["file1"].as_posix()
+    assert manifest.record(target, "Op"), "Expected to be recorded"
+    assert not manifest.needs_processing(target, "Op")
+    assert manifest.needs_processing(target, "OtherOp")
+
+
+def test_needs_processing_changed_file(file_system):
+    """
+    Test a changed file needs processing and forgets operations
+    """
+    manifest = FileManifest(file_system["main"]["dir"].as_posix())
+    target = file_system["main"]["file1"].as_posix()
+    manifest.record(target, "Op")
+    file_system["main"]["file1"].write_text("changed")
+
+    assert manifest.needs_processing(target, "Op"), "Not expected return"
+    assert manifest.operations(target) == []
+
+
+def test_save_and_load(file_system):
+    """
+    Test manifest survives a save and load
+    """
+    workfolder = file_system["main"]["dir"].as_posix()
+    target = file_system["main"]["file1"].as_posix()
+    manifest = FileManifest(workfolder)
+    manifest.record(target, "Op")
+    assert manifest.save(), "Expected to be saved"
+    assert os.path.exists(manifest.path)
+
+    loaded = FileManifest(workfolder)
+    assert loaded.load(), "Expected to be loaded"
+    assert loaded.operations(target) == ["Op"]
+
+
+def test_load_missing_manifest(file_system):
+    """
+    Test loading returns false if no manifest is saved
+    """
+    manifest = FileManifest(file_system["main"]["dir"].as_posix())
+    assert not manifest.load(), "Not expected return"
+
+
+def test_save_workfolder_none():
+    """
+    Test manifest can not be saved without workfolder
+    """
+    manifest = FileManifest(None)
+    assert manifest.path == ""
+    assert not manifest.save(), "Not expected return"
+
+
+def test_rename(file_system):
+    """
+    Test a renamed file keeps its operations
+    """
+    manifest = FileManifest(file_system["main"]["dir"].as_posix())
+    old_path = file_system["main"]["file1"]
+    new_path = old_path.with_name("file1.txt.log")
+    manifest.record(old_path.as_posix(), "Op")
+    old_path.rename(new_path)
+
+    manifest.rename(old_path.as_posix(), new_path.as_posix())
+    assert manifest.operations(old_path.as_posix()) == []
+    assert not manifest.needs_processing(new_path.as_posix(), "Op")
+
+
+def test_remove(file_system):
+    """
+    Test a removed file is forgotten
+    """
+    manifest = FileManifest(file_system["main"]["dir"].as_posix())
+    target = file_system["main"]["file1"].as_posix()
+    manifest.record(target, "Op")
+    manifest.remove(target)
+    assert manifest.operations(target) == []
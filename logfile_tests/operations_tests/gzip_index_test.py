@@ -0,0 +1,181 @@
+"""
+Module contains tests for GzipIndex and IndexedGzipReader classes
+"""
+import io
+import os
+import gzip
+import zlib
+import pytest
+from logfile.operations.gzip_index import GzipIndex, IndexedGzipReader
+
+DATA = b"".join(b"Oct 17 12:00:00 host kernel: message %d\n" % index
+                for index in range(50000))
+
+
+def compress_flushed(data, every, mode):
+    """
+    Compresses data as a single gzip member with flush points
+
+    Args:
+        data(bytes): Data to compress
+        every(int): Uncompressed bytes between flush points
+        mode(int): zlib flush mode
+
+    Returns:
+        bytes: Gzip data
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    output = []
+    for start in range(0, len(data), every):
+        output.append(compressor.compress(data[start:start + every]))
+        output.append(compressor.flush(mode))
+    output.append(compressor.flush())
+    return b"".join(output)
+
+
+def compress_members(data, every):
+    """
+    Compresses data as concatenated gzip members
+
+    Args:
+        data(bytes): Data to compress
+        every(int): Uncompressed bytes in each member
+
+    Returns:
+        bytes: Gzip data
+    """
+    return b"".join(gzip.compress(data[start:start + every])
+                    for start in range(0, len(data), every))
+
+
+@pytest.fixture(name="gzip_file",
+                params=["plain", "sync", "full", "members"])
+def gzip_file_fixture(tmp_path, request):
+    """
+    Writes DATA compressed in different ways
+
+    Args:
+        tmp_path(Path): pathlib/pathlib2.Path object
+        request(FixtureRequest): Parameter naming the compression
+
+    Returns:
+        str: Filepath
+    """
+    compress = {
+        "plain": gzip.compress,
+        "sync": lambda data: compress_flushed(data, 100000,
+                                              zlib.Z_SYNC_FLUSH),
+        "full": lambda data: compress_flushed(data, 100000,
+                                              zlib.Z_FULL_FLUSH),
+        "members": lambda data: compress_members(data, 100000)
+    }[request.param]
+    target = tmp_path / f"{request.param}.log.gz"
+    target.write_bytes(compress(DATA))
+    return target.as_posix()
+
+
+def test_build(gzip_file):
+    """
+    Testing checkpoints are taken at members and flush points only
+    """
+    index = GzipIndex.build(gzip_file, spacing=300000)
+    assert index.uncompressed_size == len(DATA), "Not expected return"
+    offsets = [checkpoint.uncompressed_offset
+               for checkpoint in index.checkpoints]
+    assert offsets[0] == 0, "Not expected return"
+    assert offsets == sorted(offsets), "Not expected return"
+    if "plain" in gzip_file:
+        assert len(offsets) == 1, "Plain gzip has no restart points"
+    else:
+        assert len(offsets) > 3, "Not expected return"
+        assert all(second - first >= 300000
+                   for first, second in zip(offsets, offsets[1:]))
+
+
+def test_build_not_gzip(tmp_path):
+    """
+    Testing files not being gzip is not indexed
+    """
+    target = tmp_path / "text.txt"
+    target.write_text("text")
+    assert GzipIndex.build(target.as_posix()) is None
+    assert GzipIndex.build("Invalid/path.gz") is None
+
+
+def test_build_truncated(tmp_path):
+    """
+    Testing truncated gzip files is not indexed
+    """
+    target = tmp_path / "truncated.gz"
+    target.write_bytes(gzip.compress(DATA)[:1000])
+    assert GzipIndex.build(target.as_posix()) is None
+
+
+@pytest.mark.parametrize("offset", [0, 7, 123456, 1000000, len(DATA) - 10,
+                                    len(DATA) + 10])
+def test_reader_seek(gzip_file, offset):
+    """
+    Testing reading at an offset gives the data at that offset
+    """
+    index = GzipIndex.build(gzip_file, spacing=300000)
+    with IndexedGzipReader(gzip_file, index) as reader:
+        reader.read(500000)
+        assert reader.seek(offset) == min(offset, len(DATA))
+        assert reader.read(100) == DATA[offset:offset + 100]
+        reader.seek(0)
+        assert reader.read() == DATA, "Not expected result"
+
+
+def test_reader_seek_end(gzip_file):
+    """
+    Testing seeking from the end needs a built index
+    """
+    with IndexedGzipReader(gzip_file) as reader:
+        with pytest.raises(io.UnsupportedOperation):
+            reader.seek(-10, io.SEEK_END)
+
+    with IndexedGzipReader(gzip_file,
+                           GzipIndex.build(gzip_file)) as reader:
+        reader.seek(-10, io.SEEK_END)
+        assert reader.read() == DATA[-10:], "Not expected result"
+
+
+def test_reader_lines(gzip_file):
+    """
+    Testing reader can be wrapped to read lines
+    """
+    GzipIndex.load_or_build(gzip_file, spacing=300000)
+    raw = IndexedGzipReader.open(gzip_file)
+    with io.TextIOWrapper(io.BufferedReader(raw)) as text:
+        text.buffer.seek(len(DATA) // 2)
+        text.readline()
+        start = DATA.index(b"\n", len(DATA) // 2) + 1
+        end = DATA.index(b"\n", start) + 1
+        assert text.readline() == DATA[start:end].decode()
+
+
+def test_save_and_load(gzip_file):
+    """
+    Testing a saved index is loaded until the gzip file changes
+    """
+    index = GzipIndex.build(gzip_file, spacing=300000)
+    assert index.save(), "Not expected return"
+    assert os.path.exists(GzipIndex.sidecar_path(gzip_file))
+
+    loaded = GzipIndex.load(gzip_file)
+    assert loaded.checkpoints == index.checkpoints, "Not expected result"
+
+    with open(gzip_file, "ab") as handle:
+        handle.write(gzip.compress(b"appended\n"))
+    assert GzipIndex.load(gzip_file) is None, "Index should be outdated"
+
+
+def test_load_or_build(tmp_path):
+    """
+    Testing index is built and saved when missing
+    """
+    target = tmp_path / "messages.gz"
+    target.write_bytes(gzip.compress(DATA))
+    assert GzipIndex.load(target.as_posix()) is None
+    assert GzipIndex.load_or_build(target.as_posix())
+    assert GzipIndex.load(target.as_posix()), "Sidecar should be saved"
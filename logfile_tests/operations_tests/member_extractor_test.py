@@ -0,0 +1,208 @@
+"""
+Module contains tests for MemberExtractor class
+"""
+import io
+import gzip
+import pickle
+import tarfile
+import threading
+from pathlib import Path
+from logfile.operations.member_extractor import InFlightBytes, \
+    MemberExtractor, MemberFilter, ParallelDecompression, \
+    SharedDecompression
+
+
+def make_tar(members):
+    """
+    Builds an uncompressed tar in memory
+
+    Args:
+        members(dict): Member names and contents
+
+    Returns:
+        BytesIO: Tar data
+    """
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    data.seek(0)
+    return data
+
+
+def test_member_filter_include():
+    """
+    Testing only included members are accepted
+    """
+    member_filter = MemberFilter(include=["var/log/"], exclude=[])
+    assert member_filter.accepts("var/log/messages")
+    assert not member_filter.accepts("usr/bin/tool")
+
+
+def test_member_filter_exclude():
+    """
+    Testing excluded members are rejected even if included
+    """
+    member_filter = MemberFilter(include=["var/log/"], exclude=[".bin"])
+    assert not member_filter.accepts("var/log/dump.bin")
+    assert member_filter.accepts("var/log/messages")
+
+
+def test_member_filter_lets_archives_through_include():
+    """
+    Testing archives are accepted so their members can be matched
+    """
+    member_filter = MemberFilter(include=["var/log/"], exclude=[])
+    assert member_filter.accepts("firmware.tgz")
+    assert not MemberFilter(include=[], exclude=[".tgz"]).accepts(
+        "firmware.tgz")
+
+
+def test_extract_members_filtered(tmp_path):
+    """
+    Testing filtered members are not written
+    """
+    data = make_tar({"var/log/messages": b"log",
+                     "usr/bin/tool": b"binary"})
+    member_filter = MemberFilter(include=["var/log/"], exclude=[])
+    extractor = MemberExtractor(1024, member_filter=member_filter)
+    with tarfile.open(fileobj=data, mode="r|") as tar:
+        extractor.extract_members(tar, tmp_path)
+
+    messages = tmp_path / "var" / "log" / "messages"
+    assert extractor.produced == [messages.as_posix()]
+    assert messages.read_bytes() == b"log"
+    assert not (tmp_path / "usr").exists()
+
+
+def test_extract_members_without_filter(tmp_path):
+    """
+    Testing every member is written without a filter
+    """
+    data = make_tar({"a.txt": b"a", "b/c.txt": b"c"})
+    extractor = MemberExtractor(1)
+    with tarfile.open(fileobj=data, mode="r|") as tar:
+        extractor.extract_members(tar, tmp_path)
+
+    assert sorted(Path(path).name for path in extractor.produced) == \
+        ["a.txt", "c.txt"]
+    assert (tmp_path / "b" / "c.txt").read_bytes() == b"c"
+
+
+def test_make_directories(tmp_path):
+    """
+    Testing directories of members are created up front
+    """
+    data = make_tar({"a/b/c.txt": b"c", "a/d.txt": b"d", "e.txt": b"e"})
+    extractor = MemberExtractor(1024)
+    with tarfile.open(fileobj=data, mode="r:") as tar:
+        extractor.make_directories(tar.getmembers(), tmp_path)
+
+    assert (tmp_path / "a" / "b").is_dir()
+    assert not (tmp_path / "a" / "b" / "c.txt").exists()
+
+
+def test_extract_members_skips_links(tmp_path):
+    """
+    Testing links are only extracted when asked for
+    """
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        info = tarfile.TarInfo("link.txt")
+        info.type = tarfile.SYMTYPE
+        info.linkname = "target.txt"
+        tar.addfile(info)
+
+    for extract_links in [False, True]:
+        destination = tmp_path / str(extract_links)
+        destination.mkdir()
+        data.seek(0)
+        extractor = MemberExtractor(1024, extract_links=extract_links)
+        with tarfile.open(fileobj=data, mode="r:") as tar:
+            extractor.extract_members(tar, destination)
+        assert (destination / "link.txt").is_symlink() == extract_links
+
+
+def test_in_flight_bytes_lets_large_item_through():
+    """
+    Testing an item larger than the limit passes when nothing is in flight
+    """
+    in_flight = InFlightBytes(10)
+    in_flight.acquire(100)
+    assert in_flight.in_flight == 100, "Not expected return"
+    in_flight.release(100)
+    assert in_flight.in_flight == 0, "Not expected return"
+
+
+def test_in_flight_bytes_blocks_until_released():
+    """
+    Testing acquire waits while the limit is exceeded
+    """
+    in_flight = InFlightBytes(10)
+    in_flight.acquire(8)
+    acquired = threading.Event()
+
+    def acquire():
+        in_flight.acquire(5)
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.1), "Acquire should wait"
+    in_flight.release(8)
+    assert acquired.wait(5), "Acquire should continue after release"
+    thread.join()
+    assert in_flight.in_flight == 5, "Not expected return"
+
+
+def test_extract_members_parallel(tmp_path):
+    """
+    Testing compressed members are decompressed on threads, produced files
+    are recorded in member order
+    """
+    members = {f"log/messages.{index}.gz": gzip.compress(
+        f"log {index}".encode()) for index in range(20)}
+    members["log/broken.gz"] = b"not gzip"
+    data = make_tar(members)
+    extractor = MemberExtractor(
+        1024, parallel=ParallelDecompression(threads=4,
+                                             max_in_flight_bytes=64))
+    with tarfile.open(fileobj=data, mode="r|") as tar:
+        extractor.extract_members(tar, tmp_path)
+    extractor.finish()
+
+    expected = [(tmp_path / "log" / f"messages.{index}").as_posix()
+                for index in range(20)]
+    broken = (tmp_path / "log" / "broken.gz").as_posix()
+    assert extractor.produced == expected + [broken], "Not expected result"
+    assert extractor.kept_archives == [broken], "Not expected result"
+    assert (tmp_path / "log" / "messages.7").read_bytes() == b"log 7"
+    assert Path(broken).read_bytes() == b"not gzip"
+
+
+def test_shared_decompression_used_by_extractors(tmp_path):
+    """
+    Testing extractors given the same shared decompression keep its
+    threads running until it is shut down
+    """
+    parallel = ParallelDecompression(threads=2, max_in_flight_bytes=64)
+    shared = SharedDecompression(parallel)
+    executors = set()
+    for index in range(2):
+        extractor = MemberExtractor(1024, parallel=shared)
+        data = make_tar({f"{index}/messages.gz": gzip.compress(b"log")})
+        with tarfile.open(fileobj=data, mode="r|") as tar:
+            extractor.extract_members(tar, tmp_path)
+        extractor.finish()
+        executors.add(shared.executor("members"))
+    shared.shutdown()
+
+    assert len(executors) == 1, "Not expected return"
+    assert (tmp_path / "1" / "messages").read_bytes() == b"log"
+    assert shared.in_flight.in_flight == 0, "Not expected return"
+
+    copy = pickle.loads(pickle.dumps(shared))
+    assert copy.detached and copy.parallel == parallel, \
+        "Not expected return"
@@ -1,8 +1,10 @@
 """
 Testing OperationBase class
 """
+import gzip
 import pytest
 from logfile.operations.operation_base import OperationBase
+from logfile.operations.archive_filesystem import ArchiveFileSystem
 
 # pylint: disable=redefined-outer-name
 
@@ -15,6 +17,13 @@ class MockOperationBase(OperationBase):
         return True
 
 
+class MockArchiveReader(MockOperationBase):
+    """
+    Class is a mock of an operation reading files inside archives
+    """
+    READS_ARCHIVES = True
+
+
 @pytest.fixture
 def file_system(tmp_path):
     """
@@ -98,6 +107,23 @@ def test_recursive_instruction_is_none():
     assert not var.recursive_instruction
 
 
+def test_include_files_instruction():
+    """
+    Testing include_files_instruction
+    """
+    instructions = {"IncludeFiles": "var/log/|messages"}
+    var = MockOperationBase("test", instructions)
+    assert var.include_files_instruction == ["var/log/", "messages"]
+
+
+def test_include_files_instruction_is_none():
+    """
+    Testing include_files_instruction default value
+    """
+    var = MockOperationBase("test", None)
+    assert var.include_files_instruction == []
+
+
 def test_exclude_files_instruction():
     """
     Testing exclude_files_instruction
@@ -200,6 +226,61 @@ def test_get_files_recursive(file_system):
     assert sub_sub_file1 == files[2], "Not expected file"
 
 
+def test_get_files_archive_filesystem(tmp_path):
+    """
+    Test can get files inside archives
+    """
+    (tmp_path / "messages.1.gz").write_bytes(gzip.compress(b"1\n"))
+    files = MockOperationBase.get_files(tmp_path.as_posix(), False,
+                                        ArchiveFileSystem())
+    assert files == [], "Not expected count"
+
+    files = MockOperationBase.get_files(tmp_path.as_posix(), True,
+                                        ArchiveFileSystem())
+    expected = (tmp_path / "messages.1.gz" / "messages.1").as_posix()
+    assert files == [expected], "Not expected file"
+
+
+def test_list_files_skips_sidecars(tmp_path):
+    """
+    Test listing files skips manifest and gzip index sidecars
+    """
+    (tmp_path / "messages.1.gz").write_bytes(gzip.compress(b"1\n"))
+    (tmp_path / "messages.1.gz.gzidx").write_text("{}")
+    (tmp_path / ".logfile_manifest.json").write_text("{}")
+    operation = MockOperationBase(tmp_path.as_posix(), {})
+    files = list(operation.list_files(tmp_path.as_posix(), False))
+    expected = [(tmp_path / "messages.1.gz").as_posix()]
+    assert files == expected, "Not expected return"
+
+
+def test_browse_archives_instruction():
+    """
+    Test archive file system is only made with BrowseArchives
+    """
+    var = MockArchiveReader("", {"BrowseArchives": "True"})
+    assert var.browse_archives_instruction, "Not expected return"
+    assert isinstance(var.archive_filesystem, ArchiveFileSystem), \
+        "Not expected return"
+
+    var = MockOperationBase("", {})
+    assert not var.browse_archives_instruction, "Not expected return"
+    assert var.archive_filesystem is None, "Not expected return"
+
+
+def test_browse_archives_ignored_without_archive_reading(tmp_path):
+    """
+    Test operations not reading archives are never given paths inside
+    archives
+    """
+    (tmp_path / "messages.1.gz").write_bytes(gzip.compress(b"1\n"))
+    var = MockOperationBase(tmp_path.as_posix(), {"BrowseArchives": "True"})
+    assert var.archive_filesystem is None, "Not expected return"
+    files = list(var.list_files(tmp_path.as_posix(), True))
+    expected = [(tmp_path / "messages.1.gz").as_posix()]
+    assert files == expected, "Not expected return"
+
+
 def test_get_files_arg_none():
     """
     Test it return empty list if arg is none
@@ -216,6 +297,44 @@ def test_get_files_dir_do_not_exists():
     assert files == [], "There should not be found any file"
 
 
+def test_get_files_extensionless(file_system):
+    """
+    Test files without extension is found
+    """
+    messages = file_system["sub"]["dir"] / "messages"
+    messages.write_text("test")
+    files = MockOperationBase.get_files(file_system["main"]["dir"], True)
+    assert len(files) == 4, "Not expected count"
+    assert messages.as_posix() in files, "Expected extensionless file"
+
+
+def test_walk_files_is_lazy(file_system):
+    """
+    Test walk_files yields files one at a time
+    """
+    walker = MockOperationBase.walk_files(file_system["main"]["dir"], True)
+    main_file1 = file_system["main"]["file1"].as_posix()
+    assert next(walker) == main_file1, "Not expected file"
+    assert len(list(walker)) == 2, "Not expected count"
+
+
+def test_walk_files_arg_none():
+    """
+    Test walk_files yields nothing if arg is none
+    """
+    assert list(MockOperationBase.walk_files(None, True)) == []
+
+
+def test_walk_directories_recursive(file_system):
+    """
+    Test walk_directories yields sub directories in pre-order
+    """
+    main_dir = file_system["main"]["dir"]
+    directories = list(MockOperationBase.walk_directories(main_dir, True))
+    assert directories == [file_system["sub"]["dir"].as_posix(),
+                           file_system["subsub"]["dir"].as_posix()]
+
+
 def test_get_directories(file_system):
     """
     Test can get sub directories from directory
@@ -331,3 +450,63 @@ def test_sort_type_instruction_is_none():
     """
     var = MockOperationBase(None, None)
     assert var.sort_type_instruction == "None", "Not expected value"
+
+
+def test_workers_instruction():
+    """
+    Testing get workers instruction
+    """
+    var = MockOperationBase(None, {"Workers": "4"})
+    assert var.workers_instruction == 4, "Not expected value"
+
+
+def test_workers_instruction_invalid():
+    """
+    Testing get default workers if instruction is not a number
+    """
+    var = MockOperationBase(None, {"Workers": "many"})
+    assert var.workers_instruction == 1, "Not expected value"
+
+
+def test_executor_instruction_is_none():
+    """
+    Testing get default executor
+    """
+    var = MockOperationBase(None, None)
+    assert var.executor_instruction == "thread", "Not expected value"
+
+
+def fail_on_two(item: int) -> bool:
+    """
+    Work function failing on item 2
+    """
+    if item == 2:
+        raise ValueError("two")
+    return item != 3
+
+
+@pytest.mark.parametrize("instructions", [
+    None,
+    {"Workers": "3", "Executor": "thread"},
+    {"Workers": "3", "Executor": "process"}
+])
+def test_run_items(instructions):
+    """
+    Testing run_items collects success and failure of every item
+    """
+    var = MockOperationBase(None, instructions)
+    results = sorted(var.run_items(fail_on_two, range(1, 6)))
+
+    assert [result.item for result in results] == [1, 2, 3, 4, 5]
+    assert [result.success for result in results] == \
+        [True, False, False, True, True]
+    assert len(var.failed_items) == 1, "Expected one failed item"
+    assert var.failed_items[0].item == 2, "Not expected item"
+
+
+def test_buffer_size_instruction_is_none():
+    """
+    Testing get default buffer size
+    """
+    var = MockOperationBase(None, None)
+    assert var.buffer_size_instruction == 1024 * 1024, "Not expected value"
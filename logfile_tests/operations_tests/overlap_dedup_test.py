@@ -0,0 +1,97 @@
+"""
+Module contains tests for removal of lines repeated between files
+"""
+import io
+from logfile.operations.overlap_dedup import OverlapFilter, find_overlap
+
+
+def lines_of(*names):
+    """
+    Get lines of names
+
+    Args:
+        names(str): Line contents
+
+    Returns:
+        list: Lines ending with newline
+    """
+    return [f"{name}\n".encode() for name in names]
+
+
+def merge(overlap, contents, buffer_size=4):
+    """
+    Streams contents through overlap filter
+
+    Args:
+        overlap(OverlapFilter): Filter
+        contents(list): Bytes of every source
+        buffer_size(int): Bytes read at a time
+
+    Returns:
+        bytes: Merged data
+    """
+    return b"".join(data for content in contents
+                    for data in overlap.filter(io.BytesIO(content),
+                                               buffer_size))
+
+
+def test_find_overlap():
+    """
+    Test longest run of lines ending tail and starting head is found
+    """
+    tail = lines_of("a", "b", "c", "c")
+    assert find_overlap(tail, lines_of("b", "c", "c", "d")) == 3, \
+        "Not expected return"
+    assert find_overlap(tail, lines_of("c", "c", "c")) == 2, \
+        "Not expected return"
+    assert find_overlap(tail, lines_of("d")) == 0, "Not expected return"
+    assert find_overlap(tail, []) == 0, "Not expected return"
+
+
+def test_find_overlap_min_lines():
+    """
+    Test overlaps shorter than min lines are kept
+    """
+    tail = lines_of("a", "")
+    assert find_overlap(tail, lines_of("", "b"), 2) == 0, \
+        "Not expected return"
+    assert find_overlap(tail, lines_of("", "b")) == 1, "Not expected return"
+
+
+def test_filter_drops_overlap():
+    """
+    Test lines repeated from the end of the previous source are dropped
+    """
+    overlap = OverlapFilter(1024)
+    merged = merge(overlap, [b"1\n2\n3\n", b"", b"2\n3\n4\n", b"5\n"])
+    assert merged == b"1\n2\n3\n4\n5\n", "Not expected return"
+    assert overlap.dropped == 2, "Not expected return"
+
+
+def test_filter_whole_duplicate_without_newline():
+    """
+    Test a source repeating the end, but not ending with a newline, is
+    dropped with EnsureNewline
+    """
+    merged = merge(OverlapFilter(1024), [b"1\n2", b"2", b"3"])
+    assert merged == b"1\n2\n3\n", "Not expected return"
+
+    merged = merge(OverlapFilter(1024, ensure_newline=False),
+                   [b"1\n2\n", b"2"])
+    assert merged == b"1\n2\n2", "Not expected return"
+
+
+def test_filter_window():
+    """
+    Test overlaps inside window are dropped and longer overlaps kept
+    """
+    first = b"".join(lines_of(*range(100)))
+    second = b"".join(lines_of(*range(50, 150)))
+    overlap = OverlapFilter(200)
+    merged = merge(overlap, [first, second])
+    assert merged == first + b"".join(lines_of(*range(100, 150))), \
+        "Not expected return"
+    assert overlap.dropped == 50, "Not expected return"
+
+    merged = merge(OverlapFilter(100), [first, second])
+    assert merged == first + second, "Not expected return"
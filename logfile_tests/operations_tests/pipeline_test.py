@@ -0,0 +1,108 @@
+"""
+Testing PipelineRunner class
+"""
+import gzip
+import json
+import tarfile
+import pytest
+from logfile.operations.pipeline import PipelineRunner
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+from logfile.operations.types.unzip_files import UnzipFiles
+from logfile.operations.types.convert_files import ConvertFiles
+from logfile.operations.types.merge_files import MergeFiles
+from logfile.operations.types.pretty_json import PrettyJson
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def file_system(tmp_path):
+    """
+    Setup a bundle with rotated logs and a json file
+
+    Returns:
+        dict: Filesystem inside dictionary
+    """
+    content_dir = tmp_path / "content"
+    content_dir.mkdir()
+    for number in range(1, 4):
+        with gzip.open((content_dir / f"messages.{number}.gz").as_posix(),
+                       'wt') as handle:
+            handle.write(f"line{number}")
+    (content_dir / "config.json").write_text('{"b":1,"a":2}')
+
+    main_dir = tmp_path / "main"
+    main_dir.mkdir()
+    bundle = main_dir / "bundle.tgz"
+    with tarfile.open(bundle.as_posix(), "w:gz") as tar:
+        for path in sorted(content_dir.iterdir()):
+            tar.add(path.as_posix(), arcname=path.name)
+
+    return {
+        "main": {
+            "dir": main_dir,
+            "bundle": bundle,
+            "extracted": main_dir / "bundle"
+        }
+    }
+
+
+PIPELINE = [
+    (UnzipFiles, {"Recursive": "True"}),
+    (ConvertFiles, {"Recursive": "True", "ExcludeExtensions": ".json"}),
+    (MergeFiles, {"Recursive": "True",
+                  "RegexExpression": r"messages\.(\d)\.log$",
+                  "OutputName": "messages.txt",
+                  "SortType": "HighLow",
+                  "Delete": "True"}),
+    (PrettyJson, {})
+]
+
+
+def test_run(file_system):
+    """
+    Test files goes through every operation in a single pass
+    """
+    workfolder = file_system["main"]["dir"].as_posix()
+    runner = PipelineRunner(workfolder, PIPELINE)
+    assert runner.run(), "Expected to run successfully"
+
+    extracted = file_system["main"]["extracted"]
+    assert not file_system["main"]["bundle"].exists()
+    assert sorted(path.name for path in extracted.iterdir()) == \
+        ["config.json", "messages.txt"]
+    assert (extracted / "messages.txt").read_text() == \
+        "line3\nline2\nline1\n"
+    config = (extracted / "config.json").read_text()
+    assert config == json.dumps({"a": 2, "b": 1}, sort_keys=True, indent=4)
+
+
+def test_run_with_snapshot(file_system):
+    """
+    Test pipeline keeps a shared snapshot up to date
+    """
+    workfolder = file_system["main"]["dir"].as_posix()
+    snapshot = WorkfolderSnapshot(workfolder)
+    assert PipelineRunner(workfolder, PIPELINE, snapshot).run()
+
+    extracted = file_system["main"]["extracted"].as_posix()
+    files = list(snapshot.files(workfolder, True))
+    assert files == [extracted + "/config.json",
+                     extracted + "/messages.txt"]
+
+
+def test_run_operation_without_files(file_system):
+    """
+    Test pipeline fails when an operation affected no files
+    """
+    workfolder = file_system["main"]["dir"].as_posix()
+    pipeline = [(MergeFiles, {"RegexExpression": "nothing",
+                              "OutputName": "out.txt"})]
+    assert not PipelineRunner(workfolder, pipeline).run()
+
+
+def test_run_workfolder_none():
+    """
+    Test pipeline can not run without workfolder
+    """
+    assert not PipelineRunner(None, PIPELINE).run()
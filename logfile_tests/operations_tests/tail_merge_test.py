@@ -0,0 +1,145 @@
+"""
+Module contains tests for incremental tail merging
+"""
+import io
+import pytest
+from logfile.operations.tail_merge import HEAD_SIZE, NO_INODE, \
+    TailSource, TailState, merge_tail
+
+
+def state_of(path, identity, content, offset):
+    """
+    Get state of a source merged up to offset
+
+    Args:
+        path(str): Source path
+        identity(tuple): Device and inode
+        content(bytes): Content of source when merged
+        offset(int): Bytes merged
+
+    Returns:
+        SourceState: State of source
+    """
+    source = TailSource(path, identity, content[:HEAD_SIZE], offset, False)
+    return merge_tail(io.BytesIO(), source,
+                      lambda _: io.BytesIO(content[:offset]), 1024, True)
+
+
+@pytest.fixture(name="state")
+def state_fixture():
+    """
+    Get state of 'app.log' at inode 1 merged up to 4 bytes
+
+    Returns:
+        TailState: State of output
+    """
+    return TailState([state_of("app.log", (0, 1), b"a\nb\n", 4)])
+
+
+def test_resolve_grown(state):
+    """
+    Test a grown file continues at its offset
+    """
+    found = state.resolve([("app.log", (0, 1), b"a\nb\nc\n")])
+    assert found[0].offset == 4, "Not expected return"
+    assert not found[0].rotated, "Not expected return"
+
+
+def test_resolve_renamed(state):
+    """
+    Test a file renamed by rotation continues and is rotated, the new
+    file starts from the beginning
+    """
+    found = state.resolve([("app.log.1", (0, 1), b"a\nb\n"),
+                           ("app.log", (0, 2), b"c\n")])
+    assert found[0][3:] == (4, True), "Not expected return"
+    assert found[1][3:] == (0, False), "Not expected return"
+
+
+def test_resolve_copytruncate(state):
+    """
+    Test a copy continues where the file was merged, the truncated file
+    starts from the beginning
+    """
+    found = state.resolve([("app.log.1", (0, 3), b"a\nb\nx\n"),
+                           ("app.log", (0, 1), b"")])
+    assert found[0][3:] == (4, True), "Not expected return"
+    assert found[1][3:] == (0, False), "Not expected return"
+
+
+def test_resolve_rewritten(state):
+    """
+    Test a file not starting like it did is merged from the beginning
+    """
+    found = state.resolve([("app.log", (0, 1), b"z\n")])
+    assert found[0].offset == 0, "Not expected return"
+
+
+def test_resolve_virtual():
+    """
+    Test files without inode are found by their first bytes only
+    """
+    state = TailState([state_of("a.log", NO_INODE, b"a\n", 2),
+                       state_of("b.log", NO_INODE, b"b\n", 2)])
+    found = state.resolve([("b.log", NO_INODE, b"b\nc\n")])
+    assert found[0].offset == 2, "Not expected return"
+
+
+def test_merge_tail_holds_partial_line():
+    """
+    Test a last line without newline is held back unless rotated
+    """
+    content = b"a\nb\npart"
+    source = TailSource("app.log", (0, 1), content, 2, False)
+    target = io.BytesIO()
+    merged = merge_tail(target, source, lambda _: io.BytesIO(content), 3,
+                        True)
+    assert target.getvalue() == b"b\n", "Not expected return"
+    assert merged.offset == 4, "Not expected return"
+
+    target = io.BytesIO()
+    merged = merge_tail(target, source._replace(rotated=True),
+                        lambda _: io.BytesIO(content), 3, True)
+    assert target.getvalue() == b"b\npart\n", "Not expected return"
+    assert merged.offset == len(content), "Not expected return"
+
+
+def test_merge_tail_truncated():
+    """
+    Test a source shorter than its offset is merged from the start
+    """
+    content = b"x" * HEAD_SIZE + b"\n"
+    source = TailSource("app.log", (0, 1), content, HEAD_SIZE + 100, False)
+    target = io.BytesIO()
+    merged = merge_tail(target, source, lambda _: io.BytesIO(content), 1024,
+                        True)
+    assert target.getvalue() == content, "Not expected return"
+    assert merged.offset == len(content), "Not expected return"
+
+
+def test_state_save_load(tmp_path, state):
+    """
+    Test saved state is loaded while output is unchanged
+    """
+    output = tmp_path / "out.txt"
+    output.write_bytes(b"a\nb\n")
+    assert state.save(output.as_posix()), "Not expected return"
+    assert TailState.load(output.as_posix()).sources == state.sources, \
+        "Not expected return"
+
+    output.write_bytes(b"changed")
+    assert TailState.load(output.as_posix()).sources == [], \
+        "Not expected return"
+
+
+def test_state_load_missing(tmp_path):
+    """
+    Test missing and corrupt state is empty
+    """
+    output = tmp_path / "out.txt"
+    assert TailState.load(output.as_posix()).sources == [], \
+        "Not expected return"
+    output.write_bytes(b"")
+    (tmp_path / "out.txt.tail.json").write_text("{")
+    assert TailState.load(output.as_posix()).sources == [], \
+        "Not expected return"
@@ -0,0 +1,82 @@
+"""
+Module contains tests for timestamp ordered merging of log records
+"""
+import re
+from datetime import datetime
+from logfile.operations.timestamp_merge import DEFAULT_TIMESTAMP_REGEX, \
+    TimestampOrder, merge_records, read_records
+
+
+def test_key_text():
+    """
+    Test timestamps are compared as text without format
+    """
+    order = TimestampOrder(re.compile(DEFAULT_TIMESTAMP_REGEX))
+    assert order.key("2024-10-17T12:00:01 host a") == "2024-10-17T12:00:01", \
+        "Not expected return"
+    assert order.key("    at Trace.java:12") is None, "Not expected return"
+
+
+def test_key_format():
+    """
+    Test timestamps are parsed with format, timezones compared in UTC
+    """
+    order = TimestampOrder(re.compile(r"^(\S+)"), "%Y-%m-%dT%H:%M:%S%z")
+    assert order.key("2024-10-17T14:00:00+0200 a") == \
+        datetime(2024, 10, 17, 12), "Not expected return"
+    assert order.key("not-a-time a") is None, "Not expected return"
+
+
+def test_read_records_multi_line():
+    """
+    Test lines without timestamp belong to the record before them
+    """
+    order = TimestampOrder(re.compile(DEFAULT_TIMESTAMP_REGEX))
+    lines = ["header\n",
+             "2024-10-17 12:00:00 error\n",
+             "  trace 1\n",
+             "  trace 2\n",
+             "2024-10-17 12:00:01 ok"]
+
+    records = list(read_records(lines, order))
+    assert records == [
+        ("", "header\n"),
+        ("2024-10-17 12:00:00", "2024-10-17 12:00:00 error\n  trace 1\n"
+                                "  trace 2\n"),
+        ("2024-10-17 12:00:01", "2024-10-17 12:00:01 ok\n")
+    ], "Not expected return"
+
+
+def test_merge_records():
+    """
+    Test records of several files are interleaved by timestamp
+    """
+    order = TimestampOrder(re.compile(r"^(\w{3} [ \d]\d \d\d:\d\d:\d\d)"),
+                           "%b %d %H:%M:%S")
+    first = ["Oct  9 10:00:00 a 1\n", "Oct 10 10:00:00 a 2\n"]
+    second = ["Oct  9 11:00:00 b 1\n", "  b trace\n",
+              "Oct 10 10:00:00 b 2\n"]
+
+    merged = list(merge_records([first, second], order))
+    assert merged == ["Oct  9 10:00:00 a 1\n",
+                      "Oct  9 11:00:00 b 1\n  b trace\n",
+                      "Oct 10 10:00:00 a 2\n",
+                      "Oct 10 10:00:00 b 2\n"], "Not expected return"
+
+
+def test_merge_records_lazy():
+    """
+    Test sources are read lazily, one record at a time
+    """
+    order = TimestampOrder(re.compile(DEFAULT_TIMESTAMP_REGEX))
+    read = []
+
+    def source(name, count):
+        for index in range(count):
+            read.append(name)
+            yield f"2024-10-17 12:00:{index:02d} {name}\n"
+
+    merged = merge_records([source("a", 50), source("b", 50)], order)
+    next(merged)
+    assert len(read) <= 4, "Not expected return"
+    assert len(list(merged)) == 99, "Not expected return"
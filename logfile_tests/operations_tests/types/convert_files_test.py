@@ -306,3 +306,38 @@ def test_run_exclude_files(file_system):
     var = ConvertFiles(test_workfolder, test_instructions)
     assert var.run(), "This should return True"
     assert file_system["main"]["file2"].exists(), "This should exists"
+
+
+def test_run_incremental(file_system):
+    """
+    Testing incremental run do not convert converted files again
+    """
+    test_workfolder = file_system["main"]["dir"]
+    test_instructions = {
+        "Directory": "*",
+        "Recursive": "False",
+        "Incremental": "True"
+    }
+    assert ConvertFiles(test_workfolder, test_instructions).run()
+    assert ConvertFiles(test_workfolder, test_instructions).run()
+
+    main_file1 = Path(file_system["main"]["file1"].as_posix() + ".log")
+    assert main_file1.exists(), "This should exists"
+    assert not Path(main_file1.as_posix() + ".log").exists()
+
+
+def test_run_workers(file_system):
+    """
+    Testing files can be converted by a thread pool
+    """
+    test_instructions = {
+        "Recursive": "True",
+        "Workers": "4"
+    }
+    var = ConvertFiles(file_system["main"]["dir"], test_instructions)
+    assert var.run(), "This should return True"
+
+    for name in ("file1", "file2", "file3"):
+        for directory in ("main", "sub"):
+            converted = file_system[directory][name].as_posix() + ".log"
+            assert Path(converted).exists(), "This should exists"
@@ -2,9 +2,14 @@
 Module contains tests for MergeFiles
 """
 
+import io
 import re
+import gzip
+import lzma
+import tarfile
 import pytest
-from logfile.operations.types.merge_files import MergeFiles
+from logfile.operations.types.merge_files import MergeFiles, MergeInputs
+from logfile.operations.gzip_index import GzipIndex, IndexedGzipReader
 
 # pylint: disable=redefined-outer-name
 
@@ -118,6 +123,19 @@ def test_sort_files():
     assert sorted_files[2] == "c:/test/path/test3.txt"
 
 
+def test_sort_files_logrotate():
+    """
+    Test numbers are sorted as numbers and files without number first
+    """
+    regex = re.compile(r"messages(?:\.(\d+))?(?:\.gz)?$")
+    test_files = ["log/messages.10.gz", "log/messages.2.gz",
+                  "log/messages", "log/messages.1"]
+    sorted_files = MergeFiles.sort_files(test_files, regex)
+
+    assert sorted_files == ["log/messages", "log/messages.1",
+                            "log/messages.2.gz", "log/messages.10.gz"]
+
+
 def test_sort_files_no_regex_match():
     """
     Test it returns the same file order if no match
@@ -423,3 +441,468 @@ def test_run_workfolder_none():
     var = MergeFiles(None, instructions)
     run_success = var.run()
     assert not run_success
+
+
+def test_run_incremental_delete(file_system):
+    """
+    Test incremental run appends new files to earlier output
+    """
+    instructions = {
+        "Directory": "*",
+        "Recursive": "False",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.txt",
+        "SortType": "LowHigh",
+        "Delete": "True",
+        "Incremental": "True"
+    }
+    workfolder = file_system["main"]["dir"].as_posix()
+    assert MergeFiles(workfolder, instructions).run()
+
+    (file_system["main"]["dir"] / "file4.txt").write_text("4")
+    assert MergeFiles(workfolder, instructions).run()
+
+    output_file = file_system["main"]["dir"] / "out.txt"
+    assert output_file.read_text() == "1\n2\n3\n4\n"
+
+
+def test_run_incremental_no_changes(file_system):
+    """
+    Test incremental run do not merge again when nothing changed
+    """
+    instructions = {
+        "Directory": "*",
+        "Recursive": "False",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.txt",
+        "Incremental": "True"
+    }
+    workfolder = file_system["main"]["dir"].as_posix()
+    assert MergeFiles(workfolder, instructions).run()
+
+    output_file = file_system["main"]["dir"] / "out.txt"
+    mtime = output_file.stat().st_mtime_ns
+    assert MergeFiles(workfolder, instructions).run()
+    assert output_file.stat().st_mtime_ns == mtime, "Should not be merged"
+
+
+def test_run_browse_archives(tmp_path):
+    """
+    Test files inside archives are merged without extracting the archive
+    """
+    with tarfile.open(tmp_path / "bundle.tgz", "w:gz") as tar:
+        for index in range(1, 4):
+            data = str(index).encode()
+            info = tarfile.TarInfo(f"logs/file{index}.txt")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    instructions = {
+        "Directory": "*",
+        "Recursive": "True",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.txt",
+        "SortType": "HighLow",
+        "Delete": "True",
+        "BrowseArchives": "True"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    output_file = tmp_path / "bundle" / "logs" / "out.txt"
+    assert output_file.read_text() == "3\n2\n1\n"
+    assert (tmp_path / "bundle.tgz").exists(), "Archive should not change"
+
+
+def test_run_sort_timestamp(tmp_path):
+    """
+    Test lines of all files are merged in timestamp order
+    """
+    (tmp_path / "daemon1.log").write_text(
+        "2024-10-17 12:00:00 d1 start\n"
+        "2024-10-17 12:00:02 d1 error\n"
+        "  trace\n")
+    (tmp_path / "daemon2.log").write_text(
+        "2024-10-17 12:00:01 d2 start\n"
+        "2024-10-17 12:00:03 d2 stop")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"daemon\d\.log",
+        "OutputName": "out.txt",
+        "SortType": "Timestamp"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_text() == \
+        "2024-10-17 12:00:00 d1 start\n" \
+        "2024-10-17 12:00:01 d2 start\n" \
+        "2024-10-17 12:00:02 d1 error\n" \
+        "  trace\n" \
+        "2024-10-17 12:00:03 d2 stop\n"
+
+
+def test_run_sort_timestamp_format(tmp_path):
+    """
+    Test timestamps are parsed with TimestampRegex and TimestampFormat
+    """
+    (tmp_path / "messages.1").write_text("Oct  9 23:59:59 host old\n")
+    (tmp_path / "messages").write_text("Oct 10 00:00:00 host new\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"messages",
+        "OutputName": "out.txt",
+        "SortType": "Timestamp",
+        "TimestampRegex": r"^(\w{3} [ \d]\d \d\d:\d\d:\d\d)",
+        "TimestampFormat": "%b %d %H:%M:%S"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_text() == \
+        "Oct  9 23:59:59 host old\nOct 10 00:00:00 host new\n"
+
+
+def test_run_binary_merge(tmp_path):
+    """
+    Test files are concatenated as bytes, newline added only when missing
+    """
+    (tmp_path / "file1.txt").write_bytes(b"1\n")
+    (tmp_path / "file2.txt").write_bytes(b"2")
+    (tmp_path / "file3.txt").write_bytes(b"\xff3\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.txt",
+        "SortType": "LowHigh",
+        "BinaryMerge": "True"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_bytes() == b"1\n2\n\xff3\n"
+
+
+def test_run_binary_merge_no_newline(tmp_path):
+    """
+    Test files are concatenated as they are without EnsureNewline
+    """
+    (tmp_path / "file1.txt").write_bytes(b"1")
+    (tmp_path / "file2.txt").write_bytes(b"2")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.txt",
+        "SortType": "LowHigh",
+        "BinaryMerge": "True",
+        "EnsureNewline": "False"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_bytes() == b"12"
+
+
+@pytest.mark.parametrize("binary", ["False", "True"])
+def test_run_decompress(tmp_path, binary):
+    """
+    Test rotated compressed logs are merged decompressed, oldest first
+    """
+    (tmp_path / "messages").write_bytes(b"0")
+    (tmp_path / "messages.1").write_bytes(b"1")
+    for index in (2, 10):
+        (tmp_path / f"messages.{index}.gz").write_bytes(
+            gzip.compress(str(index).encode()))
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"messages(?:\.(\d+))?(?:\.gz)?$",
+        "OutputName": "out.txt",
+        "SortType": "HighLow",
+        "BinaryMerge": binary,
+        "Decompress": "True"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_text() == "10\n2\n1\n0\n"
+
+
+def test_run_decompress_timestamp(tmp_path):
+    """
+    Test compressed logs are merged in timestamp order
+    """
+    (tmp_path / "a.log.gz").write_bytes(gzip.compress(
+        b"2024-10-17 12:00:00 a\n2024-10-17 12:00:02 a\n"))
+    (tmp_path / "b.log").write_bytes(b"2024-10-17 12:00:01 b\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"\.log",
+        "OutputName": "out.txt",
+        "SortType": "Timestamp",
+        "Decompress": "True"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_text() == \
+        "2024-10-17 12:00:00 a\n2024-10-17 12:00:01 b\n" \
+        "2024-10-17 12:00:02 a\n"
+
+
+def test_run_decompress_indexed(tmp_path):
+    """
+    Test indexed gzip logs are read through their index and the index
+    sidecar is not merged
+    """
+    log = tmp_path / "a.log.gz"
+    log.write_bytes(gzip.compress(b"a\n") + gzip.compress(b"b\n"))
+    assert GzipIndex.load_or_build(log.as_posix())
+    with MergeInputs(decompress=True).open(log.as_posix()) as handle:
+        assert isinstance(handle.raw, IndexedGzipReader), \
+            "Not expected return"
+        handle.seek(2)
+        assert handle.read() == b"b\n", "Not expected return"
+
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"\.log",
+        "OutputName": "out.txt",
+        "BinaryMerge": "True",
+        "Decompress": "True"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_text() == "a\nb\n"
+
+
+def test_run_gzip_output(tmp_path):
+    """
+    Test gzip files are appended to gzip output without recompression
+    """
+    members = {index: gzip.compress(f"{index}\n".encode())
+               for index in (2, 3)}
+    for index, member in members.items():
+        (tmp_path / f"messages.{index}.gz").write_bytes(member)
+    (tmp_path / "messages.1").write_bytes(b"1\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"messages(?:\.(\d+))?(?:\.gz)?$",
+        "OutputName": "out.gz",
+        "SortType": "HighLow"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    content = (tmp_path / "out.gz").read_bytes()
+    assert content.startswith(members[3] + members[2]), \
+        "Gzip files should be copied as they are"
+    assert gzip.decompress(content) == b"3\n2\n1\n"
+
+
+def test_run_gzip_output_timestamp(tmp_path):
+    """
+    Test timestamp merge writes compressed output
+    """
+    (tmp_path / "a.log").write_text("2024-10-17 12:00:01 a\n")
+    (tmp_path / "b.log").write_text("2024-10-17 12:00:00 b\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"\.log$",
+        "OutputName": "out.gz",
+        "SortType": "Timestamp"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert gzip.decompress((tmp_path / "out.gz").read_bytes()) == \
+        b"2024-10-17 12:00:00 b\n2024-10-17 12:00:01 a\n"
+
+
+@pytest.mark.parametrize("threads", ["1", "4"])
+def test_run_output_compression_xz(tmp_path, threads):
+    """
+    Test output is compressed with OutputCompression, xz inputs appended
+    """
+    member = lzma.compress(b"1\n")
+    (tmp_path / "file1.txt.xz").write_bytes(member)
+    (tmp_path / "file2.txt").write_bytes(b"2\n" * 100000)
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.log",
+        "SortType": "LowHigh",
+        "OutputCompression": "xz",
+        "CompressionThreads": threads
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    content = (tmp_path / "out.log").read_bytes()
+    assert content.startswith(member), "Xz files should be copied as is"
+    assert lzma.decompress(content) == b"1\n" + b"2\n" * 100000
+
+
+def test_run_output_compression_none(tmp_path):
+    """
+    Test OutputCompression None writes plain output to a '.gz' name
+    """
+    (tmp_path / "file1.txt").write_text("1")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.gz",
+        "OutputCompression": "None"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.gz").read_text() == "1\n"
+
+
+def test_run_output_compression_timestamp(tmp_path):
+    """
+    Test timestamp merge writes compressed output with threads
+    """
+    (tmp_path / "a.log").write_text("2024-10-17 12:00:01 a\n")
+    (tmp_path / "b.log").write_text("2024-10-17 12:00:00 b\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"\.log$",
+        "OutputName": "out.txt",
+        "SortType": "Timestamp",
+        "OutputCompression": "gz",
+        "CompressionThreads": "2"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert gzip.decompress((tmp_path / "out.txt").read_bytes()) == \
+        b"2024-10-17 12:00:00 b\n2024-10-17 12:00:01 a\n"
+
+
+@pytest.fixture(name="tail_instructions")
+def tail_instructions_fixture():
+    """
+    Instructions tail merging rotated 'app.log' files, oldest first
+    """
+    return {
+        "Directory": "*",
+        "RegexExpression": r"app\.log(?:\.(\d+))?$",
+        "OutputName": "out.txt",
+        "SortType": "HighLow",
+        "TailMerge": "True"
+    }
+
+
+def test_run_tail_merge_growing(tmp_path, tail_instructions):
+    """
+    Test only data added to a growing file is appended, a partial last
+    line is held back until it is completed
+    """
+    log = tmp_path / "app.log"
+    out = tmp_path / "out.txt"
+    log.write_bytes(b"a\nb\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    inode = out.stat().st_ino
+
+    with log.open("ab") as handle:
+        handle.write(b"c\npart")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    assert out.read_bytes() == b"a\nb\nc\n"
+
+    with log.open("ab") as handle:
+        handle.write(b"ial\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    assert out.read_bytes() == b"a\nb\nc\npartial\n"
+    assert out.stat().st_ino == inode, "Output should be appended to"
+    assert (tmp_path / "out.txt.tail.json").exists()
+
+
+def test_run_tail_merge_rotated(tmp_path, tail_instructions):
+    """
+    Test a file renamed by rotation continues where it was merged
+    """
+    log = tmp_path / "app.log"
+    log.write_bytes(b"a\nb")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    assert (tmp_path / "out.txt").read_bytes() == b"a\n"
+
+    log.rename(tmp_path / "app.log.1")
+    log.write_bytes(b"c\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+
+    assert (tmp_path / "out.txt").read_bytes() == b"a\nb\nc\n"
+
+
+def test_run_tail_merge_copytruncate(tmp_path, tail_instructions):
+    """
+    Test a copy made by copytruncate continues where the file was merged
+    and the truncated file is merged from its start
+    """
+    log = tmp_path / "app.log"
+    log.write_bytes(b"a\nb\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+
+    (tmp_path / "app.log.1").write_bytes(b"a\nb\nx\n")
+    log.write_bytes(b"c\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+
+    assert (tmp_path / "out.txt").read_bytes() == b"a\nb\nx\nc\n"
+
+
+def test_run_tail_merge_output_changed(tmp_path, tail_instructions):
+    """
+    Test output changed since the last merge is written again
+    """
+    (tmp_path / "app.log").write_bytes(b"a\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    (tmp_path / "out.txt").write_bytes(b"edited\n")
+
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    assert (tmp_path / "out.txt").read_bytes() == b"a\n"
+
+
+def test_run_tail_merge_gzip_output(tmp_path, tail_instructions):
+    """
+    Test new data is appended to compressed output as a new block
+    """
+    log = tmp_path / "app.log"
+    log.write_bytes(b"a\n")
+    tail_instructions["OutputName"] = "out.gz"
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+    with log.open("ab") as handle:
+        handle.write(b"b\n")
+    assert MergeFiles(tmp_path.as_posix(), tail_instructions).run()
+
+    assert gzip.decompress((tmp_path / "out.gz").read_bytes()) == b"a\nb\n"
+
+
+@pytest.mark.parametrize("output_name", ["out.txt", "out.gz"])
+def test_run_deduplicate_overlap(tmp_path, output_name):
+    """
+    Test lines repeated at the start of the next rotated file are dropped
+    """
+    (tmp_path / "app.log.2").write_bytes(b"1\n2\n3\n")
+    (tmp_path / "app.log.1").write_bytes(b"2\n3\n4\n5\n")
+    (tmp_path / "app.log").write_bytes(b"5\n6")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"app\.log(?:\.(\d+))?$",
+        "OutputName": output_name,
+        "SortType": "HighLow",
+        "DeduplicateOverlap": "True"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    content = (tmp_path / output_name).read_bytes()
+    if output_name.endswith(".gz"):
+        content = gzip.decompress(content)
+    assert content == b"1\n2\n3\n4\n5\n6\n"
+
+
+def test_run_deduplicate_overlap_min_lines(tmp_path):
+    """
+    Test overlaps shorter than OverlapMinLines are kept
+    """
+    (tmp_path / "app.log.1").write_bytes(b"1\n-- MARK --\n")
+    (tmp_path / "app.log").write_bytes(b"-- MARK --\n2\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"app\.log(?:\.(\d+))?$",
+        "OutputName": "out.txt",
+        "SortType": "HighLow",
+        "DeduplicateOverlap": "True",
+        "OverlapMinLines": "2"
+    }
+    assert MergeFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "out.txt").read_bytes() == \
+        b"1\n-- MARK --\n-- MARK --\n2\n"
@@ -1,6 +1,7 @@
 """
 Module contains tests for PrettyJson class
 """
+import os
 from pathlib import Path
 import pytest
 from logfile.operations.types.pretty_json import PrettyJson
@@ -92,3 +93,30 @@ def test_run(file_system):
     target = file_system["main"]["dir"].as_posix()
     var = PrettyJson(target, None)
     assert var.run(), "This should be able to run"
+
+
+def test_run_incremental(file_system):
+    """
+    Testing incremental run skips files pretty printed earlier
+    """
+    target = file_system["main"]["dir"].as_posix()
+    instructions = {"Incremental": "True"}
+    assert PrettyJson(target, instructions).run(), "Expected to run"
+
+    file1 = file_system["main"]["file1"]
+    mtime = file1.stat().st_mtime_ns
+    assert PrettyJson(target, instructions).run(), "Expected to run"
+    assert file1.stat().st_mtime_ns == mtime, "File should not be rewritten"
+
+
+def test_pretty_print_file_keeps_hardlink(file_system):
+    """
+    Testing a hardlinked copy is not changed by pretty printing
+    """
+    target = file_system["main"]["file1"]
+    linked = file_system["main"]["dir"] / "linked.log"
+    os.link(target.as_posix(), linked.as_posix())
+
+    assert PrettyJson.pretty_print_file(target.as_posix())
+    assert linked.read_text() == '{"hello":"Main"}', "Not expected result"
+    assert not Path(target.as_posix() + ".tmp").exists()
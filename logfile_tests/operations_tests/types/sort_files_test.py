@@ -0,0 +1,99 @@
+"""
+Module contains tests for SortFiles
+"""
+import pytest
+from logfile.operations.types.sort_files import SortFiles
+
+
+@pytest.fixture(name="logs")
+def logs_fixture(tmp_path):
+    """
+    Writes unsorted logs with multi line records
+
+    Args:
+        tmp_path(Path): pathlib/pathlib2.Path object
+
+    Returns:
+        Path: Directory of logs
+    """
+    (tmp_path / "a.log").write_text(
+        "2024-10-17 12:00:03 a3\n"
+        "2024-10-17 12:00:01 a1\n  trace a1\n"
+        "2024-10-17 12:00:05 a5\n")
+    (tmp_path / "b.log").write_text(
+        "2024-10-17 12:00:04 b4\n"
+        "2024-10-17 12:00:02 b2\n")
+    (tmp_path / "other.txt").write_text("2024-10-17 12:00:00 other\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_run_sort_in_place(logs, workers):
+    """
+    Test every matched file is sorted in place in small runs
+    """
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"\.log$",
+        "MemoryBudget": "200",
+        "Workers": workers
+    }
+    assert SortFiles(logs.as_posix(), instructions).run()
+
+    assert (logs / "a.log").read_text() == \
+        "2024-10-17 12:00:01 a1\n  trace a1\n" \
+        "2024-10-17 12:00:03 a3\n2024-10-17 12:00:05 a5\n", \
+        "Not expected return"
+    assert (logs / "b.log").read_text() == \
+        "2024-10-17 12:00:02 b2\n2024-10-17 12:00:04 b4\n", \
+        "Not expected return"
+    assert sorted(path.name for path in logs.iterdir()) == \
+        ["a.log", "b.log", "other.txt"], "Temporary runs should be removed"
+
+
+def test_run_sort_output_name(logs):
+    """
+    Test records of every matched file are sorted into OutputName
+    """
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": r"\.log$",
+        "OutputName": "sorted.log",
+        "Executor": "thread",
+        "Workers": "2"
+    }
+    assert SortFiles(logs.as_posix(), instructions).run()
+    assert SortFiles(logs.as_posix(), instructions).run()
+
+    assert (logs / "sorted.log").read_text() == \
+        "2024-10-17 12:00:01 a1\n  trace a1\n" \
+        "2024-10-17 12:00:02 b2\n2024-10-17 12:00:03 a3\n" \
+        "2024-10-17 12:00:04 b4\n2024-10-17 12:00:05 a5\n", \
+        "Not expected return"
+
+
+def test_run_sort_regex_group(tmp_path):
+    """
+    Test records are sorted by a regex group parsed with format
+    """
+    (tmp_path / "messages").write_text(
+        "Oct 10 10:00:00 host b\nOct  9 11:00:00 host a\n")
+    instructions = {
+        "Directory": "*",
+        "RegexExpression": "messages",
+        "TimestampRegex": r"^(\w{3} [ \d]\d \d\d:\d\d:\d\d)",
+        "TimestampFormat": "%b %d %H:%M:%S"
+    }
+    assert SortFiles(tmp_path.as_posix(), instructions).run()
+
+    assert (tmp_path / "messages").read_text() == \
+        "Oct  9 11:00:00 host a\nOct 10 10:00:00 host b\n", \
+        "Not expected return"
+
+
+def test_run_instructions_none(tmp_path):
+    """
+    Test run fails without RegexExpression
+    """
+    assert not SortFiles(tmp_path.as_posix(), {}).run(), \
+        "Not expected return"
@@ -1,11 +1,18 @@
 """
 Module contains tests for ConvertFiles class
 """
+import bz2
+import lzma
 import tarfile
+import zipfile
 import gzip
 from pathlib import Path
 import pytest
+from logfile.operations.extraction_planner import ExtractionPlan, \
+    ExtractionPlanner
+from logfile.operations.member_extractor import InFlightBytes
 from logfile.operations.types.unzip_files import UnzipFiles
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
 
 # pylint: disable=redefined-outer-name
 # pylint: disable=too-many-locals
@@ -238,3 +245,671 @@ def test_run_instructions_none(file_system):
     workfolder = file_system["main"]["dir"]
     var = UnzipFiles(workfolder, None)
     assert var.run(), "Not expected return"
+
+
+def test_run_workers(file_system):
+    """
+    Testing archives can be extracted by a process pool
+    """
+    instructions = {
+        "Recursive": "True",
+        "Workers": "2",
+        "Executor": "process"
+    }
+    var = UnzipFiles(file_system["main"]["dir"], instructions)
+    assert var.run(), "Not expected return"
+    assert file_system["results"]["main"]["file1"].exists()
+    assert file_system["results"]["main"]["file2"].exists()
+
+
+def test_extract_gz_small_buffer(tmp_path):
+    """
+    Testing gz file larger than buffer is extracted completely
+    """
+    content = bytes(range(256)) * 1000
+    target = tmp_path / "data.bin.gz"
+    with gzip.open(target.as_posix(), 'wb') as handle:
+        handle.write(content)
+
+    assert UnzipFiles.extract_gz(target.as_posix(), 4096)
+    assert (tmp_path / "data.bin").read_bytes() == content
+    assert not target.exists(), "Archive should be deleted"
+
+
+def test_extract_gz_truncated_file(tmp_path):
+    """
+    Testing truncated gz returns false and leaves no partial output
+    """
+    target = tmp_path / "data.bin.gz"
+    with gzip.open(target.as_posix(), 'wb') as handle:
+        handle.write(bytes(range(256)) * 1000)
+    target.write_bytes(target.read_bytes()[:-100])
+
+    assert not UnzipFiles.extract_gz(target.as_posix(), 4096)
+    assert not (tmp_path / "data.bin").exists()
+    assert target.exists(), "Archive should not be deleted"
+
+
+def test_extract_tar_nested(tmp_path):
+    """
+    Testing nested tar and gz members are extracted in one pass
+    """
+    inner_log = tmp_path / "kernel.log.gz"
+    with gzip.open(inner_log.as_posix(), 'wt') as handle:
+        handle.write("kernel")
+    inner_tar = tmp_path / "inner.tgz"
+    with tarfile.open(inner_tar.as_posix(), "w:gz") as tar:
+        tar.add(inner_log.as_posix(), arcname="logs/kernel.log.gz")
+    outer_tar = tmp_path / "outer.tgz"
+    with tarfile.open(outer_tar.as_posix(), "w:gz") as tar:
+        tar.add(inner_tar.as_posix(), arcname="inner.tgz")
+
+    result = UnzipFiles.extract_tar_nested(outer_tar.as_posix(), 16)
+
+    extracted = tmp_path / "outer"
+    assert result == extracted.as_posix(), "Not expected return"
+    assert (extracted / "inner" / "logs" / "kernel.log").read_text() == \
+        "kernel"
+    assert not (extracted / "inner.tgz").exists()
+    assert not (extracted / "inner" / "logs" / "kernel.log.gz").exists()
+
+
+def test_extract_tar_nested_corrupted_member(tmp_path):
+    """
+    Testing a corrupted inner archive is kept as is
+    """
+    corrupted = tmp_path / "broken.gz"
+    corrupted.write_text("I am corrupted")
+    outer_tar = tmp_path / "outer.tar"
+    with tarfile.open(outer_tar.as_posix(), "w") as tar:
+        tar.add(corrupted.as_posix(), arcname="broken.gz")
+
+    assert UnzipFiles.extract_tar_nested(outer_tar.as_posix())
+    kept = tmp_path / "outer" / "broken.gz"
+    assert kept.read_text() == "I am corrupted"
+
+
+def test_extract_tar_nested_unsafe_member(tmp_path):
+    """
+    Testing members escaping the extraction directory is skipped
+    """
+    source = tmp_path / "evil.txt"
+    source.write_text("evil")
+    outer_tar = tmp_path / "outer.tar"
+    with tarfile.open(outer_tar.as_posix(), "w") as tar:
+        tar.add(source.as_posix(), arcname="../evil_copy.txt")
+
+    assert UnzipFiles.extract_tar_nested(outer_tar.as_posix())
+    assert not (tmp_path / "evil_copy.txt").exists()
+
+
+def test_extract_tar_nested_corrupted_file(file_system):
+    """
+    Testing extract_tar_nested returns None if file is corrupted
+    """
+    target = file_system["main"]["corrupted_tgz"].as_posix()
+    assert not UnzipFiles.extract_tar_nested(target), "Not expected return"
+
+
+def test_extract_files_gz_containing_tar(tmp_path, monkeypatch):
+    """
+    Testing a '.tar.gz' file is extracted as a tar, without writing the
+    decompressed tar to disk
+    """
+    def refuse(*args):
+        raise AssertionError("Tar should not be decompressed to disk")
+
+    monkeypatch.setattr(UnzipFiles, "extract_stream", refuse)
+    source = tmp_path / "syslog"
+    source.write_text("syslog")
+    plain_tar = tmp_path / "bundle.tar"
+    with tarfile.open(plain_tar.as_posix(), "w") as tar:
+        tar.add(source.as_posix(), arcname="var/syslog")
+    source.unlink()
+    target = tmp_path / "bundle.tar.gz"
+    with open(plain_tar.as_posix(), 'rb') as f_in:
+        with gzip.open(target.as_posix(), 'wb') as f_out:
+            f_out.writelines(f_in)
+    plain_tar.unlink()
+
+    result = UnzipFiles.extract_files(target.as_posix(), True)
+
+    extracted = tmp_path / "bundle" / "var" / "syslog"
+    assert result.extracted_to == (tmp_path / "bundle").as_posix(), \
+        "Not expected return"
+    assert result.files == [extracted.as_posix()], "Not expected return"
+    assert extracted.read_text() == "syslog"
+    assert not (tmp_path / "bundle.tar").exists()
+
+
+def test_extract_files_gz_holding_tar(tmp_path):
+    """
+    Testing a gz file decompressing to a tar returns the directory the
+    tar is extracted to, not the deleted tar
+    """
+    plain_tar = make_bundle(tmp_path, "logs", "w")
+    target = tmp_path / "logs.gz"
+    target.write_bytes(gzip.compress(plain_tar.read_bytes()))
+    plain_tar.unlink()
+
+    result = UnzipFiles.extract_files(target.as_posix(), True)
+
+    assert result.extracted_to == (tmp_path / "logs.d").as_posix(), \
+        "Not expected return"
+    assert (tmp_path / "logs.d" / "var" / "log" / "messages").exists()
+    assert not (tmp_path / "logs").exists()
+
+
+def test_run_gz_holding_tar_snapshot(tmp_path):
+    """
+    Testing a shared snapshot holds the files of a tar inside a gz file
+    """
+    plain_tar = make_bundle(tmp_path, "logs", "w")
+    (tmp_path / "logs.gz").write_bytes(gzip.compress(plain_tar.read_bytes()))
+    plain_tar.unlink()
+    snapshot = WorkfolderSnapshot(tmp_path.as_posix())
+
+    instructions = {"Directory": "*", "Recursive": "True"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions, snapshot).run()
+
+    extracted = tmp_path / "logs.d"
+    assert sorted(snapshot.files(tmp_path.as_posix(), True)) == [
+        (extracted / "usr" / "bin" / "tool.bin").as_posix(),
+        (extracted / "var" / "log" / "messages").as_posix()], \
+        "Not expected return"
+
+
+def test_extract_files_keeps_corrupted_archive(tmp_path):
+    """
+    Testing a corrupted archive produced by an extraction is returned once
+    and not extracted again
+    """
+    corrupted = tmp_path / "broken.gz"
+    corrupted.write_text("I am corrupted")
+    outer_tar = tmp_path / "outer.tar"
+    with tarfile.open(outer_tar.as_posix(), "w") as tar:
+        tar.add(corrupted.as_posix(), arcname="broken.gz")
+    corrupted.unlink()
+
+    result = UnzipFiles.extract_files(outer_tar.as_posix(), True)
+
+    kept = (tmp_path / "outer" / "broken.gz").as_posix()
+    assert result.files == [kept], "Not expected return"
+    assert result.kept_archives == [kept], "Not expected return"
+
+
+def test_extract_files_not_archive(file_system):
+    """
+    Testing extract_files returns nothing for a file not being an archive
+    """
+    target = file_system["main"]["testfile"].as_posix()
+    result = UnzipFiles.extract_files(target, True)
+    assert result.extracted_to is None, "Not expected return"
+    assert result.files == [], "Not expected return"
+
+
+def make_bundle(tmp_path, name, mode):
+    """
+    Creates a tar with a log file and a binary file
+
+    Args:
+        tmp_path(Path): Directory to create tar in
+        name(str): Tar file name
+        mode(str): Tar write mode
+
+    Returns:
+        Path: Tar path
+    """
+    log_file = tmp_path / "messages"
+    log_file.write_text("log")
+    bin_file = tmp_path / "tool.bin"
+    bin_file.write_text("binary")
+    target = tmp_path / name
+    with tarfile.open(target.as_posix(), mode) as tar:
+        tar.add(log_file.as_posix(), arcname="var/log/messages")
+        tar.add(bin_file.as_posix(), arcname="usr/bin/tool.bin")
+    log_file.unlink()
+    bin_file.unlink()
+    return target
+
+
+@pytest.mark.parametrize("recursive", ["True", "False"])
+def test_run_include_files(tmp_path, recursive):
+    """
+    Testing only members matching IncludeFiles are extracted
+    """
+    make_bundle(tmp_path, "bundle.tgz", "w:gz")
+    instructions = {"Directory": "*", "Recursive": recursive,
+                    "IncludeFiles": "var/log/"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+
+    extracted = tmp_path / "bundle"
+    assert (extracted / "var" / "log" / "messages").read_text() == "log"
+    assert not (extracted / "usr").exists()
+
+
+def test_run_exclude_extensions(tmp_path):
+    """
+    Testing members matching ExcludeExtensions are not extracted
+    """
+    make_bundle(tmp_path, "bundle.tar", "w")
+    instructions = {"Directory": "*", "Recursive": "True",
+                    "ExcludeExtensions": ".bin"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+
+    extracted = tmp_path / "bundle"
+    assert (extracted / "var" / "log" / "messages").exists()
+    assert not (extracted / "usr" / "bin" / "tool.bin").exists()
+
+
+def test_member_filter_instruction_is_none():
+    """
+    Testing member_filter_instruction default value
+    """
+    assert UnzipFiles("test", None).member_filter_instruction is None
+
+
+def test_run_cache_directory(tmp_path):
+    """
+    Testing a repeated archive is restored from the cache
+    """
+    cache_dir = tmp_path / "cache"
+    instructions = {"Directory": "*", "Recursive": "True",
+                    "CacheDirectory": cache_dir.as_posix()}
+    bundle = make_bundle(tmp_path, "bundle.tgz", "w:gz")
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    for workfolder in [first, second]:
+        workfolder.mkdir()
+        (workfolder / bundle.name).write_bytes(bundle.read_bytes())
+
+    assert UnzipFiles(first.as_posix(), instructions).run()
+    assert UnzipFiles(second.as_posix(), instructions).run()
+
+    first_log = first / "bundle" / "var" / "log" / "messages"
+    second_log = second / "bundle" / "var" / "log" / "messages"
+    assert second_log.read_text() == "log"
+    assert not (second / "bundle.tgz").exists()
+    assert first_log.stat().st_ino == second_log.stat().st_ino, \
+        "File should be restored from cache"
+
+
+def test_run_skips_zip_documents(tmp_path):
+    """
+    Testing zip based documents are not extracted
+    """
+    with zipfile.ZipFile((tmp_path / "report.docx").as_posix(),
+                         "w") as archive:
+        archive.writestr("word/document.xml", "<document/>")
+    with zipfile.ZipFile((tmp_path / "logs.zip").as_posix(), "w") as archive:
+        archive.writestr("messages", "log")
+    instructions = {"Directory": "*", "Recursive": "True"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+    assert (tmp_path / "report.docx").is_file(), \
+        "File should not be extracted"
+    assert (tmp_path / "logs" / "messages").exists()
+
+
+def test_run_dry_run(tmp_path):
+    """
+    Testing DryRun does not extract anything
+    """
+    make_bundle(tmp_path, "bundle.tgz", "w:gz")
+    instructions = {"Directory": "*", "Recursive": "True", "DryRun": "True"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+    assert (tmp_path / "bundle.tgz").exists(), "File should not be extracted"
+    assert not (tmp_path / "bundle").exists()
+
+
+def test_run_not_enough_disk(tmp_path, monkeypatch):
+    """
+    Testing nothing is extracted when free disk space is too low
+    """
+    make_bundle(tmp_path, "bundle.tar", "w")
+    monkeypatch.setattr(ExtractionPlan, "fits_disk", lambda self, path: False)
+    instructions = {"Directory": "*", "Recursive": "True"}
+    assert not UnzipFiles(tmp_path.as_posix(), instructions).run()
+    assert (tmp_path / "bundle.tar").exists(), "File should not be extracted"
+
+
+@pytest.mark.parametrize("dry_run", ["True", "False"])
+def test_run_detailed_plan_only_on_dry_run(tmp_path, monkeypatch, dry_run):
+    """
+    Testing recursive runs plan from tar headers and gzip trailers, only
+    DryRun decompresses archives to plan them
+    """
+    make_bundle(tmp_path, "bundle.tgz", "w:gz")
+    detailed_plans = []
+    plan_file = ExtractionPlanner.plan_file
+
+    def recording_plan_file(filepath, detailed=False):
+        detailed_plans.append(detailed)
+        return plan_file(filepath, detailed)
+
+    monkeypatch.setattr(ExtractionPlanner, "plan_file",
+                        staticmethod(recording_plan_file))
+    instructions = {"Directory": "*", "Recursive": "True",
+                    "DryRun": dry_run}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+    assert detailed_plans == [dry_run == "True"], "Not expected return"
+
+
+def test_plan_extraction_skips_other_files(file_system):
+    """
+    Testing plan only holds archives
+    """
+    files = [file_system["main"]["testfile"].as_posix(),
+             file_system["main"]["file2"].as_posix()]
+    plan = UnzipFiles.plan_extraction(files, True)
+    assert plan.files == [files[1]], "Not expected result"
+
+
+def make_dated_tar(tmp_path):
+    """
+    Creates a tar with an old file and a symbolic link to it
+
+    Args:
+        tmp_path(Path): Directory to create tar in
+
+    Returns:
+        Path: Tar path
+    """
+    source = tmp_path / "old.log"
+    source.write_text("old")
+    link = tmp_path / "current.log"
+    link.symlink_to("old.log")
+    target = tmp_path / "dated.tar"
+    with tarfile.open(target.as_posix(), "w") as tar:
+        info = tar.gettarinfo(source.as_posix(), arcname="logs/old.log")
+        info.mtime = 1000
+        with open(source.as_posix(), "rb") as handle:
+            tar.addfile(info, handle)
+        tar.add(link.as_posix(), arcname="logs/current.log")
+    source.unlink()
+    link.unlink()
+    return target
+
+
+def test_extract_tar_fast(tmp_path):
+    """
+    Testing fast extraction writes data and links without timestamps
+    """
+    target = make_dated_tar(tmp_path)
+    assert UnzipFiles.extract_tar(target.as_posix())
+
+    extracted = tmp_path / "dated" / "logs"
+    assert (extracted / "old.log").read_text() == "old"
+    assert (extracted / "current.log").read_text() == "old"
+    assert (extracted / "old.log").stat().st_mtime != 1000
+
+
+def test_extract_tar_preserve_metadata(tmp_path):
+    """
+    Testing timestamps are restored with preserve_metadata
+    """
+    target = make_dated_tar(tmp_path)
+    assert UnzipFiles.extract_tar(target.as_posix(), preserve_metadata=True)
+
+    extracted = tmp_path / "dated" / "logs" / "old.log"
+    assert extracted.stat().st_mtime == 1000
+
+
+def test_run_preserve_metadata(tmp_path):
+    """
+    Testing PreserveMetadata instruction restores timestamps
+    """
+    make_dated_tar(tmp_path)
+    instructions = {"Directory": "*", "Recursive": "True",
+                    "PreserveMetadata": "True"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+    assert (tmp_path / "dated" / "logs" / "old.log").stat().st_mtime == 1000
+
+
+def test_extract_zip(tmp_path):
+    """
+    Testing zip files are extracted
+    """
+    target = tmp_path / "logs.zip"
+    with zipfile.ZipFile(target.as_posix(), "w") as archive:
+        archive.writestr("var/log/messages", "log")
+        archive.writestr("../evil.txt", "evil")
+
+    result = UnzipFiles.extract_zip(target.as_posix())
+
+    assert result == (tmp_path / "logs").as_posix(), "Not expected return"
+    assert (tmp_path / "logs" / "var" / "log" / "messages").read_text() == \
+        "log"
+    assert not (tmp_path / "evil.txt").exists()
+    assert not target.exists(), "File should be deleted"
+
+
+@pytest.mark.parametrize("name, compress", [
+    ("messages.bz2", bz2.compress),
+    ("messages.xz", lzma.compress),
+])
+def test_extract_stream_formats(tmp_path, name, compress):
+    """
+    Testing bz2 and xz files are extracted
+    """
+    target = tmp_path / name
+    target.write_bytes(compress(b"log"))
+
+    result = UnzipFiles.extract(target.as_posix(), False)
+
+    assert result == (tmp_path / "messages").as_posix(), "Not expected return"
+    assert (tmp_path / "messages").read_bytes() == b"log"
+
+
+def test_extract_gz_without_extension(tmp_path):
+    """
+    Testing a gz file without extension is decompressed in place
+    """
+    target = tmp_path / "messages.1"
+    target.write_bytes(gzip.compress(b"rotated"))
+
+    assert UnzipFiles.extract(target.as_posix(), False) == target.as_posix()
+    assert target.read_bytes() == b"rotated"
+    assert not (tmp_path / "messages.1.tmp").exists()
+
+
+def test_extract_tar_xz(tmp_path):
+    """
+    Testing xz compressed tar files are extracted
+    """
+    make_bundle(tmp_path, "bundle.txz", "w:xz")
+    assert UnzipFiles.extract(tmp_path.joinpath("bundle.txz").as_posix(),
+                              True)
+    assert (tmp_path / "bundle" / "var" / "log" / "messages").exists()
+
+
+def test_extract_nested_xz_member(tmp_path):
+    """
+    Testing xz members of a tar are decompressed while reading the tar
+    """
+    inner = tmp_path / "kernel.log.xz"
+    inner.write_bytes(lzma.compress(b"kernel"))
+    outer = tmp_path / "outer.tar"
+    with tarfile.open(outer.as_posix(), "w") as tar:
+        tar.add(inner.as_posix(), arcname="kernel.log.xz")
+    inner.unlink()
+
+    result = UnzipFiles.extract_files(outer.as_posix(), True)
+
+    kernel = tmp_path / "outer" / "kernel.log"
+    assert result.files == [kernel.as_posix()], "Not expected result"
+    assert kernel.read_bytes() == b"kernel"
+
+
+def test_extract_recursive_zip_in_tar(tmp_path):
+    """
+    Testing a zip inside a tar is queued and extracted
+    """
+    inner = tmp_path / "logs.zip"
+    with zipfile.ZipFile(inner.as_posix(), "w") as archive:
+        archive.writestr("messages", "log")
+    outer = tmp_path / "outer.tar"
+    with tarfile.open(outer.as_posix(), "w") as tar:
+        tar.add(inner.as_posix(), arcname="logs.zip")
+    inner.unlink()
+
+    result = UnzipFiles.extract_files(outer.as_posix(), True)
+
+    messages = tmp_path / "outer" / "logs" / "messages"
+    assert result.files == [messages.as_posix()], "Not expected result"
+
+
+def test_extract_zstd(tmp_path):
+    """
+    Testing zstd files are extracted when zstandard is installed
+    """
+    zstandard = pytest.importorskip("zstandard")
+    target = tmp_path / "messages.zst"
+    target.write_bytes(zstandard.ZstdCompressor().compress(b"log"))
+
+    assert UnzipFiles.extract(target.as_posix(), False)
+    assert (tmp_path / "messages").read_bytes() == b"log"
+
+
+@pytest.mark.parametrize("threads", ["1", "4"])
+def test_run_parallel_decompression(tmp_path, threads):
+    """
+    Testing rotated logs inside bundles are extracted with any number of
+    decompress threads
+    """
+    logs = tmp_path / "logs.zip"
+    with zipfile.ZipFile(logs.as_posix(), "w") as archive:
+        for index in range(10):
+            archive.writestr(f"messages.{index}.gz",
+                             gzip.compress(f"zip {index}".encode()))
+    bundle = tmp_path / "bundle.tar"
+    with tarfile.open(bundle.as_posix(), "w") as tar:
+        for index in range(10):
+            rotated = tmp_path / f"kern.log.{index}.gz"
+            rotated.write_bytes(gzip.compress(f"tar {index}".encode()))
+            tar.add(rotated.as_posix(), arcname=rotated.name)
+            rotated.unlink()
+        tar.add(logs.as_posix(), arcname=logs.name)
+    logs.unlink()
+
+    instructions = {"Directory": "*", "Recursive": "True",
+                    "DecompressThreads": threads, "MaxInFlightBytes": "100"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+
+    for index in range(10):
+        assert (tmp_path / "bundle" / f"kern.log.{index}").read_bytes() == \
+            f"tar {index}".encode()
+        assert (tmp_path / "bundle" / "logs" /
+                f"messages.{index}").read_bytes() == f"zip {index}".encode()
+    assert not list(tmp_path.rglob("*.gz")), "Archives should be deleted"
+
+
+def test_run_index_gzip(tmp_path):
+    """
+    Testing gzip files are indexed instead of extracted with IndexGzip
+    """
+    target = tmp_path / "messages.1.gz"
+    target.write_bytes(gzip.compress(b"log line\n" * 100))
+    make_bundle(tmp_path, "bundle.tgz", "w:gz")
+
+    instructions = {"Directory": "*", "IndexGzip": "True"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+
+    assert target.exists(), "Gzip file should be kept"
+    assert (tmp_path / "messages.1.gz.gzidx").exists()
+    assert (tmp_path / "bundle" / "var" / "log" / "messages").exists()
+    assert not (tmp_path / "bundle.tgz.gzidx").exists()
+
+
+@pytest.mark.parametrize("extension, mode", [(".tar.xz", "w:xz"),
+                                             (".tar.bz2", "w:bz2")])
+def test_extract_nested_compressed_tar(tmp_path, monkeypatch, extension,
+                                       mode):
+    """
+    Testing compressed tars inside a tar are extracted while reading,
+    never written to disk as a '.tar'
+    """
+    def refuse(*args):
+        raise AssertionError("Tar should not be decompressed to disk")
+
+    monkeypatch.setattr(UnzipFiles, "extract_stream", refuse)
+    make_bundle(tmp_path, "inner" + extension, mode)
+    outer = tmp_path / "outer.tar"
+    with tarfile.open(outer.as_posix(), "w") as tar:
+        tar.add((tmp_path / ("inner" + extension)).as_posix(),
+                arcname="inner" + extension)
+    (tmp_path / ("inner" + extension)).unlink()
+
+    result = UnzipFiles.extract_files(outer.as_posix(), True)
+
+    inner = tmp_path / "outer" / "inner"
+    assert sorted(result.files) == [
+        (inner / "usr" / "bin" / "tool.bin").as_posix(),
+        (inner / "var" / "log" / "messages").as_posix()], \
+        "Not expected result"
+
+
+def test_run_corrupted_member_in_nested_tar(tmp_path):
+    """
+    Testing a corrupted archive inside a tar read as a stream is kept as
+    is and the members after it are still extracted
+    """
+    ok_file = tmp_path / "ok.txt"
+    ok_file.write_text("ok")
+    bad_file = tmp_path / "bad.gz"
+    bad_file.write_bytes(b"\x1f\x8b" + b"corrupted" * 10)
+    with tarfile.open((tmp_path / "inner.tar").as_posix(), "w") as tar:
+        tar.add(bad_file.as_posix(), arcname="bad.gz")
+        tar.add(ok_file.as_posix(), arcname="ok.txt")
+    with tarfile.open((tmp_path / "outer.tgz").as_posix(), "w:gz") as tar:
+        tar.add((tmp_path / "inner.tar").as_posix(), arcname="inner.tar")
+    for path in (ok_file, bad_file, tmp_path / "inner.tar"):
+        path.unlink()
+
+    operation = UnzipFiles(tmp_path.as_posix(),
+                           {"Directory": "*", "Recursive": "True"})
+    assert operation.run()
+
+    inner = tmp_path / "outer" / "inner"
+    assert (inner / "ok.txt").read_text() == "ok", "Not expected result"
+    assert (inner / "bad.gz").read_bytes().startswith(b"\x1f\x8b"), \
+        "Corrupted archive should be kept as is"
+    assert not (tmp_path / "outer.tgz").exists()
+
+
+def test_run_shares_in_flight_bytes(tmp_path, monkeypatch):
+    """
+    Testing archives extracted at the same time share MaxInFlightBytes
+    """
+    for bundle_index in range(2):
+        bundle = tmp_path / f"bundle{bundle_index}.tar"
+        with tarfile.open(bundle.as_posix(), "w") as tar:
+            for index in range(20):
+                rotated = tmp_path / f"kern.log.{index}.gz"
+                rotated.write_bytes(gzip.compress(f"log {index}".encode()))
+                tar.add(rotated.as_posix(), arcname=rotated.name)
+                rotated.unlink()
+
+    budgets = []
+    peaks = []
+    in_flight_init = InFlightBytes.__init__
+    in_flight_acquire = InFlightBytes.acquire
+
+    def recording_init(self, max_bytes):
+        budgets.append(self)
+        in_flight_init(self, max_bytes)
+
+    def recording_acquire(self, size):
+        in_flight_acquire(self, size)
+        peaks.append(self.in_flight)
+
+    monkeypatch.setattr(InFlightBytes, "__init__", recording_init)
+    monkeypatch.setattr(InFlightBytes, "acquire", recording_acquire)
+    instructions = {"Directory": "*", "Recursive": "True", "Workers": "2",
+                    "DecompressThreads": "4", "MaxInFlightBytes": "100"}
+    assert UnzipFiles(tmp_path.as_posix(), instructions).run()
+
+    for bundle_index in range(2):
+        assert (tmp_path / f"bundle{bundle_index}" / "kern.log.7"
+                ).read_bytes() == b"log 7", "Not expected result"
+    assert len(budgets) == 1, "Archives should share one budget"
+    assert len(peaks) == 40 and max(peaks) <= 100, "Not expected result"
@@ -0,0 +1,156 @@
+"""
+Testing WorkfolderSnapshot class
+"""
+import pytest
+from logfile.operations.workfolder_snapshot import WorkfolderSnapshot
+from logfile.operations.types.convert_files import ConvertFiles
+from logfile.operations.types.merge_files import MergeFiles
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def file_system(tmp_path):
+    """
+    Setup directory with files
+
+    Args:
+        tmp_path(Path): pathlib/pathlib2.Path object
+
+    Returns:
+        dict: Filesystem inside dictionary
+    """
+    main_dir = tmp_path / "main"
+    main_file1 = main_dir / "file1.txt"
+    main_file2 = main_dir / "messages"
+
+    sub_dir = main_dir / "sub"
+    sub_file1 = sub_dir / "file1.txt"
+
+    main_dir.mkdir()
+    sub_dir.mkdir()
+
+    main_file1.write_text("1")
+    main_file2.write_text("22")
+    sub_file1.write_text("1")
+
+    return {
+        "main": {
+            "dir": main_dir,
+            "file1": main_file1,
+            "file2": main_file2
+        },
+        "sub": {
+            "dir": sub_dir,
+            "file1": sub_file1
+        }
+    }
+
+
+def test_files(file_system):
+    """
+    Test snapshot lists files in walk order
+    """
+    snapshot = WorkfolderSnapshot(file_system["main"]["dir"].as_posix())
+    files = list(snapshot.files(file_system["main"]["dir"].as_posix(), True))
+    assert files == [file_system["main"]["file1"].as_posix(),
+                     file_system["main"]["file2"].as_posix(),
+                     file_system["sub"]["file1"].as_posix()]
+
+
+def test_files_not_recursive(file_system):
+    """
+    Test snapshot lists files in directory only
+    """
+    snapshot = WorkfolderSnapshot(file_system["main"]["dir"].as_posix())
+    files = list(snapshot.files(file_system["main"]["dir"].as_posix(), False))
+    assert len(files) == 2, "Not expected count"
+
+
+def test_files_directory_not_in_snapshot(file_system):
+    """
+    Test snapshot lists nothing outside of workfolder
+    """
+    snapshot = WorkfolderSnapshot(file_system["sub"]["dir"].as_posix())
+    assert not snapshot.contains(file_system["main"]["dir"].as_posix())
+    assert list(snapshot.files("invalid/path", True)) == []
+
+
+def test_workfolder_none():
+    """
+    Test snapshot of no workfolder is empty
+    """
+    snapshot = WorkfolderSnapshot(None)
+    assert snapshot.file_count == 0, "Not expected count"
+
+
+def test_directories(file_system):
+    """
+    Test snapshot lists sub directories
+    """
+    main_dir = file_system["main"]["dir"].as_posix()
+    snapshot = WorkfolderSnapshot(main_dir)
+    directories = list(snapshot.directories(main_dir, True))
+    assert directories == [file_system["sub"]["dir"].as_posix()]
+
+
+def test_stat(file_system):
+    """
+    Test snapshot records file size
+    """
+    snapshot = WorkfolderSnapshot(file_system["main"]["dir"].as_posix())
+    stat = snapshot.stat(file_system["main"]["file2"].as_posix())
+    assert stat.size == 2, "Not expected size"
+
+
+def test_rename_file(file_system):
+    """
+    Test renamed file is moved in snapshot
+    """
+    snapshot = WorkfolderSnapshot(file_system["main"]["dir"].as_posix())
+    old_path = file_system["main"]["file1"]
+    new_path = old_path.with_name("renamed.txt")
+    old_path.rename(new_path)
+
+    assert snapshot.rename_file(old_path.as_posix(), new_path.as_posix())
+    assert snapshot.stat(old_path.as_posix()) is None
+    assert snapshot.stat(new_path.as_posix()) is not None
+
+
+def test_add_directory(file_system):
+    """
+    Test a new directory is added without rescanning
+    """
+    main_dir = file_system["main"]["dir"]
+    snapshot = WorkfolderSnapshot(main_dir.as_posix())
+    new_dir = main_dir / "new"
+    new_dir.mkdir()
+    (new_dir / "new.txt").write_text("new")
+
+    snapshot.add_directory(new_dir.as_posix())
+    assert snapshot.file_count == 4, "Not expected count"
+    assert new_dir.as_posix() in snapshot.directories(main_dir.as_posix(),
+                                                      False)
+
+
+def test_operations_update_snapshot(file_system):
+    """
+    Test operations sharing a snapshot keep it up to date
+    """
+    main_dir = file_system["main"]["dir"].as_posix()
+    snapshot = WorkfolderSnapshot(main_dir)
+
+    convert = ConvertFiles(main_dir, {"ExcludeFiles": "messages"}, snapshot)
+    assert convert.run(), "Expected to run successfully"
+
+    instructions = {
+        "RegexExpression": r"file(\d)",
+        "OutputName": "out.txt",
+        "Delete": "True"
+    }
+    merge = MergeFiles(main_dir, instructions, snapshot)
+    assert merge.run(), "Expected to run successfully"
+
+    files = list(snapshot.files(main_dir, False))
+    assert files == [file_system["main"]["file2"].as_posix(),
+                     (file_system["main"]["dir"] / "out.txt").as_posix()]
@@ -2,6 +2,7 @@
 Module contains test for ReadFullDocument
 """
 
+import gzip
 import pytest
 from logfile.readers.types.read_full_document import ReadFullDocument
 
@@ -50,6 +51,21 @@ def test_read(file_system):
     assert data.values == ("Beolab90",)
 
 
+def test_read_inside_archive(tmp_path):
+    """
+    Test read full document inside an archive
+    """
+    (tmp_path / "hostname.gz").write_bytes(gzip.compress(b"Beolab90"))
+    instructions = {
+        "KeyName": "Host Name"
+    }
+    var = ReadFullDocument(tmp_path, "hostname.gz/hostname", instructions)
+    result = var.read()
+
+    assert len(result.container) == 1
+    assert result.container[0].values == ("Beolab90",)
+
+
 def test_read_invalid_workfolder():
     """
     Test read full document dont run